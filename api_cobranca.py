@@ -0,0 +1,349 @@
+# api_cobranca.py — API local p/ o chat do index.html (asyncio, só stdlib)
+# Responde "saldo do cliente 0123", "top 5 devedores do vendedor X" e "progresso da campanha"
+# a partir de um índice em memória do último consolidado e dos logs em saidas/. As respostas
+# ficam em cache até chegar conversão/log novo (checado no máximo a cada VERIFICA_S).
+#
+# Exemplo:
+#   python api_cobranca.py --porta 8765        → abra http://127.0.0.1:8765/
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import urllib.parse
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import cobra
+
+AQUI = Path(__file__).resolve().parent
+ESTATICOS = {"/": "index.html", "/index.html": "index.html", "/script.js": "script.js", "/style.css": "style.css"}
+TIPOS = {".html": "text/html; charset=utf-8", ".js": "application/javascript; charset=utf-8",
+         ".css": "text/css; charset=utf-8"}
+VERIFICA_S = 2.0                  # intervalo mínimo entre checagens de arquivos novos em saidas/
+CACHE_MAX = 1024                  # respostas guardadas (LRU)
+TOP_PADRAO = 10
+TOP_MAX = 100
+CORPO_MAX = 64 * 1024
+
+RE_PROGRESSO = re.compile(r"progresso|andamento|enviad", re.I)   # "campanha" sozinha não: "top 10 da campanha"
+RE_TOP = re.compile(r"\b(?:top|maiores)\s*(\d+)?\s*(?:devedores|saldos|clientes)?"
+                    r"(?:\s+(?:do|da|de)\s+(?:vendedora?\s+)?(.+))?", re.I)
+RE_CODIGO = re.compile(r"\b(\d{1,4})\b")
+LOOPBACK = ("127.0.0.1", "localhost", "::1")
+
+
+def assinatura(pasta: Path) -> tuple:
+    """(nome, mtime, tamanho) dos consolidados e logs: muda quando chega conversão ou log novo."""
+    sig = []
+    for padrao in ("consolidado_cobranca_*.csv", "log_cobrancas_*.csv"):
+        for arq in sorted(pasta.glob(padrao)):
+            try:
+                st = arq.stat()
+            except FileNotFoundError:
+                continue
+            sig.append((arq.name, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+class IndiceCarteira:
+    """Retrato em memória do último consolidado + logs, montado uma vez por assinatura."""
+
+    def __init__(self, pasta: Path):
+        t0 = time.perf_counter()
+        self.pasta = pasta
+        self.consolidado: Optional[str] = None
+        self.clientes: dict[str, tuple[str, float, str]] = {}          # código → (cliente, saldo, vendedor)
+        self.vendedores: dict[str, list[tuple[str, str, float]]] = {}  # vendedor → [(código, cliente, saldo)] desc
+        self.top_geral: list[tuple[str, str, float, str]] = []
+        self.ultimo_contato: dict[str, str] = {}
+        self.progresso: dict = {}
+        self._carrega_consolidado()
+        self._carrega_logs()
+        self.montagem_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+    def _carrega_consolidado(self):
+        arqs = sorted(self.pasta.glob("consolidado_cobranca_*.csv"))
+        if not arqs:
+            return
+        self.consolidado = arqs[-1].name
+        df = pd.read_csv(arqs[-1], sep=";", encoding="utf-8-sig", dtype={"Codigo4d": str})
+        df = df.assign(Codigo4d=cobra._norm_code_serie(df["Codigo4d"]),
+                       Saldo=pd.to_numeric(df["Saldo"], errors="coerce").fillna(0.0),
+                       VendedorArquivo=df.get("VendedorArquivo", pd.Series("", index=df.index)).fillna("").astype(str))
+        df = df.sort_values("Saldo", ascending=False, kind="mergesort")
+        self.clientes = {c: (n, s, v) for c, n, s, v in
+                         zip(df["Codigo4d"], df["Cliente"].astype(str), df["Saldo"], df["VendedorArquivo"])}
+        for vend, g in df.groupby("VendedorArquivo", sort=False):
+            self.vendedores[vend] = list(zip(g["Codigo4d"], g["Cliente"].astype(str), g["Saldo"]))
+        self.top_geral = list(zip(df["Codigo4d"][:TOP_MAX], df["Cliente"].astype(str)[:TOP_MAX],
+                                  df["Saldo"][:TOP_MAX], df["VendedorArquivo"][:TOP_MAX]))
+
+    def _carrega_logs(self):
+        logs = cobra.le_logs_cobranca(self.pasta)
+        if logs.empty:
+            return
+        self.ultimo_contato = {c: ts.strftime("%d/%m/%Y %H:%M")
+                               for c, ts in cobra.ultimo_contato_por_cliente(logs).dropna().items()}
+        ultimo = sorted(self.pasta.glob("log_cobrancas_*.csv"))[-1].name
+        atual = cobra.le_logs_cobranca(self.pasta, ultimo)
+        hoje = logs[logs["timestamp"].str.startswith(datetime.now().strftime("%Y-%m-%d"))]
+        self.progresso = {
+            "log": ultimo,
+            "processados": len(atual),
+            "por_status": {k: int(v) for k, v in atual["status"].value_counts().items()},
+            "inicio": atual["timestamp"].min() if len(atual) else "",
+            "ultimo": atual["timestamp"].max() if len(atual) else "",
+            "hoje_abertos": int(hoje["status"].isin(cobra.STATUS_ABERTOS).sum()),
+        }
+
+    def acha_vendedor(self, texto: str) -> Optional[str]:
+        alvo = cobra.normaliza_nome(texto)
+        if not alvo:
+            return None
+        for vend in self.vendedores:
+            if alvo in cobra.normaliza_nome(vend):
+                return vend
+        return None
+
+
+# ---------- respostas ----------
+def resp_saldo(ix: IndiceCarteira, codigo: str) -> dict:
+    cod = cobra._norm_code(codigo)
+    if cod not in ix.clientes:
+        return {"tipo": "saldo", "resposta": f"Cliente {cod} não está no último consolidado.", "dados": None}
+    cliente, saldo, vend = ix.clientes[cod]
+    contato = ix.ultimo_contato.get(cod)
+    txt = f"{cod} - {cliente}: saldo R$ {cobra.formata_brl(saldo)} ({vend or 'sem vendedor'})."
+    txt += f" Último contato: {contato}." if contato else " Ainda não foi contatado."
+    return {"tipo": "saldo", "resposta": txt,
+            "dados": {"codigo4d": cod, "cliente": cliente, "saldo": saldo, "vendedor": vend,
+                      "ultimo_contato": contato}}
+
+
+def resp_top(ix: IndiceCarteira, n: int = TOP_PADRAO, vendedor: str = "") -> dict:
+    n = max(1, min(TOP_MAX, n))
+    if vendedor:
+        vend = ix.acha_vendedor(vendedor)
+        if vend is None:
+            return {"tipo": "top", "resposta": f"Vendedor '{vendedor}' não encontrado.", "dados": []}
+        linhas = [(c, nome, s, vend) for c, nome, s in ix.vendedores[vend][:n]]
+        titulo = f"Top {len(linhas)} devedores de {vend}:"
+    else:
+        linhas = ix.top_geral[:n]
+        titulo = f"Top {len(linhas)} devedores:"
+    if not linhas:
+        return {"tipo": "top", "resposta": "Nenhum consolidado em saidas/ ainda.", "dados": []}
+    txt = "\n".join([titulo] + [f"{i}. {c} - {nome}: R$ {cobra.formata_brl(s)}"
+                                for i, (c, nome, s, _) in enumerate(linhas, 1)])
+    return {"tipo": "top", "resposta": txt,
+            "dados": [{"codigo4d": c, "cliente": nome, "saldo": s, "vendedor": v} for c, nome, s, v in linhas]}
+
+
+def resp_progresso(ix: IndiceCarteira) -> dict:
+    p = ix.progresso
+    if not p:
+        return {"tipo": "progresso", "resposta": "Nenhuma campanha registrada em saidas/.", "dados": None}
+    st = ", ".join(f"{k}={v}" for k, v in p["por_status"].items())
+    txt = (f"Última campanha ({p['log']}): {p['processados']} clientes processados ({st}); "
+           f"de {p['inicio'][11:16]} a {p['ultimo'][11:16]}. Conversas abertas hoje: {p['hoje_abertos']}.")
+    return {"tipo": "progresso", "resposta": txt, "dados": p}
+
+
+def responde(ix: IndiceCarteira, pergunta: str) -> dict:
+    """Interpreta a pergunta do chat (top → progresso → código) e monta a resposta."""
+    m = RE_TOP.search(pergunta)
+    if m:
+        return resp_top(ix, int(m.group(1) or TOP_PADRAO), (m.group(2) or "").strip(" ?.!"))
+    if RE_PROGRESSO.search(pergunta):
+        return resp_progresso(ix)
+    m = RE_CODIGO.search(pergunta)
+    if m:
+        return resp_saldo(ix, m.group(1))
+    return {"tipo": "ajuda", "dados": None,
+            "resposta": "Posso responder: 'saldo do cliente 0123', 'top 10 devedores do vendedor X' "
+                        "ou 'progresso da campanha'."}
+
+
+# ---------- servidor ----------
+def origens_permitidas(host: str, porta: int) -> frozenset:
+    """Origens da própria API (CORS): o endereço servido e, em loopback, os apelidos dele."""
+    hosts = LOOPBACK if host in LOOPBACK else (host,)
+    return frozenset(f"http://{f'[{h}]' if ':' in h else h}:{porta}" for h in hosts)
+
+
+class ServidorAPI:
+    def __init__(self, pasta: Path, origens: frozenset = frozenset()):
+        self.pasta = pasta
+        self.origens = origens          # além de "null" (index.html aberto como arquivo)
+        self.indice: Optional[IndiceCarteira] = None
+        self._assinatura: Optional[tuple] = None
+        self._verificado = 0.0
+        self._lock = asyncio.Lock()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self.acertos = self.faltas = 0
+
+    async def indice_atual(self) -> IndiceCarteira:
+        """Índice em uso; remonta (fora do loop, em thread) quando a assinatura de saidas/ muda."""
+        if self.indice is not None and (time.monotonic() - self._verificado < VERIFICA_S or self._lock.locked()):
+            return self.indice          # recente, ou outra requisição já está remontando: serve o atual
+        async with self._lock:
+            if self.indice is None or time.monotonic() - self._verificado >= VERIFICA_S:
+                sig = await asyncio.to_thread(assinatura, self.pasta)
+                if sig != self._assinatura or self.indice is None:
+                    self.indice = await asyncio.to_thread(IndiceCarteira, self.pasta)
+                    self._assinatura = sig
+                    self._cache.clear()
+                self._verificado = time.monotonic()
+        return self.indice
+
+    async def consulta(self, chave: str, fn) -> tuple[bytes, bool]:
+        ix = await self.indice_atual()
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            self.acertos += 1
+            return self._cache[chave], True
+        self.faltas += 1
+        corpo = json.dumps(fn(ix), ensure_ascii=False).encode("utf-8")
+        self._cache[chave] = corpo
+        if len(self._cache) > CACHE_MAX:
+            self._cache.popitem(last=False)
+        return corpo, False
+
+    async def rota(self, metodo: str, alvo: str, corpo: bytes) -> tuple[int, str, bytes, dict]:
+        url = urllib.parse.urlsplit(alvo)
+        qs = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        caminho = url.path.rstrip("/") or "/"
+        json_t = "application/json; charset=utf-8"
+
+        if metodo == "GET" and caminho in ESTATICOS:
+            arq = AQUI / ESTATICOS[caminho]
+            return 200, TIPOS[arq.suffix], arq.read_bytes(), {}
+        if metodo == "POST" and caminho == "/api/pergunta":
+            try:
+                dados = json.loads(corpo or b"{}")
+                pergunta = str(dados.get("q") or dados.get("mensagem") or "")
+            except (ValueError, AttributeError):
+                return 400, json_t, b'{"erro": "JSON invalido"}', {}
+            qs["q"] = pergunta
+            caminho, metodo = "/api/pergunta", "GET"
+        if metodo != "GET":
+            return 405, json_t, b'{"erro": "metodo nao suportado"}', {}
+
+        if caminho == "/api/pergunta":
+            q = " ".join(qs.get("q", "").lower().split())
+            chave, fn = f"q:{q}", lambda ix: responde(ix, q)
+        elif caminho.startswith("/api/saldo/"):
+            cod = cobra._norm_code(caminho.rsplit("/", 1)[-1])
+            chave, fn = f"saldo:{cod}", lambda ix: resp_saldo(ix, cod)
+        elif caminho == "/api/top":
+            n = int(qs["n"]) if qs.get("n", "").isdigit() else TOP_PADRAO
+            vend = qs.get("vendedor", "")
+            chave, fn = f"top:{n}:{vend.lower()}", lambda ix: resp_top(ix, n, vend)
+        elif caminho == "/api/progresso":
+            chave, fn = "progresso", resp_progresso
+        elif caminho == "/api/estado":
+            ix = await self.indice_atual()
+            return 200, json_t, json.dumps({
+                "consolidado": ix.consolidado, "clientes": len(ix.clientes), "vendedores": len(ix.vendedores),
+                "montagem_ms": ix.montagem_ms, "cache": len(self._cache),
+                "acertos": self.acertos, "faltas": self.faltas}, ensure_ascii=False).encode("utf-8"), {}
+        else:
+            return 404, json_t, b'{"erro": "nao encontrado"}', {}
+
+        dados, em_cache = await self.consulta(chave, fn)
+        return 200, json_t, dados, {"X-Cache": "HIT" if em_cache else "MISS"}
+
+    async def atende(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        HTTP/1.1 mínimo com keep-alive. CORS só p/ o index.html aberto como arquivo (Origin: null)
+        ou servido pela própria API; outros sites não leem as respostas.
+        """
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    break
+                cab = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    cab[k.strip().lower()] = v.strip()
+                try:
+                    n = int(cab.get("content-length") or 0)
+                except ValueError:
+                    n = -1
+                if n < 0:
+                    # sem tamanho confiável não dá p/ achar o fim do corpo: responde e fecha
+                    status, tipo, dados, extra = 400, "application/json", b'{"erro": "Content-Length invalido"}', {}
+                    cab["connection"] = "close"
+                elif n > CORPO_MAX:
+                    status, tipo, dados, extra = 413, "application/json", b'{"erro": "corpo grande demais"}', {}
+                    cab["connection"] = "close"
+                else:
+                    corpo = await reader.readexactly(n) if n else b""
+                    if metodo == "OPTIONS":
+                        status, tipo, dados, extra = 204, "text/plain", b"", {}
+                    else:
+                        try:
+                            status, tipo, dados, extra = await self.rota(metodo, alvo, corpo)
+                        except Exception as e:
+                            status, tipo, extra = 500, "application/json", {}
+                            dados = json.dumps({"erro": str(e)}, ensure_ascii=False).encode("utf-8")
+                fechar = cab.get("connection", "").lower() == "close" or versao == "HTTP/1.0"
+                motivo = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+                          405: "Method Not Allowed", 413: "Payload Too Large"}.get(status, "Error")
+                cabecalhos = {"Content-Type": tipo, "Content-Length": str(len(dados)), "Vary": "Origin"}
+                origem = cab.get("origin", "")
+                if origem == "null" or origem in self.origens:
+                    cabecalhos.update({"Access-Control-Allow-Origin": origem,
+                                       "Access-Control-Allow-Headers": "Content-Type",
+                                       "Access-Control-Allow-Methods": "GET, POST, OPTIONS"})
+                cabecalhos.update({"Connection": "close" if fechar else "keep-alive", **extra})
+                writer.write(f"HTTP/1.1 {status} {motivo}\r\n".encode("latin-1")
+                             + "".join(f"{k}: {v}\r\n" for k, v in cabecalhos.items()).encode("latin-1")
+                             + b"\r\n" + dados)
+                await writer.drain()
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, porta: int, pasta: Path):
+    api = ServidorAPI(pasta, origens_permitidas(host, porta))
+    await api.indice_atual()
+    srv = await asyncio.start_server(api.atende, host, porta)
+    print(f"API de cobrança em http://{host}:{porta}/ (dados: {pasta.resolve()}, "
+          f"índice em {api.indice.montagem_ms} ms)")
+    async with srv:
+        await srv.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="API local (JSON) p/ o chat de consultas de cobrança.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--porta", type=int, default=8765)
+    ap.add_argument("--saidas", type=Path, default=cobra.SAIDAS, help="pasta com consolidados e logs")
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.porta, args.saidas))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# bench_campanha.py — Harness headless da campanha (sem WhatsApp, sem tela)
+# Roda o mesmo caminho do cobrar (executa_campanha → RemetenteDesktop → abre_whatsapp_desktop)
+# com launcher/clipboard/teclado/janela falsos e confirmação automática, em Linux/CI.
+#
+# Exemplo:
+#   python bench_campanha.py --contatos 2000 --remetentes 2 --escala 0.001 --json bench.json
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+import cobra
+
+
+class AmbienteFalso(cobra.AmbienteDesktop):
+    """
+    Provedores falsos p/ abre_whatsapp_desktop. Toda espera (inclusive as latências
+    simuladas de abrir/focar/teclar) é multiplicada por `escala`, então 7 s de delay
+    viram 7 ms com escala=0.001; os tempos medidos são divididos de volta pela escala.
+    """
+
+    def __init__(self, escala: float = 0.001, latencia_abrir: float = 0.3, latencia_foco: float = 0.1,
+                 latencia_tecla: float = 0.02, falha_abrir: float = 0.0, falha_colar: float = 0.0,
+                 limite_clipboard: Optional[int] = None, seed: Optional[int] = None):
+        self.escala = escala
+        self.latencia_abrir = latencia_abrir
+        self.latencia_foco = latencia_foco
+        self.latencia_tecla = latencia_tecla
+        self.falha_abrir = falha_abrir
+        self.falha_colar = falha_colar
+        self.limite_clipboard = limite_clipboard   # simula clipboard que trunca textos longos
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.clipboard = ""
+        self.urls: List[str] = []
+        self.colagens = 0
+        self.digitados = 0
+
+    def dormir(self, segundos: float):
+        if segundos > 0:
+            time.sleep(segundos * self.escala)
+
+    def copiar(self, texto: str):
+        with self._lock:
+            self.clipboard = texto[:self.limite_clipboard] if self.limite_clipboard else texto
+
+    def ler_clipboard(self) -> str:
+        with self._lock:
+            return self.clipboard
+
+    def abrir_app(self, url: str):
+        self.dormir(self.latencia_abrir)
+        if self._rng.random() < self.falha_abrir:
+            raise OSError("launcher falso: falha simulada")
+        with self._lock:
+            self.urls.append(url)
+
+    def abrir_web(self, url: str):
+        with self._lock:
+            self.urls.append(url)
+
+    def focar_whatsapp(self) -> bool:
+        self.dormir(self.latencia_foco)
+        return True
+
+    def clicar(self):
+        self.dormir(self.latencia_tecla)
+
+    def atalho(self, *teclas: str):
+        self.dormir(self.latencia_tecla)
+        if self._rng.random() < self.falha_colar:
+            raise RuntimeError("teclado falso: falha simulada")
+        with self._lock:
+            self.colagens += 1
+
+    def digitar(self, texto: str, intervalo: float):
+        self.dormir(len(texto) * max(intervalo, self.latencia_tecla / 10))
+        with self._lock:
+            self.digitados += len(texto)
+
+    def tecla(self, nome: str):
+        self.dormir(self.latencia_tecla)
+
+
+class ConfirmacaoAutomatica:
+    """
+    Substitui a confirmação do operador: responde 'sim' com prob. taxa_ok após `pensar` s (escalados).
+    Telefones em `invalidos` são sempre marcados como NUMERO_INVALIDO (número sem WhatsApp).
+    """
+
+    def __init__(self, ambiente: AmbienteFalso, taxa_ok: float = 0.9, pensar: float = 1.5,
+                 seed: Optional[int] = None, invalidos: frozenset = frozenset()):
+        self.ambiente = ambiente
+        self.taxa_ok = taxa_ok
+        self.pensar = pensar
+        self.invalidos = invalidos
+        self._rng = random.Random(seed)
+
+    def __call__(self, codigo: str, cliente: str):
+        self.ambiente.dormir(self.pensar)
+        if codigo in self.invalidos:
+            return "NUMERO_INVALIDO"
+        return self._rng.random() < self.taxa_ok
+
+
+def gera_consolidado_sintetico(n: int, vendedores: int = 5, frac_sem_telefone: float = 0.05,
+                               frac_duplicados: float = 0.02, seed: int = 0) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Consolidado no formato do conversor (Codigo4d, Cliente, Saldo, VendedorArquivo) + mapa de telefones."""
+    rng = random.Random(seed)
+    codigos = [f"{i:04d}" for i in range(1, n + 1)]
+    dups = rng.sample(codigos, int(n * frac_duplicados)) if frac_duplicados else []
+    cods = codigos + dups
+    df = pd.DataFrame({
+        "Codigo4d": cods,
+        "Cliente": [f"CLIENTE SINTETICO {c}" for c in cods],
+        "Saldo": [round(rng.uniform(50, 25000), 2) for _ in cods],
+        "VendedorArquivo": [f"VENDEDOR_{rng.randrange(vendedores) + 1:02d}" for _ in cods],
+    })
+    sem_tel = set(rng.sample(codigos, int(n * frac_sem_telefone))) if frac_sem_telefone else set()
+    telefones = {c: f"55119{rng.randrange(10**7, 10**8)}" for c in codigos if c not in sem_tel}
+    return df, telefones
+
+
+def roda_bench(contatos: int = 500, remetentes: int = 1, divisao: str = "vendedor", delay: int = 7,
+               escala: float = 0.001, taxa_ok: float = 0.9, pensar: float = 1.5,
+               auto_paste: bool = True, ritmo_msg_min: float = 0.0, jitter: float = 0.0,
+               seed: int = 0, saida: Optional[Path] = None, verboso: bool = False,
+               limite_clipboard: Optional[int] = None, sessao: bool = False,
+               perfil: bool = False, taxa_invalido: float = 0.0,
+               mortos_modo: Optional[str] = None) -> dict:
+    df, telefones = gera_consolidado_sintetico(contatos, seed=seed)
+    saida = saida or Path(tempfile.mkdtemp(prefix="bench_campanha_"))
+    saida.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    invalidos = frozenset(c for c in telefones if rng.random() < taxa_invalido)
+    # cache persistente em --saida: rodar 2x mostra o ganho de pular/adiar os números mortos
+    mortos = cobra.CacheNumerosMortos(saida / "numeros_mortos.csv").carrega() if mortos_modo else None
+
+    # tudo medido em "segundos simulados" (tempo real / escala)
+    relogio = lambda: time.perf_counter() / escala
+    crono = cobra.Cronometro(relogio=relogio)
+    ambientes, rems = [], []
+    limitador = None       # como no app: um ritmo só para a conta, compartilhado pelos remetentes
+    # sessão: campanha recorrente, todo número já tem conversa (a busca Ctrl+N o encontra)
+    conhecidos = {cobra.normaliza_telefone(t) for t in telefones.values()}
+    for i in range(max(1, remetentes)):
+        amb = AmbienteFalso(escala=escala, limite_clipboard=limite_clipboard, seed=seed + i)
+        classe = cobra.RemetenteSessao if sessao else cobra.RemetenteDesktop
+        rem = classe(f"stub{i + 1}", delay, auto_paste, False, True, True,
+                     confirmar=ConfirmacaoAutomatica(amb, taxa_ok, pensar, seed=seed + i, invalidos=invalidos),
+                     ambiente=amb, crono=crono, **({"conhecidos": conhecidos} if sessao else {}))
+        if ritmo_msg_min:
+            if limitador is None:
+                limitador = cobra.LimitadorEnvio(msg_min=ritmo_msg_min, cota_hora=None, cota_dia=None,
+                                                 janela=None, jitter=jitter, relogio=relogio,
+                                                 dormir=amb.dormir, seed=seed)
+            rem.limitador = limitador
+        ambientes.append(amb)
+        rems.append(rem)
+
+    log_path = saida / "log_cobrancas_bench.csv"
+    prof = cobra.PerfilExecucao() if perfil else None
+    t0 = relogio()
+    with cobra.RegistroCampanha(log_path, "bench", len(df), log=print if verboso else (lambda m: None),
+                                crono=crono) as reg:
+        cobra.executa_campanha(df, rems, reg, telefones, cobra.MENSAGEM_BASE, por=divisao, perfil=prof,
+                               mortos=mortos, mortos_modo=mortos_modo or "tentar")
+    if mortos is not None:
+        mortos.salva()
+    duracao = relogio() - t0
+    relatorios = []
+    if prof is not None:
+        prof.encerra()
+        relatorios = [str(a) for a in prof.salva(saida)]
+
+    abertos = reg.contagem["ENVIADO"] + reg.contagem["ABERTO_NAO_ENVIADO"]
+    return {
+        "contatos": len(df),
+        "remetentes": len(rems),
+        "duracao_s": round(duracao, 2),
+        "contatos_por_min": round(abertos / duracao * 60, 2) if duracao else 0.0,
+        "contagem": reg.contagem,
+        "etapas": crono.resumo().round(4).to_dict(orient="records"),
+        "urls_abertas": sum(len(a.urls) for a in ambientes),
+        "log": str(log_path),
+        "perfil": relatorios,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark headless da campanha de cobrança (WhatsApp falso).")
+    ap.add_argument("--contatos", type=int, default=500)
+    ap.add_argument("--remetentes", type=int, default=1)
+    ap.add_argument("--divisao", choices=("vendedor", "rodizio"), default="vendedor")
+    ap.add_argument("--delay", type=int, default=7, help="espera de abertura (s simulados)")
+    ap.add_argument("--escala", type=float, default=0.001, help="fator tempo real/simulado")
+    ap.add_argument("--taxa-ok", type=float, default=0.9, help="prob. do operador confirmar envio")
+    ap.add_argument("--pensar", type=float, default=1.5, help="tempo do operador p/ confirmar (s simulados)")
+    ap.add_argument("--sem-colar", action="store_true", help="força o fallback de digitação")
+    ap.add_argument("--ritmo", type=float, default=0.0, help="msgs/min por remetente (0 = sem limitador)")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--limite-clipboard", type=int, default=None,
+                    help="trunca o clipboard falso (força a colagem em partes)")
+    ap.add_argument("--sessao", action="store_true", help="reusa uma janela (RemetenteSessao)")
+    ap.add_argument("--profile", action="store_true", help="cProfile + tracemalloc do laço (grava em --saida)")
+    ap.add_argument("--taxa-invalido", type=float, default=0.0,
+                    help="fração de telefones sem WhatsApp (operador marca NUMERO_INVALIDO)")
+    ap.add_argument("--mortos", choices=cobra.MORTOS_MODOS, default=None,
+                    help="usa o cache de números mortos em --saida (rode 2x p/ ver o efeito)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--saida", type=Path, default=None)
+    ap.add_argument("--json", type=Path, default=None, help="grava o resultado em JSON")
+    ap.add_argument("-v", "--verboso", action="store_true")
+    args = ap.parse_args()
+
+    res = roda_bench(args.contatos, args.remetentes, args.divisao, args.delay, args.escala, args.taxa_ok,
+                     args.pensar, not args.sem_colar, args.ritmo, args.jitter, args.seed, args.saida,
+                     args.verboso, args.limite_clipboard, args.sessao, args.profile, args.taxa_invalido,
+                     args.mortos)
+
+    print(f"Contatos: {res['contatos']} • Remetentes: {res['remetentes']}")
+    print(f"Duração (simulada): {cobra.formata_duracao(res['duracao_s'])} • "
+          f"{res['contatos_por_min']} contatos/min")
+    print("Status:", ", ".join(f"{k}={v}" for k, v in res["contagem"].items()))
+    print(pd.DataFrame(res["etapas"]).to_string(index=False))
+    for arq in res["perfil"]:
+        print(f"Perfil: {arq}")
+    if args.json:
+        args.json.write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"JSON: {args.json.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
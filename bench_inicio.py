@@ -0,0 +1,102 @@
+# bench_inicio.py — Perfil de inicialização do agente (tempo até a primeira janela)
+# 1) `python -X importtime -c "import cobra"` em processo limpo: custo do import e top módulos
+# 2) com tela disponível: `python cobra.py --medir-inicio` N vezes → mediana até a 1ª janela
+#    e até a base de telefones (carregada em segundo plano) ficar pronta
+#
+# Exemplo:
+#   python bench_inicio.py --repeticoes 5 --json inicio.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+AQUI = Path(__file__).resolve().parent
+
+
+def perfil_import(top: int = 10) -> dict:
+    """Tempo de `import cobra` e os módulos mais caros (cumulativo, em ms)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        r = subprocess.run([sys.executable, "-X", "importtime", "-c", "import cobra"],
+                           cwd=tmp, env={**os.environ, "PYTHONPATH": str(AQUI)},
+                           capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else "falha no import")
+    modulos = []   # (nome, nível de aninhamento, ms cumulativo) em pós-ordem
+    for ln in r.stderr.splitlines():
+        if not ln.startswith("import time:") or "|" not in ln or "cumulative" in ln:
+            continue
+        _self_us, cumul_us, nome = ln[len("import time:"):].split("|")
+        nome = nome[1:].rstrip()
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        modulos.append((nome.strip(), nivel, int(cumul_us) / 1000))
+
+    # importtime lista os filhos antes do pai: os imports diretos de cobra vêm logo antes dele
+    i = next((k for k, m in enumerate(modulos) if m[0] == "cobra" and m[1] == 0), None)
+    filhos = []
+    if i is not None:
+        for nome, nivel, ms in reversed(modulos[:i]):
+            if nivel == 0:
+                break
+            if nivel == 1:
+                filhos.append((nome, ms))
+    return {
+        "import_cobra_ms": round(modulos[i][2], 1) if i is not None else None,
+        "pandas_no_import": any(m[0] == "pandas" for m in modulos),
+        "top_modulos_ms": [{"modulo": n, "ms": round(ms, 1)} for n, ms in sorted(filhos, key=lambda x: -x[1])[:top]],
+    }
+
+
+def mede_janela(repeticoes: int = 5, timeout: float = 60.0) -> dict:
+    """Mediana (s) até a 1ª janela e até os telefones carregarem; exige tela (DISPLAY no Linux)."""
+    if os.name != "nt" and not os.environ.get("DISPLAY"):
+        return {"erro": "sem tela (DISPLAY) — só o perfil de import foi medido"}
+    janela, telefones, pandas_antes = [], [], []
+    for _ in range(repeticoes):
+        r = subprocess.run([sys.executable, str(AQUI / "cobra.py"), "--medir-inicio"],
+                           cwd=AQUI, capture_output=True, text=True, timeout=timeout)
+        for ln in r.stdout.splitlines():
+            partes = ln.split()
+            if partes and partes[0] == "PRIMEIRA_JANELA":
+                janela.append(float(partes[1]))
+                pandas_antes.append(partes[2].endswith("True"))
+            elif partes and partes[0] == "TELEFONES_PRONTOS":
+                telefones.append(float(partes[1]))
+    if not janela:
+        return {"erro": "o app não reportou a primeira janela"}
+    return {
+        "repeticoes": len(janela),
+        "primeira_janela_s": round(statistics.median(janela), 4),
+        "telefones_prontos_s": round(statistics.median(telefones), 4) if telefones else None,
+        "pandas_antes_da_janela": any(pandas_antes),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mede o tempo de inicialização do agente de cobrança.")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--json", type=Path, default=None)
+    args = ap.parse_args()
+
+    res = {"import": perfil_import(args.top), "janela": mede_janela(args.repeticoes)}
+    imp = res["import"]
+    print(f"import cobra: {imp['import_cobra_ms']} ms (pandas no import: {imp['pandas_no_import']})")
+    for m in imp["top_modulos_ms"]:
+        print(f"  {m['ms']:>8.1f} ms  {m['modulo']}")
+    jan = res["janela"]
+    if "erro" in jan:
+        print(jan["erro"])
+    else:
+        print(f"1ª janela: {jan['primeira_janela_s']} s • telefones prontos: {jan['telefones_prontos_s']} s "
+              f"(mediana de {jan['repeticoes']})")
+    if args.json:
+        args.json.write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
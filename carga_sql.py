@@ -0,0 +1,48 @@
+# carga_sql.py — Carga da base SQLite p/ BI (sem abrir a GUI)
+# Upsert de consolidados (CSV do conversor) e carga incremental dos log_cobrancas_*.csv
+# (logs com o mesmo hash já carregados são pulados) e KPIs diários. Schema em sql/schema.sql.
+#
+# Exemplo (agendado após a campanha do dia):
+#   python carga_sql.py --consolidado saidas/consolidado_cobranca_20250813_101500.csv
+
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import cobra
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Carrega consolidados e logs de cobrança no SQLite.")
+    ap.add_argument("--banco", type=Path, default=cobra.BANCO_SQL)
+    ap.add_argument("--logs", type=Path, default=cobra.SAIDAS, help="pasta dos log_cobrancas_*.csv")
+    ap.add_argument("--consolidado", type=Path, action="append", default=[],
+                    help="CSV consolidado (pode repetir); a data de referência vem do nome/mtime")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    con = cobra.abre_banco(args.banco)
+    try:
+        for arq in args.consolidado:
+            df = pd.read_csv(arq, sep=";", encoding="utf-8-sig", dtype={"Codigo4d": str})
+            partes = arq.stem.split("_")
+            data_ref = (f"{partes[-2][:4]}-{partes[-2][4:6]}-{partes[-2][6:]}"
+                        if len(partes) >= 2 and partes[-2].isdigit() and len(partes[-2]) == 8
+                        else time.strftime("%Y-%m-%d", time.localtime(arq.stat().st_mtime)))
+            n = cobra.carrega_consolidado_sql(con, df, data_ref)
+            print(f"Saldos: {n} linhas de {arq.name} (data_ref {data_ref})")
+        r = cobra.carrega_logs_sql(con, args.logs)
+        print(f"Logs: {r['arquivos']} carregados • {r['linhas']} linhas • {r['pulados']} pulados (mesmo hash)")
+        k = cobra.atualiza_kpis(args.logs, caminho=args.logs / cobra.KPIS_CSV.name,
+                                estado=args.logs / cobra.KPIS_ESTADO.name)
+        n = cobra.carrega_kpis_sql(con, k["kpis"])
+        print(f"KPIs: {k['linhas']} linhas novas de {k['arquivos']} logs • {n} linhas (dia × vendedor)")
+    finally:
+        con.close()
+    print(f"Base: {args.banco.resolve()} ({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
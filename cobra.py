@@ -1,29 +1,70 @@
 # cobranca.py — Agente de Cobrança (GUI) • WhatsApp Desktop
 # Versão: 2025-08-13
 
+# Início rápido: pandas só é importado no primeiro uso (proxy `pd`), saidas/ só é criada
+# na primeira gravação e a base de telefones carrega em segundo plano após a janela abrir.
+from __future__ import annotations
+
 import os
+import sys
+import importlib
 import re
 import csv
+import io
+import json
 import time
+import queue
+import logging
 import threading
+import random
 import urllib.parse
-import webbrowser
-from datetime import datetime
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
+
+_T_INICIO = time.perf_counter()   # p/ medir o tempo até a primeira janela (--medir-inicio)
+
+class _ModuloPreguicoso:
+    """Importa o módulo de verdade no primeiro acesso a atributo (ex.: pd.DataFrame)."""
+
+    def __init__(self, nome: str):
+        self._nome = nome
+        self._mod = None
 
-import pandas as pd
+    def __getattr__(self, attr):
+        if self._mod is None:
+            self._mod = importlib.import_module(self._nome)
+        return getattr(self._mod, attr)
 
-# ====== GUI (Tkinter)
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+pd = _ModuloPreguicoso("pandas")
 
 # ===================== CONFIG =====================
 PAIS_DDI = "55"                   # Brasil
 DEFAULT_DELAY = 7                 # segundos p/ abrir conversa
-SAIDAS = Path("saidas"); SAIDAS.mkdir(exist_ok=True)
+SAIDAS = Path("saidas")             # criada na primeira gravação (garante_saidas)
 DEFAULT_TEL_CSV = SAIDAS / "telefones_salvos.csv"  # onde salvamos telefones (Codigo4d;Telefone)
 
+# Log da GUI: a tela mostra só as últimas linhas; o histórico completo vai p/ arquivo rotativo
+LOG_ARQUIVO = SAIDAS / "agente_cobranca.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024   # 5 MB por arquivo
+LOG_BACKUPS = 5                   # arquivos .1 … .5 mantidos
+LOG_MAX_LINHAS = 2000             # linhas visíveis no widget (ring buffer)
+LOG_DRENO_MS = 100                # intervalo de drenagem da fila pelo mainloop
+LOG_LOTE_MAX = 500                # máx. de registros inseridos por drenagem
+
+# Ritmo de envio (por conta, compartilhado entre remetentes): token bucket + cotas + janela de horário + jitter
+RITMO_MSG_MIN = 6                 # taxa sustentada (mensagens/minuto)
+RITMO_RAJADA = 2                  # tokens acumuláveis (envios seguidos permitidos)
+COTA_HORA = 120                   # máx. de conversas abertas por hora
+COTA_DIA = 600                    # máx. de conversas abertas por dia
+JANELA_HORARIO = (8, 20)          # só envia das 8h às 20h (hora local)
+JITTER_S = 3.0                    # atraso aleatório extra (0..JITTER_S s) por envio
+
+PREVIEW_PAGINA = 200              # linhas por página na pré-visualização do consolidado
+
 MENSAGEM_BASE = (
     "Prezado(a),\n\n"
     "Identificamos que há valores pendentes com a Extra Carne.\n\n"
@@ -36,6 +77,10 @@ MENSAGEM_BASE = (
     "Departamento Financeiro - Extra Carne"
 )
 
+def garante_saidas() -> Path:
+    SAIDAS.mkdir(exist_ok=True)
+    return SAIDAS
+
 # ===================== REGEX / HELPERS =====================
 RE_CLIENTE = re.compile(r"^\s*(\d{4})\s+([A-Z0-9ÁÉÍÓÚÂÊÔÃÕÇ'()\-.,/& ]+?)\s*$", re.I)
 RE_VALOR_BR = re.compile(r"(\d{1,3}(?:\.\d{3})*,\d{2})")
@@ -56,24 +101,149 @@ def _norm_code(s: str) -> str:
     return d.zfill(4) if d else ""
 
 # ===================== LEITURA PDF =====================
-def extrai_texto_pdf(pdf_path: Path) -> List[str]:
+# Cache por página: relatórios cumulativos (ontem + páginas novas) mudam o hash do arquivo,
+# mas não o das páginas antigas; só página nova/alterada passa pelo extract_text.
+CACHE_PDF = SAIDAS / "cache_pdf"  # <sha1 da página + recursos>.txt = linhas já extraídas da página
+CACHE_PDF_MAX_MB = 200            # poda: apaga os menos usados acima disso…
+CACHE_PDF_DIAS = 60               # …e os não usados há mais que isso
+
+def _hash_objeto_pdf(h, x, memo: dict):
+    """
+    Alimenta h com o objeto PDF inteiro: dicionários/listas em ordem canônica e streams com
+    atributos + dados. Objetos indiretos viram um sha1 próprio, calculado uma vez por documento
+    (memo: objid → digest), o que também corta ciclos e fontes repetidas em todas as páginas.
+    """
+    import hashlib
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    if isinstance(x, PDFObjRef):
+        dig = memo.get(x.objid)
+        if dig is None:
+            memo[x.objid] = b"ciclo:%d" % x.objid
+            sub = hashlib.sha1()
+            _hash_objeto_pdf(sub, x.resolve(), memo)
+            dig = memo[x.objid] = sub.digest()
+        h.update(dig)
+    elif isinstance(x, PDFStream):
+        h.update(b"<stream")
+        _hash_objeto_pdf(h, x.attrs, memo)
+        imagem = getattr(x.attrs.get("Subtype"), "name", None) == "Image"
+        # imagem: bytes crus (o extract_text nunca os decodifica); o resto, decodificado
+        h.update((x.get_rawdata() if imagem else None) or x.get_data() or b"")
+        h.update(b">")
+    elif isinstance(x, dict):
+        h.update(b"{")
+        for k in sorted(x, key=str):
+            if k != "Parent":
+                h.update(f"{k}=".encode())
+                _hash_objeto_pdf(h, x[k], memo)
+        h.update(b"}")
+    elif isinstance(x, (list, tuple)):
+        h.update(b"[")
+        for v in x:
+            _hash_objeto_pdf(h, v, memo)
+        h.update(b"]")
+    else:
+        h.update(repr(x).encode())
+        h.update(b";")
+
+def _hash_pagina(page, memo: Optional[dict] = None) -> Optional[str]:
+    """
+    sha1 do tamanho/rotação da página, do content stream e de todo o dicionário de recursos,
+    recursivo: fontes, XObjects Form (stream + recursos próprios), imagens, ExtGState…
+    None se algo não der p/ ler (a página é extraída sem cache).
+    """
+    import hashlib
+    from pdfminer.pdftypes import resolve1
+    memo = {} if memo is None else memo
+    try:
+        obj = page.page_obj
+        h = hashlib.sha1(repr((page.bbox, page.rotation)).encode())
+        for stream in obj.contents:
+            h.update(resolve1(stream).get_data())
+        _hash_objeto_pdf(h, obj.resources or {}, memo)
+        return h.hexdigest()
+    except Exception:
+        return None
+
+def poda_cache_pdf(cache: Path = CACHE_PDF, max_mb: float = CACHE_PDF_MAX_MB,
+                   dias: float = CACHE_PDF_DIAS) -> int:
+    """Apaga páginas não usadas há `dias` e, acima de `max_mb`, as de uso mais antigo. Retorna quantas."""
+    if not cache.is_dir():
+        return 0
+    limite = time.time() - dias * 86400
+    itens = []
+    for arq in cache.glob("*.txt"):
+        try:
+            st = arq.stat()
+        except FileNotFoundError:
+            continue
+        itens.append((st.st_mtime, st.st_size, arq))
+    itens.sort(key=lambda t: t[0], reverse=True)          # mais recente primeiro
+    total, teto, apagados = 0, max_mb * 2**20, 0
+    for mtime, tam, arq in itens:
+        total += tam
+        if mtime < limite or total > teto:
+            try:
+                arq.unlink()
+                apagados += 1
+            except FileNotFoundError:
+                pass
+    return apagados
+
+def _linhas_pagina(page) -> List[str]:
+    txt = page.extract_text(layout=True) or page.extract_text() or ""
+    return [ln.strip() for ln in txt.splitlines() if ln.strip()]
+
+def extrai_texto_pdf(pdf_path, cache: Optional[Path] = CACHE_PDF,
+                     stats: Optional[dict] = None) -> List[str]:
+    """
+    Linhas de texto do PDF, na ordem das páginas. pdf_path: caminho ou arquivo binário.
+    cache=None desliga o cache por página; stats (se dado) recebe paginas/reaproveitadas.
+    Página reaproveitada tem o mtime renovado (a poda_cache_pdf apaga as de uso mais antigo).
+    """
     import pdfplumber
     linhas: List[str] = []
+    reaproveitadas = 0
+    if cache is not None:
+        cache.mkdir(parents=True, exist_ok=True)
+    memo: dict = {}        # objetos compartilhados entre páginas (fontes, forms) hasheados uma vez
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
-            txt = page.extract_text(layout=True) or page.extract_text() or ""
-            for ln in txt.splitlines():
-                ln = ln.strip()
-                if ln:
-                    linhas.append(ln)
+            chave = _hash_pagina(page, memo) if cache is not None else None
+            arq = cache / f"{chave}.txt" if chave else None
+            if arq is not None and arq.exists():
+                try:
+                    texto = arq.read_text(encoding="utf-8")
+                    os.utime(arq)
+                except FileNotFoundError:   # podado entre o exists e a leitura
+                    texto = None
+                if texto is not None:
+                    linhas.extend(texto.split("\n") if texto else [])
+                    reaproveitadas += 1
+                    continue
+            pag = _linhas_pagina(page)
+            page.flush_cache()     # solta os objetos de layout da página (PDFs de 1000+ páginas)
+            if arq is not None:
+                tmp = arq.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp.write_text("\n".join(pag), encoding="utf-8")
+                os.replace(tmp, arq)
+            linhas.extend(pag)
+        if stats is not None:
+            stats["paginas"] = stats.get("paginas", 0) + len(pdf.pages)
+            stats["reaproveitadas"] = stats.get("reaproveitadas", 0) + reaproveitadas
     return linhas
 
 # ===================== LEITURA CSV/TXT robusta =====================
 import csv as _csv
 
-def _read_csv_any(path: Path) -> pd.DataFrame:
-    with open(path, 'rb') as fb:
-        head = fb.read(4096)
+def _read_csv_any(path) -> pd.DataFrame:
+    """path: caminho ou bytes (membro de .zip lido em memória)."""
+    if isinstance(path, bytes):
+        head = path[:4096]
+    else:
+        with open(path, 'rb') as fb:
+            head = fb.read(4096)
+    fonte = lambda: io.BytesIO(path) if isinstance(path, bytes) else path
     sep = ';'
     for enc in ('utf-8', 'cp1252', 'latin-1'):
         try:
@@ -83,22 +253,24 @@ def _read_csv_any(path: Path) -> pd.DataFrame:
                 sep = dialect.delimiter
             except Exception:
                 sep = ';' if sample.count(';') >= sample.count(',') else ','
-            return pd.read_csv(path, sep=sep, encoding=enc, engine='python')
+            return pd.read_csv(fonte(), sep=sep, encoding=enc, engine='python')
         except UnicodeDecodeError:
             continue
-    return pd.read_csv(path, sep=sep, encoding='latin-1', engine='python', errors='ignore')
+    return pd.read_csv(fonte(), sep=sep, encoding='latin-1', engine='python', encoding_errors='ignore')
 
-def extrai_linhas_csv_txt(path: Path) -> List[str]:
+def extrai_linhas_csv_txt(path) -> List[str]:
+    """path: caminho ou bytes (membro de .zip)."""
     try:
         df = _read_csv_any(path)
     except Exception:
+        bruto = path if isinstance(path, bytes) else path.read_bytes()
         for enc in ('utf-8', 'cp1252', 'latin-1'):
             try:
-                txt = path.read_text(encoding=enc)
+                txt = bruto.decode(enc)
                 return [ln.strip() for ln in txt.splitlines() if ln.strip()]
             except UnicodeDecodeError:
                 continue
-        txt = path.read_text(encoding='latin-1', errors='ignore')
+        txt = bruto.decode('latin-1', errors='ignore')
         return [ln.strip() for ln in txt.splitlines() if ln.strip()]
 
     linhas: List[str] = []
@@ -109,29 +281,117 @@ def extrai_linhas_csv_txt(path: Path) -> List[str]:
     return linhas
 
 # ===================== PARSER (linhas → clientes/saldos) =====================
-def extrai_clientes_saldos_de_linhas(linhas: List[str]) -> pd.DataFrame:
+DIAG_AMOSTRAS = 50                # linhas/clientes guardados por amostra no diagnóstico
+
+class DiagnosticoParser:
+    """
+    Contadores do parser (opcional): acertos e tempo por regex, quantas vezes a linha
+    de saldo/total definiu o valor, e amostras limitadas (reservatório) de linhas sem
+    match e de clientes cujo saldo veio de uma linha que não era de total.
+    """
+
+    def __init__(self, arquivo: str = "", max_amostras: int = DIAG_AMOSTRAS, seed: int = 0):
+        self.arquivo = arquivo
+        self.max_amostras = max_amostras
+        self.linhas = 0
+        self.regex = {nome: {"chamadas": 0, "acertos": 0, "segundos": 0.0} for nome in ("RE_CLIENTE", "RE_VALOR_BR")}
+        self.override_total = 0
+        self.clientes = 0
+        self.clientes_sem_valor = 0
+        self.sem_match = {"total": 0, "amostra": []}
+        self.valor_fora_total = {"total": 0, "amostra": []}
+        self._rng = random.Random(seed)
+
+    def conta_regex(self, nome: str, segundos: float, acertou: bool):
+        r = self.regex[nome]
+        r["chamadas"] += 1
+        r["segundos"] += segundos
+        r["acertos"] += bool(acertou)
+
+    def amostra(self, qual: dict, item):
+        """Reservoir sampling: amostra uniforme de tamanho fixo, sem guardar tudo."""
+        qual["total"] += 1
+        if len(qual["amostra"]) < self.max_amostras:
+            qual["amostra"].append(item)
+        else:
+            j = self._rng.randrange(qual["total"])
+            if j < self.max_amostras:
+                qual["amostra"][j] = item
+
+    def to_dict(self) -> dict:
+        return {
+            "arquivo": self.arquivo,
+            "linhas": self.linhas,
+            "clientes": self.clientes,
+            "clientes_sem_valor": self.clientes_sem_valor,
+            "regex": {k: {**v, "segundos": round(v["segundos"], 6),
+                          "us_por_chamada": round(v["segundos"] / v["chamadas"] * 1e6, 2) if v["chamadas"] else 0}
+                      for k, v in self.regex.items()},
+            "override_saldo_total": self.override_total,
+            "linhas_sem_match": self.sem_match,
+            "clientes_valor_fora_de_total": self.valor_fora_total,
+        }
+
+    def salva(self, caminho: Path) -> Path:
+        caminho.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return caminho
+
+def extrai_clientes_saldos_de_linhas(linhas: List[str], diag: Optional[DiagnosticoParser] = None) -> pd.DataFrame:
     registros = []
     cliente_atual: Optional[Tuple[str, str]] = None
     ultimo_valor: Optional[float] = None
+    valor_de_total = False
+    clock = time.perf_counter
+
+    def fecha_cliente():
+        if diag:
+            diag.clientes += 1
+            if ultimo_valor is None:
+                diag.clientes_sem_valor += 1
+            elif not valor_de_total:
+                diag.amostra(diag.valor_fora_total, {"Codigo4d": cliente_atual[0], "Cliente": cliente_atual[1],
+                                                     "Saldo": ultimo_valor})
+        if ultimo_valor is not None:
+            registros.append({"Codigo4d": cliente_atual[0], "Cliente": cliente_atual[1], "Saldo": ultimo_valor})
 
     for ln in linhas:
-        m_cli = RE_CLIENTE.match(ln)
+        if diag:
+            diag.linhas += 1
+            t0 = clock()
+            m_cli = RE_CLIENTE.match(ln)
+            diag.conta_regex("RE_CLIENTE", clock() - t0, m_cli is not None)
+        else:
+            m_cli = RE_CLIENTE.match(ln)
         if m_cli:
-            if cliente_atual and ultimo_valor is not None:
-                registros.append({"Codigo4d": cliente_atual[0], "Cliente": cliente_atual[1], "Saldo": ultimo_valor})
+            if cliente_atual:
+                fecha_cliente()
             cliente_atual = (m_cli.group(1).strip(), m_cli.group(2).strip())
             ultimo_valor = None
+            valor_de_total = False
             continue
 
         if cliente_atual:
-            vals = RE_VALOR_BR.findall(ln)
+            if diag:
+                t0 = clock()
+                vals = RE_VALOR_BR.findall(ln)
+                diag.conta_regex("RE_VALOR_BR", clock() - t0, bool(vals))
+            else:
+                vals = RE_VALOR_BR.findall(ln)
             if vals:
                 ultimo_valor = br_to_float(vals[-1])
+                valor_de_total = False
             if ("saldo" in ln.lower() or "total" in ln.lower()) and vals:
                 ultimo_valor = br_to_float(vals[-1])
+                valor_de_total = True
+                if diag:
+                    diag.override_total += 1
+            if diag and not vals:
+                diag.amostra(diag.sem_match, ln)
+        elif diag:
+            diag.amostra(diag.sem_match, ln)
 
-    if cliente_atual and ultimo_valor is not None:
-        registros.append({"Codigo4d": cliente_atual[0], "Cliente": cliente_atual[1], "Saldo": ultimo_valor})
+    if cliente_atual:
+        fecha_cliente()
 
     df = pd.DataFrame(registros, columns=["Codigo4d", "Cliente", "Saldo"]).dropna()
     df = df.drop_duplicates(subset=["Codigo4d", "Cliente", "Saldo"]).reset_index(drop=True)
@@ -140,443 +400,2215 @@ def extrai_clientes_saldos_de_linhas(linhas: List[str]) -> pd.DataFrame:
         df["Codigo4d"] = df["Codigo4d"].astype(str).map(_norm_code)
     return df
 
-def processa_arquivo(entrada: Path, vendedor_hint: Optional[str] = None) -> pd.DataFrame:
-    ext = entrada.suffix.lower()
+# ===================== TÍTULOS (vencimento / aging) =====================
+# Linha de título: [documento] … [emissão] vencimento … valor (o último valor da linha, como no parser)
+RE_TITULO = re.compile(
+    r"^(?P<doc>.*?)\s*(?:\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\s+)*(?P<venc>\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})\b"
+    r".*?(?P<valor>\d{1,3}(?:\.\d{3})*,\d{2})\s*$")
+FAIXAS_AGING = ("a vencer", "0-30", "31-60", "61-90", "90+")   # dias de atraso
+_LIMITES_AGING = (-float("inf"), -1, 30, 60, 90, float("inf"))
+TITULOS_COLUNAS = ["Codigo4d", "Cliente", "Documento", "Vencimento", "Valor"]
+DETALHES_VAZIOS = {"titulos": "", "dias_atraso": "", "vencido_brl": "", "aging": ""}
+
+def _data_br(texto: str):
+    """'05/08/25' → Timestamp (dia primeiro, via dateutil); NaT se não for data."""
+    from dateutil import parser as _dp
+    try:
+        return pd.Timestamp(_dp.parse(texto.replace(".", "/").replace("-", "/"), dayfirst=True))
+    except (ValueError, OverflowError):
+        return pd.NaT
+
+def extrai_titulos_de_linhas(linhas: List[str]) -> pd.DataFrame:
+    """
+    Tabela de títulos (Codigo4d, Cliente, Documento, Vencimento, Valor) das mesmas linhas
+    do parser: cada linha de título herda a última linha de cliente; saldo/total ficam de
+    fora. Um passe só de regex (colunas em listas); as datas vão p/ o dateutil uma vez por
+    valor distinto (Categorical) e o resto é vetorizado.
+    """
+    cods, clis, docs, vencs, vals = [], [], [], [], []
+    cod = cli = None
+    casa_cliente, casa_titulo = RE_CLIENTE.match, RE_TITULO.match
+    for ln in linhas:
+        m = casa_cliente(ln)
+        if m:
+            cod, cli = _norm_code(m.group(1)), m.group(2).strip()
+            continue
+        if cod is None:
+            continue
+        m = casa_titulo(ln)
+        if m is None:
+            continue
+        baixa = ln.lower()
+        if "saldo" in baixa or "total" in baixa:
+            continue
+        cods.append(cod)
+        clis.append(cli)
+        docs.append(m.group("doc"))
+        vencs.append(m.group("venc"))
+        vals.append(m.group("valor"))
+
+    venc = pd.Categorical(vencs)
+    datas = pd.DatetimeIndex([_data_br(d) for d in venc.categories])
+    df = pd.DataFrame({
+        "Codigo4d": pd.Series(cods, dtype=object),
+        "Cliente": pd.Series(clis, dtype=object),
+        "Documento": pd.Series(docs, dtype=object),
+        "Vencimento": pd.Series(datas.take(venc.codes, allow_fill=True, fill_value=pd.NaT)
+                                if len(datas) else pd.DatetimeIndex([], dtype="datetime64[ns]")),
+        "Valor": pd.Series([br_to_float(v) for v in vals], dtype=float),
+    })
+    return df.dropna(subset=["Vencimento"]).reset_index(drop=True)
+
+def aging_titulos(titulos: pd.DataFrame, hoje=None) -> pd.DataFrame:
+    """Títulos + DiasAtraso + Faixa (FAIXAS_AGING), vetorizado (pd.cut)."""
+    hoje = pd.Timestamp(hoje or datetime.now().date())
+    dias = (hoje - titulos["Vencimento"]).dt.days
+    faixa = pd.cut(dias, bins=_LIMITES_AGING, labels=FAIXAS_AGING)
+    return titulos.assign(DiasAtraso=dias, Faixa=faixa)
+
+def resumo_aging(titulos: pd.DataFrame, hoje=None) -> pd.DataFrame:
+    """Por cliente: total por faixa, Total, Vencido, Titulos e DiasAtraso (máx.)."""
+    t = titulos if "Faixa" in titulos.columns else aging_titulos(titulos, hoje)
+    por_faixa = (t.groupby(["Codigo4d", "Faixa"], observed=False, sort=False)["Valor"].sum()
+                  .unstack("Faixa").reindex(columns=list(FAIXAS_AGING), fill_value=0.0).fillna(0.0))
+    g = t.groupby("Codigo4d", sort=False)
+    res = por_faixa.assign(
+        Total=g["Valor"].sum(),
+        Vencido=por_faixa[list(FAIXAS_AGING[1:])].sum(axis=1),
+        Titulos=g.size(),
+        DiasAtraso=g["DiasAtraso"].max().clip(lower=0),
+    )
+    res.columns = [str(c) for c in res.columns]
+    return res.reset_index()
+
+def detalhes_aging(resumo: pd.DataFrame) -> dict[str, dict]:
+    """
+    Codigo4d → placeholders extras do template ({titulos}, {dias_atraso}, {vencido_brl}, {aging}).
+    {aging}: faixas vencidas com valor, em formato longo (melt) e juntadas por cliente num groupby.
+    """
+    longo = resumo.melt(id_vars="Codigo4d", value_vars=list(FAIXAS_AGING[1:]), var_name="Faixa", value_name="Valor")
+    longo = longo[longo["Valor"] != 0]
+    texto = longo["Faixa"] + ": R$ " + longo["Valor"].map(formata_brl)
+    aging = (texto.groupby(longo["Codigo4d"], sort=False).agg(" • ".join)
+             .reindex(resumo["Codigo4d"], fill_value="").to_numpy())
+    return pd.DataFrame({
+        "titulos": resumo["Titulos"].astype(str),
+        "dias_atraso": resumo["DiasAtraso"].astype(int).astype(str),
+        "vencido_brl": resumo["Vencido"].map(formata_brl),
+        "aging": aging,
+    }).set_axis(resumo["Codigo4d"]).to_dict("index")
+
+ENTRADAS_EXT = (".pdf", ".csv", ".txt")   # relatórios aceitos (também dentro de .zip)
+ZIP_TRABALHADORES = 4             # membros de um .zip lidos em paralelo
+
+def processa_arquivo(entrada: Path, vendedor_hint: Optional[str] = None,
+                     diagnostico: bool = False, stats: Optional[dict] = None,
+                     titulos: Optional[list] = None) -> pd.DataFrame:
+    """
+    diagnostico=True grava saidas/diagnostico_<arquivo>_<stamp>.json (também quando a extração falha).
+    stats: contadores do cache de páginas do PDF (ver extrai_texto_pdf).
+    titulos: se dada, recebe a tabela de títulos do arquivo (extrai_titulos_de_linhas).
+    .zip: junta os membros PDF/CSV/TXT (ver processa_zip); VendedorArquivo = nome do membro.
+    """
+    if entrada.suffix.lower() == ".zip":
+        dfs, erros = [], []
+        for nome, _, res in processa_zip(entrada, vendedor_hint, diagnostico, stats, titulos=titulos):
+            (erros if isinstance(res, Exception) else dfs).append(res)
+        if not dfs:
+            raise RuntimeError(f"Nenhum membro válido em {entrada.name}"
+                               + (f": {erros[0]}" if erros else " (sem PDF/CSV/TXT)."))
+        return pd.concat(dfs, ignore_index=True)
+    return _processa_fonte(entrada.name, entrada, vendedor_hint, diagnostico, stats, titulos)
+
+def _processa_fonte(nome: str, fonte, vendedor_hint: Optional[str], diagnostico: bool,
+                    stats: Optional[dict], titulos: Optional[list] = None) -> pd.DataFrame:
+    """
+    fonte: caminho ou bytes; nome decide o leitor (extensão) e o VendedorArquivo padrão (stem).
+    Num .zip, nome é o caminho relativo do membro: o diagnóstico leva as pastas no nome, então
+    a/VENDEDOR.pdf e b/VENDEDOR.pdf não se sobrescrevem.
+    """
+    ext = Path(nome).suffix.lower()
     if ext == ".pdf":
-        linhas = extrai_texto_pdf(entrada)
+        linhas = extrai_texto_pdf(io.BytesIO(fonte) if isinstance(fonte, bytes) else fonte, stats=stats)
     else:
-        linhas = extrai_linhas_csv_txt(entrada)
+        linhas = extrai_linhas_csv_txt(fonte)
 
-    df = extrai_clientes_saldos_de_linhas(linhas)
+    stem = Path(nome).stem
+    diag = DiagnosticoParser(nome) if diagnostico else None
+    df = extrai_clientes_saldos_de_linhas(linhas, diag)
+    rel = None
+    if diag:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = re.sub(r"[^\w.-]+", "_", Path(nome).with_suffix("").as_posix())
+        rel = diag.salva(garante_saidas() / f"diagnostico_{base}_{stamp}.json")
     if df.empty:
         raise RuntimeError(
-            f"Não consegui extrair do arquivo: {entrada.name}. "
-            "Me envie 5–10 linhas do conteúdo para ajustar a regex."
+            f"Não consegui extrair do arquivo: {nome}. "
+            + (f"Veja o diagnóstico em {rel.resolve()}." if rel else
+               "Me envie 5–10 linhas do conteúdo para ajustar a regex.")
         )
-    df["VendedorArquivo"] = vendedor_hint or entrada.stem
+    df["VendedorArquivo"] = vendedor_hint or stem
     # NORMALIZA Codigo4d (garantia extra)
     if "Codigo4d" in df.columns:
         df["Codigo4d"] = df["Codigo4d"].astype(str).map(_norm_code)
+    if titulos is not None:
+        titulos.append(extrai_titulos_de_linhas(linhas).assign(VendedorArquivo=vendedor_hint or stem))
     return df
 
+def membros_zip(caminho: Path) -> list:
+    """ZipInfo dos relatórios (PDF/CSV/TXT) do .zip, ignorando pastas e lixo do macOS."""
+    import zipfile
+    with zipfile.ZipFile(caminho) as zf:
+        return [i for i in zf.infolist()
+                if not i.is_dir() and Path(i.filename).suffix.lower() in ENTRADAS_EXT
+                and not Path(i.filename).name.startswith(".") and "__MACOSX" not in i.filename]
+
+def processa_zip(caminho: Path, vendedor_hint: Optional[str] = None, diagnostico: bool = False,
+                 stats: Optional[dict] = None, trabalhadores: int = ZIP_TRABALHADORES,
+                 titulos: Optional[list] = None, perfil: Optional["PerfilExecucao"] = None):
+    """
+    Lê os membros do .zip direto da memória (nada é extraído p/ disco), ZIP_TRABALHADORES
+    por vez, cada thread com o seu handle do zip. Gera (caminho_membro, mtime, df | Exception)
+    na ordem do zip, com o caminho relativo (pastas únicas: a/X.pdf ≠ b/X.pdf);
+    VendedorArquivo = vendedor_hint ou o nome do membro (sem pasta/extensão).
+    perfil: cada membro é medido na thread do pool como a etapa "membro_zip".
+    """
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+    membros = membros_zip(caminho)
+    local = threading.local()
+    abertos = []
+
+    def le(info):
+        st: dict = {}    # stats por membro (somados na thread principal)
+        try:
+            zf = getattr(local, "zf", None)
+            if zf is None:
+                zf = local.zf = zipfile.ZipFile(caminho)
+                abertos.append(zf)
+            with _perfil(perfil, "membro_zip"):
+                dados = zf.read(info)
+                return _processa_fonte(info.filename, dados, vendedor_hint, diagnostico, st, titulos), st
+        except Exception as e:
+            return e, st
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(trabalhadores, len(membros) or 1)),
+                                thread_name_prefix="zip") as ex:
+            for info, (res, st) in zip(membros, ex.map(le, membros)):
+                if stats is not None:
+                    for k, v in st.items():
+                        stats[k] = stats.get(k, 0) + v
+                yield info.filename, datetime(*info.date_time).timestamp(), res
+    finally:
+        for zf in abertos:
+            zf.close()
+
+# ===================== TELEFONES (normalização / importação em massa) =====================
+# Colunas aceitas como telefone no diretório importado (na ordem = prioridade)
+RE_COL_TELEFONE = re.compile(r"^(telefone|fone|celular|whats(app)?|tel)\s*_?\d*$", re.I)
+
+def _norm_code_serie(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de _norm_code (mesmo resultado, sem loop Python)."""
+    d = s.astype("string").fillna("").str.replace(r"\D", "", regex=True)
+    return d.str.zfill(4).where(d != "", "").astype(object)
+
+def normaliza_telefones(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Normaliza telefones BR para E.164 (só dígitos, sem '+': 55 + DDD + número).
+    Aceita pontuação, 0 de tronco, 00/0+operadora e DDI já presente.
+    Retorna (telefone_normalizado, motivo_rejeicao); motivo == "" quando válido.
+    """
+    d = s.astype("string").fillna("").str.replace(r"\D", "", regex=True)
+    d = d.str.replace(r"^00", "", regex=True)                        # prefixo internacional
+    n = d.str.len()
+    d = d.mask(d.str.startswith("0") & n.isin([13, 14]), d.str[3:])   # 0 + operadora + DDD + número
+    d = d.str.replace(r"^0", "", regex=True)                         # 0 de tronco
+    n = d.str.len()
+
+    nacional = n.isin([10, 11])
+    com_ddi = d.str.startswith(PAIS_DDI) & n.isin([12, 13])
+    e164 = d.where(~nacional, PAIS_DDI + d)
+    local = e164.str[len(PAIS_DDI):]
+
+    motivo = pd.Series("", index=s.index, dtype=object)
+    motivo = motivo.mask(~(nacional | com_ddi), "tamanho inválido")
+    ok = motivo == ""
+    motivo = motivo.mask(ok & ~local.str.match(r"^[1-9][1-9]"), "DDD inválido")
+    ok = motivo == ""
+    motivo = motivo.mask(ok & (local.str.len() == 11) & (local.str[2] != "9"), "celular sem 9")
+    motivo = motivo.mask(d == "", "vazio")
+
+    tel = e164.where(motivo == "", "").astype(object)
+    return tel, motivo
+
+RE_E164_BR = re.compile(rf"^{PAIS_DDI}[1-9][1-9](?:9\d{{8}}|\d{{8}})$")
+
+def normaliza_telefone(telefone: str) -> str:
+    """Um telefone → E.164 (só dígitos) ou "" se inválido."""
+    if RE_E164_BR.match(str(telefone)):
+        return str(telefone)  # já normalizado (caso comum: vem da base salva)
+    tel, _ = normaliza_telefones(pd.Series([telefone]))
+    return tel.iat[0]
+
+def _le_tabela_bruta(caminho: Path) -> pd.DataFrame:
+    """CSV/XLSX inteiro como texto (evita códigos/telefones virarem float)."""
+    if caminho.suffix.lower() in (".xlsx", ".xlsm"):
+        return pd.read_excel(caminho, dtype=str, engine="openpyxl")
+    with open(caminho, "rb") as fb:
+        head = fb.read(4096)
+    for enc in ("utf-8-sig", "cp1252", "latin-1"):
+        try:
+            sample = head.decode(enc, errors="strict")
+        except UnicodeDecodeError:
+            continue
+        try:
+            sep = _csv.Sniffer().sniff(sample, delimiters=",;|\t").delimiter
+        except Exception:
+            sep = ";" if sample.count(";") >= sample.count(",") else ","
+        return pd.read_csv(caminho, sep=sep, encoding=enc, dtype=str, keep_default_na=False)
+    return pd.read_csv(caminho, sep=";", encoding="latin-1", dtype=str, keep_default_na=False,
+                       encoding_errors="ignore")
+
+def importa_diretorio_telefones(caminho: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Importa um diretório de telefones (CSV/XLSX) em passes vetorizados.
+    - Codigo4d normalizado como _norm_code; telefones em E.164
+    - várias colunas de telefone (Telefone, Telefone2, Celular…) e/ou várias linhas
+      por cliente viram vários números; a ordem define a Prioridade (1 = principal),
+      a menos que o arquivo traga uma coluna Prioridade
+    - duplicados (mesmo cliente + mesmo número) ficam só com a melhor prioridade
+    Retorna (telefones[Codigo4d, Telefone, Prioridade], rejeitados[linha, Codigo4d, Telefone, Motivo]).
+    """
+    bruto = _le_tabela_bruta(caminho)
+    bruto.columns = [str(c).strip() for c in bruto.columns]
+    col_cod = next((c for c in bruto.columns if c.lower() in ("codigo4d", "codigo", "código", "cod")), None)
+    cols_tel = [c for c in bruto.columns if RE_COL_TELEFONE.match(c)]
+    if col_cod is None or not cols_tel:
+        raise RuntimeError(f"{caminho.name}: esperado colunas Codigo4d e Telefone (encontrado: {list(bruto.columns)}).")
+
+    col_pri = next((c for c in bruto.columns if c.lower() == "prioridade"), None)
+    base = pd.DataFrame({
+        "linha": bruto.index + 2,  # linha no arquivo (cabeçalho = 1)
+        "Codigo4d": _norm_code_serie(bruto[col_cod]),
+        "PrioridadeArquivo": pd.to_numeric(bruto[col_pri], errors="coerce") if col_pri else 0,
+    })
+    longo = pd.concat(
+        [base.assign(Telefone=bruto[c].values, ColunaOrdem=i) for i, c in enumerate(cols_tel)],
+        ignore_index=True,
+    )
+    # colunas de telefone extras vazias não são erro: só somem
+    longo = longo[~((longo["ColunaOrdem"] > 0) & (longo["Telefone"].fillna("").str.strip() == ""))]
+
+    tel, motivo = normaliza_telefones(longo["Telefone"])
+    motivo = motivo.mask(longo["Codigo4d"] == "", "código vazio")
+    rejeitados = longo.loc[motivo != "", ["linha", "Codigo4d", "Telefone"]].assign(Motivo=motivo[motivo != ""])
+
+    ok = longo.loc[motivo == ""].assign(Telefone=tel[motivo == ""])
+    ok = ok.sort_values(["Codigo4d", "PrioridadeArquivo", "ColunaOrdem", "linha"], kind="mergesort")
+    ok = ok.drop_duplicates(subset=["Codigo4d", "Telefone"], keep="first")
+    ok["Prioridade"] = ok.groupby("Codigo4d", sort=False).cumcount() + 1
+    telefones = ok[["Codigo4d", "Telefone", "Prioridade"]].reset_index(drop=True)
+    return telefones, rejeitados.sort_values("linha").reset_index(drop=True)
+
+def mescla_telefones(atual: pd.DataFrame, novos: pd.DataFrame) -> pd.DataFrame:
+    """Clientes presentes em `novos` têm a lista substituída; os demais ficam como estão."""
+    if atual.empty:
+        return novos.reset_index(drop=True)
+    resto = atual[~atual["Codigo4d"].isin(novos["Codigo4d"])]
+    return pd.concat([resto, novos], ignore_index=True)[["Codigo4d", "Telefone", "Prioridade"]]
+
+def mapa_telefone_principal(df_tel: pd.DataFrame) -> dict[str, str]:
+    """Codigo4d → telefone de menor Prioridade."""
+    if df_tel.empty:
+        return {}
+    prim = df_tel.sort_values(["Codigo4d", "Prioridade"], kind="mergesort").drop_duplicates("Codigo4d")
+    return dict(zip(prim["Codigo4d"], prim["Telefone"]))
+
+def le_base_telefones(caminho: Path) -> pd.DataFrame:
+    """Lê a base salva (Codigo4d;Telefone[;Prioridade]) já normalizada; inválidos ficam de fora."""
+    vazio = pd.DataFrame(columns=["Codigo4d", "Telefone", "Prioridade"])
+    if not caminho.exists():
+        return vazio
+    try:
+        df = pd.read_csv(caminho, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    except Exception:
+        df = pd.read_csv(caminho, sep=";", encoding="latin-1", dtype=str, keep_default_na=False)
+    if "Codigo4d" not in df.columns or "Telefone" not in df.columns:
+        return vazio
+
+    df["Codigo4d"] = _norm_code_serie(df["Codigo4d"])
+    df["Telefone"], motivo = normaliza_telefones(df["Telefone"])
+    if "Prioridade" in df.columns:
+        df["Prioridade"] = pd.to_numeric(df["Prioridade"], errors="coerce").fillna(1).astype(int)
+    else:
+        df["Prioridade"] = df.groupby("Codigo4d", sort=False).cumcount() + 1
+    df = df[(df["Codigo4d"] != "") & (motivo == "")]
+    return df[["Codigo4d", "Telefone", "Prioridade"]].reset_index(drop=True)
+
+def salva_base_telefones(df_tel: pd.DataFrame, caminho: Path):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    df_tel.sort_values(["Codigo4d", "Prioridade"], kind="mergesort").to_csv(
+        caminho, sep=";", index=False, encoding="utf-8-sig")
+
+# ===================== ÍNDICE DE NOMES (telefone por nome, código mudou/faltou) =====================
+INDICE_SUGESTOES = 3              # sugestões mostradas por cliente
+INDICE_LIMIAR = 0.6               # similaridade mínima p/ oferecer sugestão (Dice de trigramas; aceite linha a linha)
+INDICE_ORCAMENTO = 2500           # máx. de postings somados por consulta (limita o custo com 500k nomes)
+INDICE_CANDIDATOS = 12            # candidatos reavaliados com a similaridade exata
+# palavras que não identificam o cliente (tipo societário, preposições)
+INDICE_VAZIAS = frozenset("LTDA ME EPP EIRELI SA S A CIA DE DA DO DAS DOS E".split())
+
+def normaliza_nome(nome: str) -> str:
+    """Maiúsculas, sem acento/pontuação e sem palavras vazias: 'Açougue São José Ltda.' → 'ACOUGUE SAO JOSE'."""
+    t = re.sub(r"[^A-Z0-9]+", " ", _sem_acentos(str(nome)).upper())
+    return " ".join(w for w in t.split() if w not in INDICE_VAZIAS)
+
+def _trigramas(nome_norm: str) -> set[str]:
+    """Trigramas por palavra, com borda ('  ab', ' ab ', ...) como no pg_trgm."""
+    tri = set()
+    for w in nome_norm.split():
+        w = f"  {w} "
+        tri.update(w[i:i + 3] for i in range(len(w) - 2))
+    return tri
+
+def _chaves_indice(nome_norm: str) -> set[str]:
+    """
+    Trigramas (toleram erro de digitação) + palavras inteiras ('#JOSE') e pares de palavras
+    vizinhas ('#SAO JOSE'), bem mais seletivos quando as palavras sozinhas são comuns.
+    """
+    ws = nome_norm.split()
+    return (_trigramas(nome_norm) | {f"#{w}" for w in ws}
+            | {f"#{a} {b}" for a, b in zip(ws, ws[1:])})
+
+class IndiceNomes:
+    """
+    Índice invertido (trigramas e palavras) → ids de nomes já associados a um telefone
+    (base de telefones + logs). sugere() conta só as listas mais raras do nome procurado
+    (até INDICE_ORCAMENTO ids) e reavalia os melhores candidatos pela similaridade exata,
+    então a consulta fica abaixo de 1 ms mesmo com 500k nomes.
+    """
+
+    def __init__(self):
+        from array import array
+        self._array = array
+        self.nomes: List[str] = []
+        self.normas: List[str] = []
+        self.codigos: List[str] = []
+        self.telefones: List[str] = []
+        self._post: dict[str, "array"] = {}
+        self._exatos: dict[str, List[int]] = {}    # nome normalizado → ids (renumeração: mesmo nome)
+        self._vistos: set[tuple[str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def adiciona(self, nome: str, codigo: str, telefone: str) -> bool:
+        """Registra nome → (código, telefone); o primeiro telefone visto p/ (nome, código) vale."""
+        norma = normaliza_nome(nome)
+        if not norma or not telefone or (norma, codigo) in self._vistos:
+            return False
+        self._vistos.add((norma, codigo))
+        i = len(self.nomes)
+        self.nomes.append(str(nome)); self.normas.append(norma)
+        self.codigos.append(codigo); self.telefones.append(telefone)
+        self._exatos.setdefault(norma, []).append(i)
+        post = self._post
+        for t in _chaves_indice(norma):
+            lst = post.get(t)
+            if lst is None:
+                lst = post[t] = self._array("I")
+            lst.append(i)
+        return True
+
+    def exato(self, nome: str) -> Optional[tuple[str, str, str]]:
+        """
+        (nome, código, telefone) se o nome normalizado já existe e todos os registros dele têm
+        o mesmo telefone; só esse caso é seguro p/ preencher sem o operador conferir.
+        """
+        ids = self._exatos.get(normaliza_nome(nome), [])
+        if not ids or len({self.telefones[i] for i in ids}) > 1:
+            return None
+        i = ids[0]
+        return self.nomes[i], self.codigos[i], self.telefones[i]
+
+    def sugere(self, nome: str, k: int = INDICE_SUGESTOES) -> List[tuple[float, str, str, str]]:
+        """Top-k (similaridade, nome, código, telefone), um por telefone, do mais parecido ao menos."""
+        from collections import Counter
+        norma = normaliza_nome(nome)
+        q = _trigramas(norma)
+        if not q:
+            return []
+        listas = sorted((self._post[t] for t in _chaves_indice(norma) if t in self._post), key=len)
+        cont: Counter = Counter()
+        orcamento = INDICE_ORCAMENTO
+        for lst in listas:
+            if cont and len(lst) > orcamento:
+                break                       # o resto é comum demais p/ discriminar
+            cont.update(lst[:orcamento])    # contagem em C (Counter), não em laço Python
+            orcamento -= len(lst)
+        candidatos = (self._exatos.get(norma, [])[:INDICE_CANDIDATOS]
+                      + sorted(cont, key=cont.__getitem__, reverse=True)[:INDICE_CANDIDATOS])
+
+        res, tels = [], set()
+        for sim, i in sorted(((2 * len(q & (c := _trigramas(self.normas[i]))) / (len(q) + len(c)), i)
+                              for i in set(candidatos)), reverse=True):
+            if self.telefones[i] in tels:
+                continue
+            tels.add(self.telefones[i])
+            res.append((round(sim, 3), self.nomes[i], self.codigos[i], self.telefones[i]))
+            if len(res) >= k:
+                break
+        return res
+
+def indice_nomes_telefones(telefones: dict[str, str], logs: Optional[pd.DataFrame] = None,
+                           consolidado: Optional[pd.DataFrame] = None) -> IndiceNomes:
+    """
+    Nomes com telefone conhecido: base de telefones (código → telefone, nome vindo dos logs
+    ou do consolidado) primeiro, depois o telefone usado nos logs (mais recente primeiro).
+    """
+    nome_cod: dict[str, str] = {}          # nome atual de cada código
+    logs_tel = None
+    if logs is not None and not logs.empty:
+        logs_tel = logs.loc[logs["telefone"].str.strip() != "", ["timestamp", "codigo4d", "cliente", "telefone"]]
+        logs_tel = logs_tel.sort_values("timestamp", ascending=False, kind="mergesort")
+        logs_tel = logs_tel.assign(codigo4d=_norm_code_serie(logs_tel["codigo4d"]))
+        for cod, nome in zip(_norm_code_serie(logs["codigo4d"])[::-1], logs["cliente"][::-1]):
+            if nome:
+                nome_cod.setdefault(cod, nome)
+    if consolidado is not None and not consolidado.empty:
+        nome_cod.update(zip(_norm_code_serie(consolidado["Codigo4d"]), consolidado["Cliente"].astype(str)))
+
+    idx = IndiceNomes()
+    for cod, tel in telefones.items():
+        if cod in nome_cod:
+            idx.adiciona(nome_cod[cod], cod, tel)
+    if logs_tel is not None:
+        for cod, nome, tel in zip(logs_tel["codigo4d"], logs_tel["cliente"], logs_tel["telefone"]):
+            idx.adiciona(nome, cod, normaliza_telefone(tel) or tel.strip())
+    return idx
+
+# ===================== NÃO CONTATAR (pedido do cliente / negociação jurídica) =====================
+NAO_CONTATAR_CSV = SAIDAS / "nao_contatar.csv"   # Codigo4d;Telefone;Motivo (base mesclada)
+NAO_CONTATAR_COMPACTA_MIN = 1_000_000   # a partir daqui: Bloom + arrays ordenados em vez de sets
+BLOOM_FP = 0.01                   # taxa de falso positivo do Bloom (confirmada no array ordenado)
+
+_M64 = (1 << 64) - 1
+
+def _mistura64(x: int) -> int:
+    """splitmix64 escalar (mesmo resultado de _mistura64_np)."""
+    x = (x + 0x9E3779B97F4A7C15) & _M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _M64
+    return x ^ (x >> 31)
+
+def _mistura64_np(x):
+    """splitmix64 vetorizado (uint64 dá a volta em 2**64 como o & _M64 do escalar)."""
+    import numpy as np
+    with np.errstate(over="ignore"):
+        x = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+class FiltroBloom:
+    """
+    Bloom compacto p/ chaves inteiras (bits em numpy; k posições por hash duplo splitmix64).
+    Montado em lote (vetorizado) e consultado por chave (tem) sem numpy no caminho.
+    "Não está" é definitivo; "talvez" precisa de confirmação.
+    """
+
+    def __init__(self, n: int, fp: float = BLOOM_FP):
+        import math
+        import numpy as np
+        self.m = max(64, int(-n * math.log(fp) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / max(n, 1) * math.log(2)))
+        self._bits = np.zeros((self.m + 7) // 8, dtype=np.uint8)
+        self._bytes = b""
+
+    def adiciona(self, valores):
+        import numpy as np
+        h1 = _mistura64_np(np.asarray(valores, dtype=np.int64))
+        h2 = _mistura64_np(h1) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            for i in range(self.k):
+                p = (h1 + np.uint64(i) * h2) % np.uint64(self.m)
+                np.bitwise_or.at(self._bits, (p >> np.uint64(3)).astype(np.int64),
+                                 np.left_shift(np.uint8(1), (p & np.uint64(7)).astype(np.uint8)))
+        self._bytes = self._bits.tobytes()   # consulta escalar em bytes (mais rápido que indexar numpy)
+
+    def tem(self, valor: int) -> bool:
+        h1 = _mistura64(valor & _M64)
+        h2 = _mistura64(h1) | 1
+        bits, m = self._bytes, self.m
+        for i in range(self.k):
+            p = ((h1 + i * h2) & _M64) % m
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+class ListaNaoContatar:
+    """
+    Clientes/telefones que não podem ser cobrados, com chaves normalizadas (Codigo4d de
+    4 dígitos, telefone E.164). Normal: dois sets, bloqueado() O(1) por contato e filtra()
+    com isin vetorizado. Compacta (compacta=True ou acima de NAO_CONTATAR_COMPACTA_MIN):
+    Bloom + arrays int64 ordenados (~9 bytes/entrada em vez de ~100 dos sets); por contato
+    o Bloom descarta os liberados e os "talvez" são confirmados por busca binária.
+    """
+
+    def __init__(self, base: Optional[pd.DataFrame] = None, compacta: Optional[bool] = None):
+        base = base if base is not None else pd.DataFrame(columns=["Codigo4d", "Telefone", "Motivo"])
+        cods = base["Codigo4d"][base["Codigo4d"] != ""].unique()
+        tels = base["Telefone"][base["Telefone"] != ""].unique()
+        self.n = len(base)
+        self.compacta = bool(compacta) if compacta is not None else len(cods) + len(tels) >= NAO_CONTATAR_COMPACTA_MIN
+        self.bloom: Optional[FiltroBloom] = None
+        if self.compacta:
+            import numpy as np
+            self.codigos = np.sort(cods.astype(np.int64))
+            self.telefones = np.sort(tels.astype(np.int64))
+            # códigos (< 10⁴) e telefones E.164 (> 10¹¹) não colidem: um Bloom só p/ os dois
+            self.bloom = FiltroBloom(len(cods) + len(tels))
+            self.bloom.adiciona(np.concatenate([self.codigos, self.telefones]))
+        else:
+            self.codigos = frozenset(cods)
+            self.telefones = frozenset(tels)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _confirma(self, arr, chave: str) -> bool:
+        """Bloom primeiro; só o "talvez" vai p/ a busca binária."""
+        if not chave.isdigit():
+            return False
+        v = int(chave)
+        if not self.bloom.tem(v):
+            return False
+        i = int(arr.searchsorted(v))
+        return i < len(arr) and int(arr[i]) == v
+
+    def bloqueado(self, codigo: str, telefone: str = "") -> bool:
+        if not self.compacta:
+            return codigo in self.codigos or (bool(telefone) and telefone in self.telefones)
+        return self._confirma(self.codigos, codigo) or (bool(telefone) and self._confirma(self.telefones, telefone))
+
+    def filtra(self, df: pd.DataFrame, telefones: Optional[dict[str, str]] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """(liberados, bloqueados) por Codigo4d e, se dado o mapa, pelo telefone do cliente."""
+        cods = _norm_code_serie(df["Codigo4d"])
+        tels = cods.map(telefones).fillna("") if telefones else None
+        if self.compacta:
+            # chaves numéricas: códigos/telefones vazios viram -1 (nunca bloqueados)
+            cods = pd.to_numeric(cods, errors="coerce").fillna(-1).astype("int64")
+            tels = pd.to_numeric(tels, errors="coerce").fillna(-1).astype("int64") if tels is not None else None
+        mask = cods.isin(self.codigos)
+        if tels is not None and len(self.telefones):
+            mask |= tels.isin(self.telefones)
+        return df[~mask.values], df[mask.values]
+
+def importa_nao_contatar(caminho: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    CSV/XLSX com Codigo4d e/ou Telefone (+ Motivo opcional) → Codigo4d;Telefone;Motivo normalizados.
+    Telefone preenchido e inválido não some calado: vai p/ rejeitados (sem código na linha, o
+    cliente não fica bloqueado e o arquivo precisa ser corrigido).
+    Retorna (lista[Codigo4d, Telefone, Motivo], rejeitados[linha, Codigo4d, Telefone, Motivo]).
+    """
+    bruto = _le_tabela_bruta(caminho)
+    bruto.columns = [str(c).strip() for c in bruto.columns]
+    col_cod = next((c for c in bruto.columns if c.lower() in ("codigo4d", "codigo", "código", "cod")), None)
+    cols_tel = [c for c in bruto.columns if RE_COL_TELEFONE.match(c)]
+    col_mot = next((c for c in bruto.columns if c.lower() == "motivo"), None)
+    if col_cod is None and not cols_tel:
+        raise RuntimeError(f"{caminho.name}: esperado coluna Codigo4d e/ou Telefone (encontrado: {list(bruto.columns)}).")
+
+    cod = _norm_code_serie(bruto[col_cod]) if col_cod else pd.Series("", index=bruto.index, dtype=object)
+    motivo = bruto[col_mot].fillna("").astype(str).str.strip() if col_mot else pd.Series("", index=bruto.index, dtype=object)
+    partes = [pd.DataFrame({"Codigo4d": cod, "Telefone": "", "Motivo": motivo})] if col_cod else []
+    rejeitados = []
+    for c in cols_tel:
+        tel, rej = normaliza_telefones(bruto[c])
+        partes.append(pd.DataFrame({"Codigo4d": cod, "Telefone": tel, "Motivo": motivo}))
+        ruim = (rej != "") & (rej != "vazio")
+        rejeitados.append(pd.DataFrame({"linha": bruto.index[ruim] + 2,   # linha no arquivo (cabeçalho = 1)
+                                        "Codigo4d": cod[ruim], "Telefone": bruto.loc[ruim, c], "Motivo": rej[ruim]}))
+    df = pd.concat(partes, ignore_index=True)
+    df = df[(df["Codigo4d"] != "") | (df["Telefone"] != "")]
+    rejeitados = (pd.concat(rejeitados, ignore_index=True) if rejeitados
+                  else pd.DataFrame(columns=["linha", "Codigo4d", "Telefone", "Motivo"]))
+    return (df.drop_duplicates(subset=["Codigo4d", "Telefone"]).reset_index(drop=True),
+            rejeitados.sort_values("linha", kind="mergesort").reset_index(drop=True))
+
+def le_base_nao_contatar(caminho: Path = NAO_CONTATAR_CSV) -> pd.DataFrame:
+    if not caminho.exists():
+        return pd.DataFrame(columns=["Codigo4d", "Telefone", "Motivo"])
+    base = pd.read_csv(caminho, sep=";", dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    return base[["Codigo4d", "Telefone", "Motivo"]]
+
+def le_nao_contatar(caminho: Path = NAO_CONTATAR_CSV) -> ListaNaoContatar:
+    return ListaNaoContatar(le_base_nao_contatar(caminho))
+
+def salva_nao_contatar(base: pd.DataFrame, caminho: Path = NAO_CONTATAR_CSV):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    base.to_csv(caminho, sep=";", index=False, encoding="utf-8-sig")
+
+# ===================== CONSOLIDAÇÃO (dedup entre arquivos) =====================
+REGRAS_DEDUP = ("recente", "maior", "soma_vendedor")
+
+class ConsolidadorClientes:
+    """
+    Merge em fluxo dos arquivos da pasta: cada DataFrame entra, é indexado por Codigo4d
+    normalizado num dict e descartado — a memória fica em 1 registro por cliente.
+    Regras p/ o mesmo cliente em mais de um arquivo:
+      - "recente": vale o arquivo com mtime mais novo (empate: o último processado)
+      - "maior": vale o maior saldo
+      - "soma_vendedor": por vendedor vale o arquivo mais recente; entre vendedores, soma
+    Divergências de saldo ficam em `conflitos`; relatorio_conflitos() também lista, em
+    "soma_vendedor", os clientes que aparecem em mais de um vendedor (saldos somados).
+    """
+
+    def __init__(self, regra: str = "recente"):
+        if regra not in REGRAS_DEDUP:
+            raise ValueError(f"Regra de dedup desconhecida: {regra}")
+        self.regra = regra
+        self._idx: dict[tuple[str, str], list] = {}   # chave → [codigo, cliente, saldo, vendedor, arquivo, mtime]
+        self.conflitos: List[dict] = []
+        self.linhas_lidas = 0
+
+    def adiciona(self, df: pd.DataFrame, mtime: float, arquivo: str):
+        cods = _norm_code_serie(df["Codigo4d"]).tolist()
+        vends = df["VendedorArquivo"].astype(str).tolist() if "VendedorArquivo" in df.columns else [""] * len(df)
+        por_vendedor = self.regra == "soma_vendedor"
+        for cod, cli, saldo, vend in zip(cods, df["Cliente"].astype(str).tolist(),
+                                         pd.to_numeric(df["Saldo"], errors="coerce").fillna(0.0).tolist(), vends):
+            self.linhas_lidas += 1
+            if not cod:
+                continue
+            chave = (cod, vend if por_vendedor else "")
+            novo = [cod, cli, saldo, vend, arquivo, mtime]
+            atual = self._idx.get(chave)
+            if atual is None:
+                self._idx[chave] = novo
+                continue
+            if self.regra == "maior":
+                vence = saldo > atual[2]
+            else:
+                vence = mtime >= atual[5]
+            if abs(saldo - atual[2]) > 0.005 or atual[3] != vend:
+                venc = novo if vence else atual
+                self.conflitos.append({
+                    "Codigo4d": cod, "Cliente": cli, "Regra": self.regra, "Tipo": "divergencia",
+                    "ArquivoA": atual[4], "VendedorA": atual[3], "SaldoA": atual[2],
+                    "ArquivoB": arquivo, "VendedorB": vend, "SaldoB": saldo,
+                    "ArquivoVencedor": venc[4], "SaldoVencedor": venc[2],
+                })
+            if vence:
+                self._idx[chave] = novo
+
+    def resultado(self) -> pd.DataFrame:
+        cols = ["Codigo4d", "Cliente", "Saldo", "VendedorArquivo", "ArquivoOrigem"]
+        if not self._idx:
+            return pd.DataFrame(columns=cols)
+        df = pd.DataFrame([v[:5] for v in self._idx.values()], columns=cols)
+        if self.regra == "soma_vendedor":
+            df = df.groupby("Codigo4d", sort=False, as_index=False).agg(
+                Cliente=("Cliente", "last"), Saldo=("Saldo", "sum"),
+                VendedorArquivo=("VendedorArquivo", "+".join), ArquivoOrigem=("ArquivoOrigem", "+".join))
+        return df
+
+    def sobreposicoes(self) -> List[dict]:
+        """soma_vendedor: um registro por vendedor extra de cada cliente presente em mais de um vendedor."""
+        if self.regra != "soma_vendedor":
+            return []
+        por_cod: dict[str, list] = {}
+        for v in self._idx.values():
+            por_cod.setdefault(v[0], []).append(v)
+        out = []
+        for regs in por_cod.values():
+            if len(regs) < 2:
+                continue
+            a = regs[0]
+            arquivos = "+".join(r[4] for r in regs)
+            total = sum(r[2] for r in regs)
+            for b in regs[1:]:
+                out.append({
+                    "Codigo4d": a[0], "Cliente": b[1], "Regra": self.regra, "Tipo": "soma_entre_vendedores",
+                    "ArquivoA": a[4], "VendedorA": a[3], "SaldoA": a[2],
+                    "ArquivoB": b[4], "VendedorB": b[3], "SaldoB": b[2],
+                    "ArquivoVencedor": arquivos, "SaldoVencedor": total,
+                })
+        return out
+
+    def relatorio_conflitos(self) -> pd.DataFrame:
+        return pd.DataFrame(self.conflitos + self.sobreposicoes())
+
+# ===================== PERFIL (opt-in: --profile) =====================
+PERFIL_TOP = 30                   # linhas nas tabelas de funções/alocações
+PERFIL_QUADROS = 1                # quadros de pilha guardados pelo tracemalloc por alocação
+
+class PerfilExecucao:
+    """
+    cProfile + tracemalloc por etapa de uma execução (conversão ou campanha).
+    Chamadas repetidas da mesma etapa (ex.: processa_arquivo por arquivo) acumulam.
+    Cada thread tem o seu profiler (remetentes, membros do .zip) e as estatísticas da
+    etapa são somadas. Limitações, registradas no relatório: uma etapa aberta dentro de
+    outra na mesma thread só soma o tempo (as funções ficam na externa, cProfile não
+    aninha); se o Python recusar um 2º profiler simultâneo (3.12+), a chamada roda sem
+    perfil; o pico de memória é do processo, e inclui etapas simultâneas de outras threads.
+    salva() grava em saidas/: perfil_<stamp>_<etapa>.pstats, perfil_<stamp>.txt (top-N) e
+    perfil_<stamp>_memoria.json.
+    """
+
+    def __init__(self, top: int = PERFIL_TOP):
+        import tracemalloc
+        self.top = top
+        self.etapas: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()     # etapa aberta na thread atual
+        self._ativas = 0                     # etapas perfiladas em andamento (todas as threads)
+        self._parar_tracemalloc = not tracemalloc.is_tracing()
+        if self._parar_tracemalloc:
+            tracemalloc.start(PERFIL_QUADROS)
+
+    def _registro(self, nome: str) -> dict:
+        with self._lock:
+            return self.etapas.setdefault(nome, {"stats": None, "chamadas": 0, "segundos": 0.0,
+                                                 "pico_bytes": 0, "alocacoes": [], "threads": set(),
+                                                 "aninhada_em": {}, "sem_perfil": 0})
+
+    @contextmanager
+    def etapa(self, nome: str):
+        e = self._registro(nome)
+        externa = getattr(self._local, "etapa", None)
+        if externa is not None:
+            t0 = time.perf_counter()
+            try:
+                yield
+            finally:
+                with self._lock:
+                    e["chamadas"] += 1
+                    e["segundos"] += time.perf_counter() - t0
+                    e["aninhada_em"][externa] = e["aninhada_em"].get(externa, 0) + 1
+                    e["threads"].add(threading.current_thread().name)
+            return
+
+        import cProfile, pstats, tracemalloc
+        prof = cProfile.Profile()
+        with self._lock:
+            if not self._ativas:
+                tracemalloc.reset_peak()
+            self._ativas += 1
+        self._local.etapa = nome
+        t0 = time.perf_counter()
+        try:
+            try:
+                prof.enable()
+            except ValueError:   # outro profiler ativo no processo
+                prof = None
+            try:
+                yield
+            finally:
+                if prof is not None:
+                    prof.disable()
+        finally:
+            seg = time.perf_counter() - t0
+            self._local.etapa = None
+            pico = tracemalloc.get_traced_memory()[1]
+            with self._lock:
+                self._ativas -= 1
+                if prof is None:
+                    e["sem_perfil"] += 1
+                else:
+                    try:
+                        if e["stats"] is None:
+                            e["stats"] = pstats.Stats(prof)
+                        else:
+                            e["stats"].add(prof)
+                    except TypeError:   # perfil vazio
+                        pass
+                e["chamadas"] += 1
+                e["segundos"] += seg
+                e["threads"].add(threading.current_thread().name)
+                if pico >= e["pico_bytes"]:
+                    # maiores alocações vivas ao fim da chamada de maior pico
+                    e["pico_bytes"] = pico
+                    e["alocacoes"] = [
+                        {"linha": f"{st.traceback[0].filename}:{st.traceback[0].lineno}",
+                         "kb": round(st.size / 1024, 1), "blocos": st.count}
+                        for st in tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+                    ]
+
+    @staticmethod
+    def _ressalvas(e: dict) -> List[str]:
+        r = [f"aninhada em {ext} {n}x (funções contadas em {ext})" for ext, n in e["aninhada_em"].items()]
+        if e["sem_perfil"]:
+            r.append(f"{e['sem_perfil']}x sem perfil (outro profiler ativo)")
+        return r
+
+    def resumo(self) -> List[str]:
+        return [f"{nome}: {e['segundos']:.2f} s em {e['chamadas']}x • pico {e['pico_bytes'] / 2**20:.1f} MB"
+                + "".join(f" • {r}" for r in self._ressalvas(e))
+                for nome, e in self.etapas.items()]
+
+    def salva(self, pasta: Path, stamp: Optional[str] = None) -> List[Path]:
+        import io
+        stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        saidas = []
+        txt = io.StringIO()
+        txt.write("# Segundos somam as chamadas de todas as threads (podem passar do tempo de parede).\n"
+                  "# Pico de memória: do processo inteiro durante a etapa (inclui etapas simultâneas).\n"
+                  "# Etapa aninhada: só tempo; as funções dela aparecem na etapa externa.\n\n")
+        for nome, e in self.etapas.items():
+            txt.write(f"===== {nome} • {e['segundos']:.3f} s em {e['chamadas']} chamada(s) • "
+                      f"pico {e['pico_bytes'] / 2**20:.1f} MB • threads {', '.join(sorted(e['threads']))} =====\n")
+            for r in self._ressalvas(e):
+                txt.write(f"(!) {r}\n")
+            st = e["stats"]
+            if st is None:
+                continue
+            arq = pasta / f"perfil_{stamp}_{nome}.pstats"
+            st.dump_stats(arq)
+            saidas.append(arq)
+            st.stream = txt
+            for ordem in ("cumulative", "tottime"):
+                txt.write(f"--- top {self.top} por {ordem}\n")
+                st.sort_stats(ordem).print_stats(self.top)
+        rel = pasta / f"perfil_{stamp}.txt"
+        rel.write_text(txt.getvalue(), encoding="utf-8")
+        mem = pasta / f"perfil_{stamp}_memoria.json"
+        mem.write_text(json.dumps({nome: {"segundos": round(e["segundos"], 4), "chamadas": e["chamadas"],
+                                          "pico_mb": round(e["pico_bytes"] / 2**20, 2),
+                                          "threads": sorted(e["threads"]),
+                                          "aninhada_em": e["aninhada_em"], "sem_perfil": e["sem_perfil"],
+                                          "alocacoes_top": e["alocacoes"]}
+                                   for nome, e in self.etapas.items()}, ensure_ascii=False, indent=2),
+                       encoding="utf-8")
+        return saidas + [rel, mem]
+
+    def encerra(self):
+        import tracemalloc
+        if self._parar_tracemalloc:
+            tracemalloc.stop()
+
+def _perfil(perfil: Optional[PerfilExecucao], nome: str):
+    return perfil.etapa(nome) if perfil is not None else nullcontext()
+
+# ===================== AMBIENTE DESKTOP (provedores injetáveis) =====================
+class Cronometro:
+    """Latências por etapa (thread-safe). Use `with crono.etapa("abrir"): ...`."""
+
+    def __init__(self, relogio: Callable[[], float] = time.perf_counter):
+        self.relogio = relogio
+        self.amostras: dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        t0 = self.relogio()
+        try:
+            yield
+        finally:
+            dt = self.relogio() - t0
+            with self._lock:
+                self.amostras.setdefault(nome, []).append(dt)
+
+    def resumo(self) -> pd.DataFrame:
+        linhas = []
+        for nome, v in self.amostras.items():
+            sr = pd.Series(v)
+            linhas.append({"etapa": nome, "n": len(v), "media_s": sr.mean(), "p50_s": sr.median(),
+                           "p95_s": sr.quantile(0.95), "max_s": sr.max(), "total_s": sr.sum()})
+        return pd.DataFrame(linhas, columns=["etapa", "n", "media_s", "p50_s", "p95_s", "max_s", "total_s"])
+
+def _etapa(crono: Optional[Cronometro], nome: str):
+    return crono.etapa(nome) if crono is not None else nullcontext()
+
+LANCADOR_ESPERA_S = 2.0           # tempo p/ xdg-open/gio/open acusarem erro (depois disso: lançou)
+
+def _lancador_comando(*cmd: str) -> Callable[[str], None]:
+    def abrir(url: str):
+        import subprocess
+        proc = subprocess.Popen([*cmd, url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            rc = proc.wait(timeout=LANCADOR_ESPERA_S)
+        except subprocess.TimeoutExpired:
+            return  # alguns handlers só retornam quando o app fecha
+        if rc != 0:
+            raise OSError(f"{cmd[0]} não abriu {url.split(':', 1)[0]}:// (código {rc})")
+    return abrir
+
+def escolhe_lancador() -> tuple[str, Optional[Callable[[str], None]]]:
+    """Backend p/ abrir whatsapp:// no SO atual: startfile (Windows), open (macOS), xdg-open/gio (Linux)."""
+    if hasattr(os, "startfile"):
+        return "startfile", os.startfile
+    if sys.platform == "darwin":
+        return "open", _lancador_comando("open")
+    import shutil
+    for cmd in (("xdg-open",), ("gio", "open")):
+        if shutil.which(cmd[0]):
+            return " ".join(cmd), _lancador_comando(*cmd)
+    return "", None
+
+class AmbienteDesktop:
+    """
+    Tudo que abre_whatsapp_desktop faz no sistema: launcher, clipboard, teclado/mouse,
+    janela e espera. Esta classe é o ambiente real (startfile/xdg-open/gio + pyautogui/
+    pyperclip/pygetwindow); testes e o harness (bench_campanha.py) injetam substitutos.
+    """
+
+    def __init__(self, lancador: Optional[Callable[[str], None]] = None):
+        self._lancador = lancador
+
+    def copiar(self, texto: str):
+        import pyperclip
+        pyperclip.copy(texto)
+
+    def ler_clipboard(self) -> str:
+        import pyperclip
+        return pyperclip.paste() or ""
+
+    def abrir_app(self, url: str):
+        if self._lancador is None:
+            _, self._lancador = escolhe_lancador()
+            if self._lancador is None:
+                raise OSError("nenhum launcher p/ whatsapp:// (instale xdg-utils ou gio)")
+        self._lancador(url)
+
+    def abrir_web(self, url: str):
+        import webbrowser
+        webbrowser.open(url)
+
+    def dormir(self, segundos: float):
+        time.sleep(segundos)
+
+    def focar_whatsapp(self) -> bool:
+        import pygetwindow as gw
+        wins = [w for w in gw.getAllTitles() if "WhatsApp" in w]
+        if not wins:
+            return False
+        w = gw.getWindowsWithTitle(wins[0])[0]
+        if w and not w.isActive:
+            w.activate()
+            self.dormir(0.5)
+        return True
+
+    @staticmethod
+    def _pyautogui():
+        import pyautogui
+        pyautogui.PAUSE = 0.05
+        pyautogui.FAILSAFE = False
+        return pyautogui
+
+    def clicar(self):
+        self._pyautogui().click()
+
+    def atalho(self, *teclas: str):
+        self._pyautogui().hotkey(*teclas)
+
+    def digitar(self, texto: str, intervalo: float):
+        self._pyautogui().typewrite(texto, interval=intervalo)
+
+    def tecla(self, nome: str):
+        self._pyautogui().press(nome)
+
+AMBIENTE_REAL = AmbienteDesktop()
+
+# ===================== INJEÇÃO DE TEXTO =====================
+INJECAO_PARTE = 400               # caracteres por colagem no modo "em partes"
+
+def _mesmo_texto(a: str, b: str) -> bool:
+    return a.replace("\r\n", "\n").rstrip() == b.replace("\r\n", "\n").rstrip()
+
+def _partes_texto(texto: str, tam: int = INJECAO_PARTE) -> List[str]:
+    """Quebra em blocos de até `tam` caracteres, preferindo fronteiras de linha."""
+    partes: List[str] = []
+    atual = ""
+    for ln in texto.splitlines(keepends=True):
+        while len(ln) > tam:
+            if atual:
+                partes.append(atual); atual = ""
+            partes.append(ln[:tam]); ln = ln[tam:]
+        if len(atual) + len(ln) > tam:
+            partes.append(atual); atual = ""
+        atual += ln
+    if atual:
+        partes.append(atual)
+    return partes
+
+def _sem_acentos(texto: str) -> str:
+    import unicodedata
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+def _cola_com_clipboard_conferido(amb: "AmbienteDesktop", texto: str) -> bool:
+    """
+    Confere o clipboard ANTES do Ctrl+V (recopia se outro app trocou) e cola. Não lê de volta
+    a caixa de texto: True quer dizer "colou o texto certo", não "a caixa tem o texto".
+    """
+    try:
+        if not _mesmo_texto(amb.ler_clipboard(), texto):
+            amb.copiar(texto)
+            if not _mesmo_texto(amb.ler_clipboard(), texto):
+                return False
+        amb.atalho('ctrl', 'v')
+        return True
+    except Exception:
+        return False
+
+RE_NAO_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+def _digita(amb: "AmbienteDesktop", texto: str):
+    """
+    Digitação: sem intervalo entre teclas e quebras de linha com Shift+Enter (Enter sozinho
+    enviaria a mensagem pela metade). O typewrite só conhece ASCII; os trechos acentuados
+    vão pelo clipboard (conferido). Se nem isso der, levanta: melhor colar à mão do que
+    mandar "Ola, Joao" no lugar de "Olá, João".
+    """
+    linhas = texto.split("\n")
+    for i, ln in enumerate(linhas):
+        pos = 0
+        for m in RE_NAO_ASCII.finditer(ln):
+            if m.start() > pos:
+                amb.digitar(ln[pos:m.start()], 0)
+            if not _cola_com_clipboard_conferido(amb, m.group()):
+                raise RuntimeError("clipboard indisponível p/ os acentos: cole a mensagem à mão")
+            pos = m.end()
+        if pos < len(ln):
+            amb.digitar(ln[pos:], 0)
+        if i < len(linhas) - 1:
+            amb.atalho('shift', 'enter')
+
+def injeta_texto(amb: "AmbienteDesktop", mensagem: str, colar: bool = True, digitar: bool = True,
+                 crono: Optional[Cronometro] = None) -> str:
+    """
+    Coloca `mensagem` na caixa de texto já focada. Retorna o método que funcionou:
+    "COLAR" | "COLAR_PARTES" | "DIGITAR" | "" (nenhum).
+    """
+    resto = mensagem
+    if colar:
+        with _etapa(crono, "colar"):
+            if _cola_com_clipboard_conferido(amb, mensagem):
+                return "COLAR"
+        partes = _partes_texto(mensagem)
+        if len(partes) > 1:
+            with _etapa(crono, "colar_partes"):
+                feitas = 0
+                for parte in partes:
+                    if not _cola_com_clipboard_conferido(amb, parte):
+                        break
+                    feitas += 1
+            if feitas == len(partes):
+                return "COLAR_PARTES"
+            resto = "".join(partes[feitas:])
+    if digitar:
+        with _etapa(crono, "digitar"):
+            try:
+                _digita(amb, resto)
+                return "DIGITAR"
+            except Exception:
+                pass
+    return ""
+
 # ===================== WHATSAPP DESKTOP (robusto) =====================
 def abre_whatsapp_desktop(telefone: str, mensagem: str,
                           delay: int,
                           auto_paste: bool,
                           auto_press_enter: bool,
                           auto_type_fallback: bool,
-                          focar_janela: bool) -> tuple[str, str]:
+                          focar_janela: bool,
+                          ambiente: Optional[AmbienteDesktop] = None,
+                          crono: Optional[Cronometro] = None) -> tuple[str, str]:
     """
     Abre WhatsApp Desktop e garante texto na caixa:
     - copia para o clipboard ANTES de abrir
     - tenta focar a janela (pygetwindow opcional)
-    - cola (Ctrl+V); se falhar, digita (fallback)
+    - cola (Ctrl+V) conferindo o clipboard; senão cola em partes; por último digita
+      (acentos pelo clipboard; sem ele, nada de texto sem acento: fica p/ colar à mão)
     - envio manual por padrão (Enter), salvo auto_press_enter=True
+    ambiente: provedores de sistema (padrão: reais); crono: mede cada etapa.
     Retorna (canal, url_usada)
     """
+    amb = ambiente or AMBIENTE_REAL
+
     # 1) Copia ANTES (mais confiável)
-    try:
-        import pyperclip
-        pyperclip.copy(mensagem)
-    except Exception:
-        pass
+    with _etapa(crono, "clipboard"):
+        try:
+            amb.copiar(mensagem)
+        except Exception:
+            pass
 
     texto = urllib.parse.quote(mensagem, safe='')
-    url_app = f"whatsapp://send?phone={PAIS_DDI}{telefone}&text={texto}"
-    url_web = f"https://wa.me/{PAIS_DDI}{telefone}?text={texto}"
+    fone = normaliza_telefone(telefone) or f"{PAIS_DDI}{_only_digits(telefone)}"
+    url_app = f"whatsapp://send?phone={fone}&text={texto}"
+    url_web = f"https://wa.me/{fone}?text={texto}"
 
     # 2) Abre Desktop
-    try:
-        os.startfile(url_app)
-        canal, url = "DESKTOP", url_app
-    except Exception:
-        webbrowser.open(url_web)
-        return "WEB_FALLBACK", url_web
+    with _etapa(crono, "abrir"):
+        try:
+            amb.abrir_app(url_app)
+            canal, url = "DESKTOP", url_app
+        except Exception:
+            amb.abrir_web(url_web)
+            return "WEB_FALLBACK", url_web
 
     # 3) Aguardar abertura
-    time.sleep(max(2, delay))
+    with _etapa(crono, "espera_abertura"):
+        amb.dormir(max(2, delay))
 
     # 4) Focar janela (opcional)
     if focar_janela:
-        try:
-            import pygetwindow as gw
-            wins = [w for w in gw.getAllTitles() if "WhatsApp" in w]
-            if wins:
-                w = gw.getWindowsWithTitle(wins[0])[0]
-                if w and not w.isActive:
-                    w.activate()
-                    time.sleep(0.5)
-        except Exception:
-            pass
+        with _etapa(crono, "foco"):
+            try:
+                amb.focar_whatsapp()
+            except Exception:
+                pass
 
-    # 5) Tenta colar
-    colou = False
+    # 5) Inserir o texto: colar (clipboard conferido) → colar em partes → digitar (último recurso)
     try:
-        import pyautogui
-        pyautogui.PAUSE = 0.05
-        pyautogui.FAILSAFE = False
-        pyautogui.click()
-        time.sleep(0.1)
-        if auto_paste:
-            pyautogui.hotkey('ctrl', 'v')
-            colou = True
+        amb.clicar()
+        amb.dormir(0.1)
+        clicou = True
     except Exception:
-        colou = False
-
-    # 6) Fallback: digitar
-    if not colou and auto_type_fallback:
-        try:
-            import pyautogui
-            pyautogui.typewrite(mensagem, interval=0.005)
-            colou = True
-        except Exception:
-            pass
+        clicou = False
+    metodo = injeta_texto(amb, mensagem, colar=auto_paste, digitar=auto_type_fallback, crono=crono) if clicou else ""
+    colou = bool(metodo)
 
-    # 7) Enviar automático (opcional)
+    # 6) Enviar automático (opcional)
     if colou and auto_press_enter:
-        try:
-            import pyautogui
-            pyautogui.press('enter')
-        except Exception:
-            pass
+        with _etapa(crono, "enter"):
+            try:
+                amb.tecla('enter')
+            except Exception:
+                pass
 
     return canal, url
 
-# ===================== GUI (Tkinter) =====================
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Agente de Cobrança • Extra Carne")
-        self.geometry("980x650")
-        self.minsize(980, 650)
-
-        # Estado
-        self.modo = tk.StringVar(value="arquivo")
-        self.caminho_arquivo = tk.StringVar(value="")
-        self.caminho_pasta = tk.StringVar(value="")
-        self.delay = tk.IntVar(value=DEFAULT_DELAY)
-        self.auto_paste = tk.BooleanVar(value=True)
-        self.auto_enter = tk.BooleanVar(value=False)
-        self.auto_type_fallback = tk.BooleanVar(value=True)
-        self.focus_wa = tk.BooleanVar(value=True)
-        self.vendedor_hint = tk.StringVar(value="")
-        self.msg_base = tk.StringVar(value=MENSAGEM_BASE)
-
-        # Telefones
-        self.telefones_path = tk.StringVar(value=str(DEFAULT_TEL_CSV if DEFAULT_TEL_CSV.exists() else ""))
-        self.telefones_map: dict[str, str] = self._carrega_telefones(Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV)
-
-        self.df_consolidado: Optional[pd.DataFrame] = None
-        self.origem_label: Optional[str] = None
-
-        self._build_ui()
-
-        if self.telefones_map:
-            self.log(f"[Telefones] {len(self.telefones_map)} números carregados.")
-
-    # ---------- UI ----------
-    def _build_ui(self):
-        frm_top = ttk.Frame(self); frm_top.pack(fill="x", padx=12, pady=8)
-
-        ttk.Label(frm_top, text="Modo:").grid(row=0, column=0, sticky="w")
-        ttk.Radiobutton(frm_top, text="1 arquivo (PDF/CSV/TXT)", variable=self.modo, value="arquivo").grid(row=0, column=1, sticky="w", padx=6)
-        ttk.Radiobutton(frm_top, text="Pasta (vários arquivos)", variable=self.modo, value="pasta").grid(row=0, column=2, sticky="w", padx=6)
-
-        ttk.Label(frm_top, text="Vendedor/Origem:").grid(row=1, column=0, sticky="w", pady=(6,0))
-        ttk.Entry(frm_top, textvariable=self.vendedor_hint, width=40).grid(row=1, column=1, columnspan=2, sticky="we", pady=(6,0))
-
-        # Seleção
-        frm_sel = ttk.LabelFrame(self, text="Seleção de entrada"); frm_sel.pack(fill="x", padx=12, pady=8)
-        self.entry_arquivo = ttk.Entry(frm_sel, textvariable=self.caminho_arquivo, width=80)
-        self.entry_pasta = ttk.Entry(frm_sel, textvariable=self.caminho_pasta, width=80)
-        ttk.Button(frm_sel, text="Escolher arquivo…", command=self.pick_arquivo).grid(row=0, column=0, padx=4, pady=6, sticky="w")
-        self.entry_arquivo.grid(row=0, column=1, padx=4, pady=6, sticky="we")
-        ttk.Button(frm_sel, text="Escolher pasta…", command=self.pick_pasta).grid(row=1, column=0, padx=4, pady=6, sticky="w")
-        self.entry_pasta.grid(row=1, column=1, padx=4, pady=6, sticky="we")
-        frm_sel.columnconfigure(1, weight=1)
-
-        # Telefones
-        frm_tel = ttk.LabelFrame(self, text="Telefones (opcional: CSV Codigo4d;Telefone)"); frm_tel.pack(fill="x", padx=12, pady=8)
-        ttk.Button(frm_tel, text="Importar CSV de telefones…", command=self.pick_telefones).grid(row=0, column=0, padx=4, pady=6, sticky="w")
-        ttk.Entry(frm_tel, textvariable=self.telefones_path, width=80).grid(row=0, column=1, padx=4, pady=6, sticky="we")
-        frm_tel.columnconfigure(1, weight=1)
-
-        # Opções
-        frm_opts = ttk.LabelFrame(self, text="Envio (WhatsApp Desktop)"); frm_opts.pack(fill="x", padx=12, pady=8)
-        ttk.Label(frm_opts, text="Aguardar (s):").grid(row=0, column=0, sticky="w")
-        ttk.Spinbox(frm_opts, from_=2, to=15, textvariable=self.delay, width=5).grid(row=0, column=1, sticky="w", padx=(4,10))
-        ttk.Checkbutton(frm_opts, text="Colar automaticamente (Ctrl+V)", variable=self.auto_paste).grid(row=0, column=2, sticky="w", padx=10)
-        ttk.Checkbutton(frm_opts, text="(Avançado) Enviar automático (Enter)", variable=self.auto_enter).grid(row=0, column=3, sticky="w", padx=10)
-        ttk.Checkbutton(frm_opts, text="Fallback: digitar texto se não colar", variable=self.auto_type_fallback).grid(row=1, column=2, sticky="w", padx=10)
-        ttk.Checkbutton(frm_opts, text="Tentar focar janela do WhatsApp", variable=self.focus_wa).grid(row=1, column=3, sticky="w", padx=10)
-
-        # Mensagem
-        frm_msg = ttk.LabelFrame(self, text="Mensagem base (usa {codigo4d}, {cliente}, {saldo_brl})")
-        frm_msg.pack(fill="both", padx=12, pady=8, expand=True)
-        self.txt_msg = tk.Text(frm_msg, height=8, wrap="word")
-        self.txt_msg.insert("1.0", self.msg_base.get())
-        self.txt_msg.pack(fill="both", expand=True, padx=6, pady=6)
-
-        # Ações
-        frm_btn = ttk.Frame(self); frm_btn.pack(fill="x", padx=12, pady=8)
-        ttk.Button(frm_btn, text="1) Converter p/ Consolidado", command=self.run_converter).pack(side="left", padx=4)
-        ttk.Button(frm_btn, text="2) Iniciar Cobrança", command=self.run_cobranca).pack(side="left", padx=4)
-
-        # Log
-        frm_log = ttk.LabelFrame(self, text="Log"); frm_log.pack(fill="both", padx=12, pady=8, expand=True)
-        self.txt_log = tk.Text(frm_log, height=10, wrap="word")
-        self.txt_log.pack(fill="both", expand=True, padx=6, pady=6)
-
-    # ---------- UI helpers ----------
-    def log(self, msg: str):
-        self.txt_log.insert("end", msg + "\n")
-        self.txt_log.see("end")
-        self.update_idletasks()
-
-    def pick_arquivo(self):
-        f = filedialog.askopenfilename(title="Escolha um PDF/CSV/TXT",
-                                       filetypes=[("Relatórios", "*.pdf;*.csv;*.txt"), ("Todos", "*.*")])
-        if f:
-            self.caminho_arquivo.set(f)
-
-    def pick_pasta(self):
-        d = filedialog.askdirectory(title="Escolha a pasta com relatórios")
-        if d:
-            self.caminho_pasta.set(d)
-
-    def pick_telefones(self):
-        f = filedialog.askopenfilename(title="CSV de Telefones (Codigo4d;Telefone)", filetypes=[("CSV", "*.csv")])
-        if not f:
-            return
-        self.telefones_path.set(f)
-        self.telefones_map = self._carrega_telefones(Path(f))
-        self.log(f"[Telefones] Importados: {len(self.telefones_map)}")
-
-    # ---------- Telefones persistentes ----------
-    def _carrega_telefones(self, caminho: Path) -> dict[str, str]:
-        mapa: dict[str, str] = {}
-        if not caminho.exists():
-            return mapa
-        try:
-            df = pd.read_csv(caminho, sep=";", encoding="utf-8")
-        except Exception:
-            df = pd.read_csv(caminho, sep=";", encoding="latin-1")
+# ===================== SESSÃO ÚNICA (sem relançar whatsapp://send) =====================
+SESSAO_BUSCA_S = 1.0              # espera p/ a busca da "nova conversa" achar o número
+SESSAO_FALHAS_MAX = 3             # falhas seguidas até desistir da sessão (volta à URL por contato)
 
-        if "Codigo4d" not in df.columns or "Telefone" not in df.columns:
-            return mapa
+class SessaoWhatsApp:
+    """
+    Uma janela do WhatsApp Desktop aberta uma vez por campanha; cada contato é aberto pela
+    busca de "nova conversa" (Ctrl+N → número → Enter) em vez de relançar whatsapp://send.
+    Qualquer falha derruba a sessão: a próxima conversa reabre a janela.
+    A janela não informa qual conversa abriu; a busca só é segura p/ números que já têm
+    conversa na conta (`conhecidos`). Sem resultado, o Enter cairia na conversa anterior.
+    """
 
-        df["Codigo4d"] = df["Codigo4d"].astype(str).map(_norm_code)
-        df["Telefone"] = df["Telefone"].astype(str).str.strip()
-        df = df[(df["Codigo4d"] != "") & (df["Telefone"] != "")]
-        for _, r in df.iterrows():
-            mapa[r["Codigo4d"]] = r["Telefone"]
-        return mapa
+    def __init__(self, ambiente: Optional[AmbienteDesktop] = None, delay: int = DEFAULT_DELAY,
+                 focar_janela: bool = True, conhecidos: Optional[set[str]] = None):
+        self.amb = ambiente or AMBIENTE_REAL
+        self.delay = delay
+        self.focar_janela = focar_janela
+        self.conhecidos = conhecidos if conhecidos is not None else set()   # fones normalizados
+        self.aberta = False
+        self.falhas = 0
+
+    @property
+    def desativada(self) -> bool:
+        return self.falhas >= SESSAO_FALHAS_MAX
+
+    def abre(self, crono: Optional[Cronometro] = None):
+        with _etapa(crono, "abrir"):
+            self.amb.abrir_app("whatsapp://")
+        with _etapa(crono, "espera_abertura"):
+            self.amb.dormir(max(2, self.delay))
+        self.aberta = True
+
+    def abre_conversa(self, fone: str, crono: Optional[Cronometro] = None):
+        """Leva a janela (já aberta) à conversa de `fone`; o cursor fica na caixa de mensagem."""
+        if not self.aberta:
+            self.abre(crono)
+        if self.focar_janela:
+            with _etapa(crono, "foco"):
+                try:
+                    self.amb.focar_whatsapp()
+                except Exception:
+                    pass
+        with _etapa(crono, "busca"):
+            self.amb.atalho('ctrl', 'n')
+            self.amb.dormir(0.3)
+            self.amb.digitar(fone, 0)
+            self.amb.dormir(SESSAO_BUSCA_S)
+            self.amb.tecla('enter')
+            self.amb.dormir(0.3)
+
+# ===================== CAMPANHA (remetentes / shards) =====================
+LOG_HEADERS = ["timestamp", "origem", "vendedor_arquivo", "codigo4d", "cliente",
+               "saldo", "telefone", "status", "canal", "url", "remetente"]
+
+# Só existe uma tela/teclado/clipboard: remetentes desktop na mesma máquina revezam a automação
+_TELA_LOCK = threading.Lock()
+
+def monta_mensagem(msg_tpl: str, codigo: str, cliente: str, saldo: float,
+                   detalhes: Optional[dict] = None) -> str:
+    """
+    Aplica o template (blindado contra placeholders antigos/quebrados).
+    detalhes: {titulos}, {dias_atraso}, {vencido_brl}, {aging} do cliente (vazios sem títulos).
+    """
+    valor_brl = formata_brl(saldo)
+    tpl = msg_tpl.replace("{saldo:,.2f}", "{saldo_brl}").replace("{saldo: .2f}", "{saldo_brl}")
+    try:
+        return tpl.format(codigo4d=codigo, cliente=cliente, saldo_brl=valor_brl, saldo=valor_brl,
+                          **{**DETALHES_VAZIOS, **(detalhes or {})})
+    except Exception:
+        return f"Prezado(a),\n\nCliente: {codigo} - {cliente}\nSaldo pendente: R$ {valor_brl}\nPor gentileza, regularizar o quanto antes.\n"
 
-    def _salva_telefone_csv(self, codigo: str, telefone: str):
+def divide_campanha(df: pd.DataFrame, n: int, por: str = "vendedor") -> List[pd.DataFrame]:
+    """
+    Divide a lista de trabalho em n shards.
+    - "vendedor": cada VendedorArquivo inteiro num shard (maiores primeiro, no shard mais leve)
+    - "rodizio": linha i vai para o shard i % n
+    """
+    n = max(1, n)
+    if n == 1:
+        return [df]
+    if por == "vendedor" and "VendedorArquivo" in df.columns:
+        tamanhos = df.groupby("VendedorArquivo", sort=False).size().sort_values(ascending=False, kind="mergesort")
+        carga = [0] * n
+        destino: dict[str, int] = {}
+        for vend, qtd in tamanhos.items():
+            i = carga.index(min(carga))
+            destino[vend] = i
+            carga[i] += int(qtd)
+        shard = df["VendedorArquivo"].map(destino)
+    else:
+        shard = pd.Series(range(len(df)), index=df.index) % n
+    return [df[shard == i] for i in range(n)]
+
+class LimitadorEnvio:
+    """
+    Ritmo de uma conta: token bucket (taxa sustentada + rajada), cotas por hora/dia,
+    janela de horário e jitter aleatório. aguarda() bloqueia só os workers que o usam.
+    parar: Event que interrompe a espera (fora da janela ela pode durar a noite toda).
+    relogio/agora/dormir são injetáveis para testes.
+    """
+
+    def __init__(self, msg_min: float = RITMO_MSG_MIN, rajada: int = RITMO_RAJADA,
+                 cota_hora: Optional[int] = COTA_HORA, cota_dia: Optional[int] = COTA_DIA,
+                 janela: Optional[tuple[int, int]] = JANELA_HORARIO, jitter: float = JITTER_S,
+                 usados_hoje: int = 0,
+                 relogio: Callable[[], float] = time.monotonic,
+                 agora: Callable[[], datetime] = datetime.now,
+                 dormir: Optional[Callable[[float], object]] = None,
+                 seed: Optional[int] = None,
+                 log: Optional[Callable[[str], None]] = None,
+                 parar: Optional[threading.Event] = None):
+        self.taxa = max(msg_min, 0.01) / 60.0      # tokens por segundo
+        self.rajada = max(1, rajada)
+        self.cota_hora = cota_hora
+        self.cota_dia = cota_dia
+        self.janela = janela
+        self.jitter = jitter
+        self.parar = parar
+        self.relogio, self.agora = relogio, agora
+        self.dormir = dormir or (parar.wait if parar is not None else time.sleep)
+        self.log = log
+        self._rng = random.Random(seed)
+        self._tokens = float(self.rajada)
+        self._ultimo = relogio()
+        self._hora: deque[float] = deque()        # instantes dos envios da última hora
+        self._dia = agora().date()
+        self._usados_dia = usados_hoje
+        self._lock = threading.Lock()
+
+    @property
+    def interrompido(self) -> bool:
+        return self.parar is not None and self.parar.is_set()
+
+    def espera_janela(self) -> float:
+        """Segundos até a janela de horário abrir (0 = dentro dela)."""
+        return self._fora_da_janela(self.agora())
+
+    def _fora_da_janela(self, now: datetime) -> float:
+        if not self.janela:
+            return 0.0
+        ini, fim = self.janela
+        if ini <= now.hour < fim:
+            return 0.0
+        prox = now.replace(hour=ini, minute=0, second=0, microsecond=0)
+        if now.hour >= fim:
+            prox += timedelta(days=1)
+        return (prox - now).total_seconds()
+
+    def _espera(self) -> tuple[float, str]:
+        """Segundos até poder enviar (0 = consumiu um token agora) e o motivo."""
+        t, now = self.relogio(), self.agora()
+        if now.date() != self._dia:
+            self._dia, self._usados_dia = now.date(), 0
+
+        espera = self._fora_da_janela(now)
+        if espera:
+            return espera, f"fora da janela {self.janela[0]}h–{self.janela[1]}h"
+        if self.cota_dia is not None and self._usados_dia >= self.cota_dia:
+            amanha = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            return max(1.0, (amanha - now).total_seconds()), f"cota diária ({self.cota_dia}) atingida"
+        while self._hora and t - self._hora[0] >= 3600:
+            self._hora.popleft()
+        if self.cota_hora is not None and len(self._hora) >= self.cota_hora:
+            return max(0.01, self._hora[0] + 3600 - t), f"cota por hora ({self.cota_hora}) atingida"
+
+        self._tokens = min(self.rajada, self._tokens + (t - self._ultimo) * self.taxa)
+        self._ultimo = t
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.taxa, ""
+
+        self._tokens -= 1
+        self._hora.append(t)
+        self._usados_dia += 1
+        return 0.0, ""
+
+    def aguarda(self) -> float:
         """
-        Atualiza/insere telefone no CSV em uso (self.telefones_path) ou no DEFAULT_TEL_CSV.
-        Chave SEMPRE = Codigo4d normalizado (4 dígitos).
+        Bloqueia até o próximo envio permitido (+ jitter). Retorna o total esperado (s).
+        Se `parar` for acionado, volta na hora sem consumir envio (ver `interrompido`).
         """
-        telefone = str(telefone).strip()
-        codigo_n = _norm_code(codigo)
-        if not telefone or not codigo_n:
-            return
+        total = 0.0
+        while not self.interrompido:
+            with self._lock:
+                espera, motivo = self._espera()
+            if not espera:
+                break
+            if motivo and self.log and espera >= 60:
+                self.log(f"[Ritmo] {motivo}: aguardando {espera / 60:.0f} min")
+            self.dormir(espera)
+            total += espera
+        if self.interrompido:
+            return total
+        extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+        if extra:
+            self.dormir(extra)
+        return total + extra
+
+    def eta(self, n: int) -> float:
+        """Estimativa (s) p/ mais n envios respeitando taxa, cotas e janela (ignora tempo de envio)."""
+        if n <= 0:
+            return 0.0
+        por_hora = 3600 * self.taxa
+        if self.cota_hora is not None:
+            por_hora = min(por_hora, self.cota_hora)
+        horas_janela = (self.janela[1] - self.janela[0]) if self.janela else 24
+        por_dia = por_hora * horas_janela
+        if self.cota_dia is not None:
+            por_dia = min(por_dia, self.cota_dia)
+
+        cap_dia = max(1, int(por_dia))
+        now = self.agora()
+        if self.janela:
+            fim_hoje = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=self.janela[1])
+            resta_janela = max(0.0, (fim_hoje - max(now, fim_hoje - timedelta(hours=horas_janela))).total_seconds())
+        else:
+            resta_janela = 86400.0
+        hoje = max(0, min(n, cap_dia - self._usados_dia, int(resta_janela / 3600 * por_hora)))
+        seg = self._fora_da_janela(now) if hoje else 0.0
+        seg += hoje / por_hora * 3600
+        resto = n - hoje
+        if resto > 0:
+            # noite até a próxima janela, dias cheios e o último dia parcial
+            dias = -(-resto // cap_dia)
+            ultimo = resto - (dias - 1) * cap_dia
+            seg += (24 - horas_janela) * 3600 + (dias - 1) * 86400 + ultimo / por_hora * 3600
+        return seg + n * self.jitter / 2
+
+def formata_duracao(seg: float) -> str:
+    seg = int(seg)
+    h, r = divmod(seg, 3600)
+    m, s = divmod(r, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+class Remetente(ABC):
+    """
+    Transporte de um worker da campanha. enviar() → (status, canal, url).
+    Vários remetentes só rendem mais com transportes independentes (ex.: RemetenteStub no
+    bench); os desktop da mesma máquina revezam a tela (_TELA_LOCK) e o app usa um só.
+    """
+    nome = "remetente"
+    limitador: Optional[LimitadorEnvio] = None
+
+    @abstractmethod
+    def enviar(self, telefone: str, mensagem: str, codigo: str, cliente: str) -> tuple[str, str, str]:
+        ...
+
+class RemetenteDesktop(Remetente):
+    """WhatsApp Desktop + confirmação do operador (fluxo original do cobrar)."""
+
+    def __init__(self, nome: str, delay: int, auto_paste: bool, auto_enter: bool,
+                 auto_type_fallback: bool, focar_janela: bool,
+                 confirmar: Callable[[str, str], object],
+                 ambiente: Optional[AmbienteDesktop] = None,
+                 crono: Optional[Cronometro] = None):
+        self.nome = nome
+        self.ambiente = ambiente
+        self.crono = crono
+        self.delay = delay
+        self.auto_paste = auto_paste
+        self.auto_enter = auto_enter
+        self.auto_type_fallback = auto_type_fallback
+        self.focar_janela = focar_janela
+        self.confirmar = confirmar
+
+    def _abre(self, telefone: str, mensagem: str) -> tuple[str, str]:
+        return abre_whatsapp_desktop(
+            telefone, mensagem, self.delay, self.auto_paste, self.auto_enter,
+            self.auto_type_fallback, self.focar_janela,
+            ambiente=self.ambiente, crono=self.crono
+        )
 
-        csv_path = Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV
+    def enviar(self, telefone, mensagem, codigo, cliente):
+        with _etapa(self.crono, "fila_tela"):
+            _TELA_LOCK.acquire()
+        try:
+            canal, url = self._abre(telefone, mensagem)
+            with _etapa(self.crono, "confirmacao"):
+                ok = self.confirmar(codigo, cliente)
+        finally:
+            _TELA_LOCK.release()
+        if ok == "NUMERO_INVALIDO":     # operador marcou: número sem WhatsApp/errado
+            return ok, canal, url
+        return ("ENVIADO" if ok else "ABERTO_NAO_ENVIADO"), canal, url
+
+class RemetenteSessao(RemetenteDesktop):
+    """
+    Como o RemetenteDesktop, mas reaproveita uma única janela do WhatsApp (SessaoWhatsApp):
+    o custo de abrir/aguardar é pago uma vez por campanha. A mensagem vai p/ o clipboard
+    antes da troca de conversa (o número é digitado, não colado). O primeiro contato com um
+    número sai sempre pela URL whatsapp://send (que abre a conversa certa); a busca fica p/
+    os números conhecidos. Se a sessão falhar, o contato também sai pela URL; após
+    SESSAO_FALHAS_MAX falhas seguidas o remetente fica só na URL. Como não há como conferir
+    a conversa aberta, o Enter automático fica desligado: o operador confirma cada envio.
+    """
 
-        if csv_path.exists():
+    def __init__(self, *args, conhecidos: Optional[set[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.auto_enter = False
+        self.sessao = SessaoWhatsApp(self.ambiente, self.delay, self.focar_janela, conhecidos)
+
+    def _abre(self, telefone, mensagem):
+        s = self.sessao
+        # sem colar nem digitar a sessão não tem como pôr o texto na caixa: só a URL serve
+        if s.desativada or not (self.auto_paste or self.auto_type_fallback):
+            return super()._abre(telefone, mensagem)
+
+        fone = normaliza_telefone(telefone) or f"{PAIS_DDI}{_only_digits(telefone)}"
+        if fone not in s.conhecidos:
+            canal, url = super()._abre(telefone, mensagem)
+            if canal == "DESKTOP":
+                s.conhecidos.add(fone)
+                s.aberta = True
+            return canal, url
+        with _etapa(self.crono, "clipboard"):
             try:
-                df_tel = pd.read_csv(csv_path, sep=";", encoding="utf-8")
+                s.amb.copiar(mensagem)
             except Exception:
-                df_tel = pd.read_csv(csv_path, sep=";", encoding="latin-1")
-        else:
-            df_tel = pd.DataFrame(columns=["Codigo4d", "Telefone"])
+                pass
+        try:
+            s.abre_conversa(fone, self.crono)
+            metodo = injeta_texto(s.amb, mensagem, colar=self.auto_paste,
+                                  digitar=self.auto_type_fallback, crono=self.crono)
+        except Exception:
+            metodo = ""
+        if not metodo:
+            s.falhas += 1
+            s.aberta = False
+            canal, url = super()._abre(telefone, mensagem)
+            s.aberta = canal == "DESKTOP"   # a URL deixou a janela aberta: a próxima segue na sessão
+            return canal, url
+
+        s.falhas = 0
+        return "SESSAO", f"whatsapp://send?phone={fone}"
+
+class RemetenteStub(Remetente):
+    """Remetente falso p/ testes em Linux: só espera `latencia` e registra o que enviaria."""
+
+    def __init__(self, nome: str, latencia: float = 0.0, taxa_falha: float = 0.0, seed: Optional[int] = None):
+        self.nome = nome
+        self.latencia = latencia
+        self.taxa_falha = taxa_falha
+        self.enviados: List[tuple[str, str]] = []
+        self._rng = random.Random(seed)
+
+    def enviar(self, telefone, mensagem, codigo, cliente):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.enviados.append((telefone, mensagem))
+        ok = self._rng.random() >= self.taxa_falha
+        return ("ENVIADO" if ok else "ABERTO_NAO_ENVIADO"), "STUB", f"stub://{self.nome}/{telefone}"
+
+class RegistroCampanha:
+    """
+    Estado compartilhado entre os workers: um único log_cobrancas_*.csv, contadores
+    e o conjunto de códigos já reivindicados (um cliente é cobrado uma vez só).
+    """
 
-        if "Codigo4d" in df_tel.columns:
-            df_tel["Codigo4d"] = df_tel["Codigo4d"].astype(str).map(_norm_code)
-        else:
-            df_tel = pd.DataFrame(columns=["Codigo4d", "Telefone"])
-
-        df_tel = df_tel[df_tel["Codigo4d"] != codigo_n]
-        df_tel = pd.concat([df_tel, pd.DataFrame([{"Codigo4d": codigo_n, "Telefone": telefone}])], ignore_index=True)
-
-        df_tel.to_csv(csv_path, sep=";", index=False, encoding="utf-8-sig")
-        self.telefones_map[codigo_n] = telefone
-        self.telefones_path.set(str(csv_path))
-        self.log(f"[Telefone salvo] {codigo_n} → {telefone} ({csv_path.name})")
-
-    # ---------- Conversão ----------
-    def converter(self) -> tuple[Optional[pd.DataFrame], Optional[Path]]:
-        modo = self.modo.get()
-        vend = self.vendedor_hint.get().strip()
-        if modo == "arquivo":
-            p = Path(self.caminho_arquivo.get().strip().strip('"'))
-            if not p.exists():
-                messagebox.showerror("Erro", "Selecione um arquivo válido.")
-                return None, None
-            self.log(f"[LENDO] {p.name}")
-            df = processa_arquivo(p, vendedor_hint=vend or p.stem)
-            origem = p
-        else:
-            d = Path(self.caminho_pasta.get().strip().strip('"'))
-            if not d.exists() or not d.is_dir():
-                messagebox.showerror("Erro", "Selecione uma pasta válida.")
-                return None, None
-            frames = []
-            for arq in d.iterdir():
-                if arq.suffix.lower() in (".pdf", ".csv", ".txt"):
-                    self.log(f"[PROCESSANDO] {arq.name}")
-                    try:
-                        frames.append(processa_arquivo(arq, vendedor_hint=vend or arq.stem))
-                    except Exception as e:
-                        self.log(f"   ⚠ {arq.name}: {e}")
-            if not frames:
-                messagebox.showwarning("Aviso", "Nenhum arquivo válido encontrado na pasta.")
-                return None, None
-            df = pd.concat(frames, ignore_index=True)
-            origem = d
-
-        # salvar consolidado
-        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out = SAIDAS / f"consolidado_cobranca_{stamp}.csv"
-        df.to_csv(out, index=False, sep=";", encoding="utf-8-sig")
-        self.log(f"✅ Consolidado salvo: {out.resolve()}")
+    def __init__(self, log_path: Path, origem: str, total: int, log: Callable[[str], None] = print,
+                 crono: Optional[Cronometro] = None):
+        self.log_path = log_path
+        self.crono = crono
+        self.origem = origem
+        self.total = total
+        self.log = log
+        self.contagem = {"ENVIADO": 0, "ABERTO_NAO_ENVIADO": 0, "PULADO": 0, "DUPLICADO": 0, "ERRO": 0,
+                         "NUMERO_INVALIDO": 0, "NUMERO_MORTO": 0, "NAO_CONTATAR": 0}
+        self._feitos: set[str] = set()
+        self._lock = threading.Lock()
+        self._inicio = time.monotonic()
+        self._f = None
+        self._w = None
+
+    def __enter__(self):
+        self._f = open(self.log_path, "w", newline="", encoding="utf-8-sig")
+        self._w = csv.writer(self._f, delimiter=";")
+        self._w.writerow(LOG_HEADERS)
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+    @property
+    def processados(self) -> int:
+        return sum(self.contagem.values())
+
+    def eta(self) -> float:
+        """Estimativa (s) para o restante, pelo ritmo observado até agora."""
+        feitos = self.processados
+        if not feitos:
+            return 0.0
+        return (time.monotonic() - self._inicio) / feitos * max(0, self.total - feitos)
+
+    def reivindica(self, codigo: str) -> bool:
+        with self._lock:
+            if codigo in self._feitos:
+                return False
+            self._feitos.add(codigo)
+            return True
+
+    def registra(self, vend: str, codigo: str, cliente: str, saldo: float, telefone: str,
+                 status: str, canal: str = "", url: str = "", remetente: str = ""):
+        with self._lock:
+            self._w.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.origem, vend, codigo, cliente,
+                              f"{saldo:.2f}".replace(".", ","), telefone, status, canal, url, remetente])
+            self._f.flush()
+            self.contagem[status] = self.contagem.get(status, 0) + 1
+
+def le_logs_cobranca(pasta: Path = SAIDAS, padrao: str = "log_cobrancas_*.csv") -> pd.DataFrame:
+    """Concatena os logs de campanha (como texto); logs antigos sem 'remetente' ganham a coluna vazia."""
+    frames = []
+    for arq in sorted(pasta.glob(padrao)):
+        try:
+            df = pd.read_csv(arq, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+        except Exception:
+            continue
+        if "status" in df.columns and "codigo4d" in df.columns:
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=LOG_HEADERS)
+    return pd.concat(frames, ignore_index=True).reindex(columns=LOG_HEADERS, fill_value="")
+
+STATUS_ABERTOS = ["ENVIADO", "ABERTO_NAO_ENVIADO", "NUMERO_INVALIDO"]   # conversas efetivamente abertas
+
+def usados_hoje_por_remetente(pasta: Path = SAIDAS) -> dict[str, int]:
+    """Conversas já abertas hoje por remetente (logs de hoje), p/ a cota diária valer entre execuções."""
+    logs = le_logs_cobranca(pasta, f"log_cobrancas_{datetime.now():%Y%m%d}_*.csv")
+    abertos = logs.loc[logs["status"].isin(STATUS_ABERTOS), "remetente"].replace("", "desktop1")
+    return {k: int(v) for k, v in abertos.value_counts().items()}
+
+def telefones_com_conversa(logs: pd.DataFrame) -> set[str]:
+    """Fones (normalizados) que já tiveram conversa aberta: a busca da sessão única os encontra."""
+    fones, motivo = normaliza_telefones(logs.loc[logs["status"].isin(STATUS_ABERTOS), "telefone"])
+    return set(fones[motivo == ""])
+
+# ===================== NÚMEROS MORTOS (sem WhatsApp / nunca respondem) =====================
+MORTOS_CSV = SAIDAS / "numeros_mortos.csv"
+MORTO_FALHAS = 3                  # aberturas seguidas sem envio até o número ser dado como morto
+MORTO_VALIDADE_DIAS = 30          # depois disso o número volta a ser tentado
+MORTOS_MODOS = ("pular", "adiar", "tentar")
+MORTOS_CAMPOS = ["telefone", "falhas", "motivo", "ultima_falha", "expira"]
+_FMT_TS = "%Y-%m-%d %H:%M:%S"
+
+class CacheNumerosMortos:
+    """
+    Telefones que não recebem mensagem: MORTO_FALHAS aberturas seguidas sem envio
+    (ABERTO_NAO_ENVIADO) ou marcados como inválidos pelo operador (NUMERO_INVALIDO).
+    morto() é uma consulta em dict; a marca expira em MORTO_VALIDADE_DIAS (o número volta
+    a ser tentado) e um ENVIADO apaga o histórico. Persistido em saidas/numeros_mortos.csv.
+    """
 
-        # guarda para cobrança e normaliza código
-        if "Codigo4d" in df.columns:
-            df["Codigo4d"] = df["Codigo4d"].astype(str).map(_norm_code)
+    def __init__(self, caminho: Path = MORTOS_CSV, limite: int = MORTO_FALHAS,
+                 validade_dias: int = MORTO_VALIDADE_DIAS, agora: Callable[[], datetime] = datetime.now):
+        self.caminho = caminho
+        self.limite = limite
+        self.validade = timedelta(days=validade_dias)
+        self._agora = agora
+        self._reg: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.alterado = False
+
+    @staticmethod
+    def _chave(telefone: str) -> str:
+        return normaliza_telefone(telefone) or _only_digits(telefone)
+
+    def carrega(self) -> "CacheNumerosMortos":
+        if self.caminho.exists():
+            with open(self.caminho, newline="", encoding="utf-8-sig") as f:
+                for r in csv.DictReader(f, delimiter=";"):
+                    self._reg[r["telefone"]] = {"falhas": int(r["falhas"] or 0), "motivo": r["motivo"],
+                                                "ultima_falha": r["ultima_falha"], "expira": r["expira"]}
+        return self
+
+    def alimenta(self, logs: pd.DataFrame):
+        """Reconstrói o cache a partir dos logs de campanha (1ª execução, sem CSV ainda)."""
+        logs = logs[logs["telefone"].str.strip() != ""].sort_values("timestamp", kind="mergesort")
+        for ts, tel, st in zip(logs["timestamp"], logs["telefone"], logs["status"]):
+            self.registra(tel, st, ts)
+
+    def morto(self, telefone: str) -> bool:
+        r = self._reg.get(self._chave(telefone))
+        return bool(r and r["expira"] and r["expira"] > self._agora().strftime(_FMT_TS))
+
+    def mortos(self) -> int:
+        agora = self._agora().strftime(_FMT_TS)
+        return sum(1 for r in self._reg.values() if r["expira"] > agora)
+
+    def registra(self, telefone: str, status: str, quando: Optional[str] = None):
+        """Alimenta com o resultado de uma tentativa (status do log)."""
+        k = self._chave(telefone)
+        if not k or status not in ("ENVIADO", "ABERTO_NAO_ENVIADO", "NUMERO_INVALIDO"):
+            return
+        with self._lock:
+            self.alterado = True
+            if status == "ENVIADO":
+                self._reg.pop(k, None)
+                return
+            quando = quando or self._agora().strftime(_FMT_TS)
+            r = self._reg.setdefault(k, {"falhas": 0, "motivo": "", "ultima_falha": "", "expira": ""})
+            r["falhas"] += 1
+            r["ultima_falha"] = quando
+            if status == "NUMERO_INVALIDO" or r["falhas"] >= self.limite:
+                r["motivo"] = "invalido (operador)" if status == "NUMERO_INVALIDO" else f"{r['falhas']} sem envio"
+                r["expira"] = (datetime.strptime(quando, _FMT_TS) + self.validade).strftime(_FMT_TS)
+
+    def salva(self):
+        if not self.alterado:
+            return
+        with self._lock:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.caminho.with_suffix(".tmp")
+            with open(tmp, "w", newline="", encoding="utf-8-sig") as f:
+                w = csv.writer(f, delimiter=";")
+                w.writerow(MORTOS_CAMPOS)
+                w.writerows([tel, r["falhas"], r["motivo"], r["ultima_falha"], r["expira"]]
+                            for tel, r in self._reg.items())
+            os.replace(tmp, self.caminho)
+            self.alterado = False
+
+def executa_campanha(df: pd.DataFrame, remetentes: List[Remetente], registro: RegistroCampanha,
+                     telefones: dict[str, str], msg_tpl: str, por: str = "vendedor",
+                     perfil: Optional[PerfilExecucao] = None,
+                     mortos: Optional[CacheNumerosMortos] = None, mortos_modo: str = "pular",
+                     detalhes: Optional[dict[str, dict]] = None,
+                     nao_contatar: Optional[ListaNaoContatar] = None,
+                     parar: Optional[threading.Event] = None):
+    """
+    Divide df entre os remetentes e roda um worker (thread) por remetente até o fim
+    (ou até `parar` ser acionado: cada worker termina o contato atual e sai).
+    mortos: números conhecidos como mortos são pulados (NUMERO_MORTO), adiados p/ o fim do
+    shard ("adiar") ou tentados normalmente ("tentar"); todo resultado alimenta o cache.
+    detalhes: Codigo4d → placeholders de aging p/ o template (ver detalhes_aging).
+    nao_contatar: checado por contato (O(1)); bloqueados viram NAO_CONTATAR sem abrir o WhatsApp.
+    """
+    shards = divide_campanha(df, len(remetentes), por)
+
+    def trabalha(rem: Remetente, shard: pd.DataFrame):
+        with _perfil(perfil, "cobranca"):
+            _trabalha(rem, shard)
+
+    def _trabalha(rem: Remetente, shard: pd.DataFrame):
+        adiados = []
+        for r in shard.itertuples(index=False):
+            if parar is not None and parar.is_set():
+                return
+            codigo = _norm_code(r.Codigo4d)
+            cliente = str(r.Cliente)
+            saldo = float(r.Saldo)
+            vend = str(getattr(r, "VendedorArquivo", ""))
+
+            if not registro.reivindica(codigo):
+                registro.registra(vend, codigo, cliente, saldo, "", "DUPLICADO", remetente=rem.nome)
+                registro.log(f"[DUPLICADO] {codigo} - {cliente} ({vend})")
+                continue
 
-        return df, origem
+            telefone = telefones.get(codigo, "").strip()
+            if not telefone:
+                registro.registra(vend, codigo, cliente, saldo, "", "PULADO", remetente=rem.nome)
+                registro.log(f"[PULADO] {codigo} - {cliente}")
+                continue
+
+            if nao_contatar is not None and nao_contatar.bloqueado(codigo, normaliza_telefone(telefone)):
+                registro.registra(vend, codigo, cliente, saldo, telefone, "NAO_CONTATAR", remetente=rem.nome)
+                registro.log(f"[NAO_CONTATAR] {codigo} - {cliente}")
+                continue
 
-    def run_converter(self):
+            if mortos is not None and mortos_modo != "tentar" and mortos.morto(telefone):
+                if mortos_modo == "adiar":
+                    adiados.append((codigo, cliente, saldo, vend, telefone))
+                else:
+                    registro.registra(vend, codigo, cliente, saldo, telefone, "NUMERO_MORTO", remetente=rem.nome)
+                    registro.log(f"[NUMERO_MORTO] {codigo} - {cliente} ({telefone})")
+                continue
+            _envia(rem, codigo, cliente, saldo, vend, telefone)
+
+        if adiados:
+            registro.log(f"[{rem.nome}] {len(adiados)} números sem resposta anterior: tentando por último.")
+        for item in adiados:
+            if parar is not None and parar.is_set():
+                return
+            _envia(rem, *item)
+
+    def _envia(rem: Remetente, codigo: str, cliente: str, saldo: float, vend: str, telefone: str):
+        with _etapa(registro.crono, "mensagem"):
+            msg = monta_mensagem(msg_tpl, codigo, cliente, saldo, detalhes.get(codigo) if detalhes else None)
+        if rem.limitador is not None:
+            with _etapa(registro.crono, "ritmo"):
+                rem.limitador.aguarda()
+            if rem.limitador.interrompido:
+                return
         try:
-            self.msg_base.set(self.txt_msg.get("1.0", "end").strip())
-            df, origem = self.converter()
-            if df is not None:
-                self.df_consolidado = df
-                self.origem_label = str(origem)
+            with _etapa(registro.crono, "envio"):
+                status, canal, url = rem.enviar(telefone, msg, codigo, cliente)
         except Exception as e:
-            messagebox.showerror("Erro", str(e))
-
-    # ---------- Cobrança ----------
-    def cobrar(self, df: pd.DataFrame, origem: Path):
-        df2 = df.copy()
-        if "Codigo4d" in df2.columns:
-            df2["Codigo4d"] = df2["Codigo4d"].astype(str).map(_norm_code)
-
-        if not pd.api.types.is_numeric_dtype(df2["Saldo"]):
-            df2["Saldo"] = pd.to_numeric(df2["Saldo"], errors="coerce").fillna(0.0)
-        df2 = df2[df2["Saldo"] > 0].reset_index(drop=True)
-        if df2.empty:
-            self.log("Nenhum cliente com saldo > 0 para cobrar.")
+            status, canal, url = "ERRO", "", ""
+            registro.log(f"   ⚠ [{rem.nome}] {codigo} - {cliente}: {e}")
+        if mortos is not None:
+            mortos.registra(telefone, status)
+        registro.registra(vend, codigo, cliente, saldo, telefone, status, canal, url, rem.nome)
+        registro.log(f"[{rem.nome}] ({registro.processados}/{registro.total}) {status} {codigo} - {cliente} "
+                     f"via {canal or '-'} • ETA {formata_duracao(registro.eta())}")
+
+    # ETA planejada: o limitador mais lento (ritmo/cotas/janela) define o fim da campanha;
+    # remetentes que compartilham um limitador somam seus contatos na mesma fila
+    pendentes: dict[int, list] = {}
+    for rem, sh in zip(remetentes, shards):
+        if rem.limitador is not None and not sh.empty:
+            item = pendentes.setdefault(id(rem.limitador), [rem.limitador, 0])
+            item[1] += int(sh["Codigo4d"].map(_norm_code).isin(telefones.keys()).sum())
+    planos = [lim.eta(qtd) for lim, qtd in pendentes.values()]
+    if planos:
+        registro.log(f"[Ritmo] ETA pelo ritmo/cotas: {formata_duracao(max(planos))}")
+
+    threads = [threading.Thread(target=trabalha, args=(rem, sh), name=f"remetente-{rem.nome}", daemon=True)
+               for rem, sh in zip(remetentes, shards) if not sh.empty]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+# ===================== KPIs (agregados diários por vendedor) =====================
+KPIS_CSV = SAIDAS / "kpis_cobranca.csv"       # data;vendedor_arquivo;tentativas;enviados;…;saldo_coberto
+KPIS_ESTADO = SAIDAS / "kpis_cargas.json"     # log → bytes já agregados (carga incremental)
+KPIS_STATUS = {"ENVIADO": "enviados", "ABERTO_NAO_ENVIADO": "abertos_nao_enviados", "PULADO": "pulados",
+               "NUMERO_INVALIDO": "invalidos", "NUMERO_MORTO": "mortos", "NAO_CONTATAR": "nao_contatar",
+               "DUPLICADO": "duplicados", "ERRO": "erros"}
+KPIS_CHAVE = ["data", "vendedor_arquivo"]
+KPIS_COLUNAS = KPIS_CHAVE + ["tentativas", *KPIS_STATUS.values(), "saldo_coberto"]
+
+def agrega_kpis(logs: pd.DataFrame) -> pd.DataFrame:
+    """Linhas de log → KPIs por (data, vendedor_arquivo), num groupby só; saldo_coberto = saldo dos ENVIADO."""
+    st = logs["status"]
+    valor = pd.to_numeric(logs["saldo"].str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+                          errors="coerce").fillna(0.0)
+    base = pd.DataFrame({"data": logs["timestamp"].str[:10], "vendedor_arquivo": logs["vendedor_arquivo"],
+                         "tentativas": 1})
+    for status, col in KPIS_STATUS.items():
+        base[col] = (st == status).astype("int64")
+    base["saldo_coberto"] = valor.where(st == "ENVIADO", 0.0)
+    return base.groupby(KPIS_CHAVE, as_index=False, sort=False).sum()[KPIS_COLUNAS]
+
+def _linhas_novas_log(caminho: Path, offset: int) -> tuple[Optional[pd.DataFrame], int]:
+    """Só o trecho do log depois de `offset` (bytes), até a última linha completa."""
+    with open(caminho, "rb") as f:
+        cab = f.readline()
+        inicio = max(offset, f.tell())
+        f.seek(inicio)
+        resto = f.read()
+    resto = resto[:resto.rfind(b"\n") + 1]     # campanha ainda gravando: ignora a linha pela metade
+    if not resto:
+        return None, inicio
+    nomes = cab.decode("utf-8-sig").strip().split(";")
+    if "status" not in nomes or "timestamp" not in nomes:
+        return None, inicio + len(resto)
+    df = pd.read_csv(io.BytesIO(resto), sep=";", header=None, names=nomes, dtype=str,
+                     keep_default_na=False, encoding="utf-8")
+    return df.reindex(columns=LOG_HEADERS, fill_value=""), inicio + len(resto)
+
+def le_kpis(caminho: Path = KPIS_CSV) -> pd.DataFrame:
+    if not caminho.exists():
+        return pd.DataFrame(columns=KPIS_COLUNAS)
+    return pd.read_csv(caminho, sep=";", dtype={"data": str, "vendedor_arquivo": str},
+                       keep_default_na=False, encoding="utf-8-sig")
+
+def atualiza_kpis(pasta: Path = SAIDAS, padrao: str = "log_cobrancas_*.csv",
+                  caminho: Path = KPIS_CSV, estado: Path = KPIS_ESTADO) -> dict:
+    """
+    Mantém a tabela de KPIs materializada: de cada log só entram as linhas ainda não
+    agregadas (offset em bytes no estado), somadas à tabela existente. Log que encolheu
+    (regravado) força a reconstrução a partir de todos os logs.
+    Retorna {"arquivos", "linhas", "kpis"}.
+    """
+    offsets: dict[str, int] = json.loads(estado.read_text(encoding="utf-8")) if estado.exists() else {}
+    logs = sorted(pasta.glob(padrao))
+    if any(arq.stat().st_size < offsets.get(arq.name, 0) for arq in logs):
+        offsets = {}
+    kpis = le_kpis(caminho) if offsets else pd.DataFrame(columns=KPIS_COLUNAS)
+
+    novos, arquivos = [], 0
+    for arq in logs:
+        if arq.stat().st_size == offsets.get(arq.name):
+            continue
+        try:
+            df, offsets[arq.name] = _linhas_novas_log(arq, offsets.get(arq.name, 0))
+        except Exception:
+            continue
+        if df is not None and len(df):
+            novos.append(df)
+            arquivos += 1
+
+    linhas = sum(len(df) for df in novos)
+    if novos:
+        agg = agrega_kpis(pd.concat(novos, ignore_index=True))
+        kpis = agg if kpis.empty else pd.concat([kpis, agg], ignore_index=True)
+        kpis = kpis.groupby(KPIS_CHAVE, as_index=False).sum()[KPIS_COLUNAS]
+        kpis["saldo_coberto"] = kpis["saldo_coberto"].round(2)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_suffix(".tmp")
+        kpis.to_csv(tmp, sep=";", index=False, encoding="utf-8-sig")
+        os.replace(tmp, caminho)
+    if novos or not estado.exists():
+        estado.parent.mkdir(parents=True, exist_ok=True)
+        estado.write_text(json.dumps(offsets, ensure_ascii=False, indent=0), encoding="utf-8")
+    return {"arquivos": arquivos, "linhas": linhas, "kpis": kpis}
+
+# ===================== PLANEJAMENTO (prioridade por valor) =====================
+PLANO_DIAS_MEDICAO = 10           # dias com envio usados p/ medir a capacidade diária
+PLANO_DIAS_TETO = 60              # teto de "dias sem contato" no peso da prioridade
+
+def capacidade_diaria_medida(logs: pd.DataFrame, padrao: int) -> int:
+    """
+    Mediana de conversas abertas/dia nos últimos PLANO_DIAS_MEDICAO dias com envio.
+    Com menos de 3 dias de histórico ainda não há medida confiável: usa `padrao`.
+    """
+    abertos = logs[logs["status"].isin(STATUS_ABERTOS)]
+    por_dia = abertos["timestamp"].str[:10].value_counts().sort_index().tail(PLANO_DIAS_MEDICAO)
+    if len(por_dia) < 3:
+        return padrao
+    return max(1, int(por_dia.median()))
+
+def ultimo_contato_por_cliente(logs: pd.DataFrame) -> pd.Series:
+    """Codigo4d → data/hora da última conversa aberta."""
+    abertos = logs[logs["status"].isin(STATUS_ABERTOS)]
+    ts = pd.to_datetime(abertos["timestamp"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    return ts.groupby(_norm_code_serie(abertos["codigo4d"])).max()
+
+def planeja_campanha(df: pd.DataFrame, capacidade: int, peso_dias: float = 0.0,
+                     ultimo_contato: Optional[pd.Series] = None,
+                     agora: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Ordena a lista de trabalho por valor e corta na capacidade do dia.
+    Prioridade = Saldo × (1 + peso_dias × dias_sem_contato / 30), dias limitados a PLANO_DIAS_TETO;
+    quem nunca foi contatado conta como PLANO_DIAS_TETO. Seleção via nlargest (heap parcial, O(n log k)).
+    """
+    plano = df.copy()
+    plano["Codigo4d"] = _norm_code_serie(plano["Codigo4d"])
+    plano["Saldo"] = pd.to_numeric(plano["Saldo"], errors="coerce").fillna(0.0)
+    plano = plano[plano["Saldo"] > 0]
+
+    dias = pd.Series(float(PLANO_DIAS_TETO), index=plano.index)
+    if ultimo_contato is not None and not ultimo_contato.empty:
+        ult = plano["Codigo4d"].map(ultimo_contato)
+        dias = ((agora or datetime.now()) - ult).dt.days.clip(lower=0, upper=PLANO_DIAS_TETO).fillna(PLANO_DIAS_TETO)
+    plano["DiasSemContato"] = dias.astype(int)
+    plano["Prioridade"] = plano["Saldo"] * (1 + peso_dias * plano["DiasSemContato"] / 30)
+
+    plano = plano.nlargest(max(0, capacidade), "Prioridade", keep="first")
+    plano.insert(0, "Ordem", range(1, len(plano) + 1))
+    return plano.reset_index(drop=True)
+
+# ===================== PRÉ-VISUALIZAÇÃO (filtros vetorizados) =====================
+def filtra_consolidado(df: pd.DataFrame,
+                       telefones: dict[str, str],
+                       saldo_min: Optional[float] = None,
+                       saldo_max: Optional[float] = None,
+                       vendedor: str = "",
+                       telefone: str = "todos",
+                       ordenar_por: Optional[str] = None,
+                       crescente: bool = True) -> pd.Index:
+    """
+    Devolve o índice (na ordem pedida) das linhas de df que passam nos filtros.
+    Tudo em máscaras/ordenação do pandas: não percorre linha a linha.
+    telefone: "todos" | "com" | "sem" (presença do Codigo4d no mapa de telefones).
+    """
+    saldo = pd.to_numeric(df["Saldo"], errors="coerce").fillna(0.0)
+    mask = pd.Series(True, index=df.index)
+    if saldo_min is not None:
+        mask &= saldo >= saldo_min
+    if saldo_max is not None:
+        mask &= saldo <= saldo_max
+    if vendedor and "VendedorArquivo" in df.columns:
+        mask &= df["VendedorArquivo"].astype(str) == vendedor
+    if telefone in ("com", "sem"):
+        tem = df["Codigo4d"].astype(str).isin(telefones.keys())
+        mask &= tem if telefone == "com" else ~tem
+
+    sel = df.loc[mask]
+    if ordenar_por == "Saldo":
+        return saldo.loc[mask].sort_values(ascending=crescente, kind="mergesort").index
+    if ordenar_por and ordenar_por in sel.columns:
+        return sel[ordenar_por].astype(str).sort_values(ascending=crescente, kind="mergesort").index
+    return sel.index
+
+def clientes_sem_telefone(df: pd.DataFrame, telefones: dict[str, str]) -> pd.DataFrame:
+    """Clientes a cobrar (Saldo > 0) cujo Codigo4d não está no mapa — uma passada vetorizada."""
+    cod = _norm_code_serie(df["Codigo4d"])
+    saldo = pd.to_numeric(df["Saldo"], errors="coerce").fillna(0.0)
+    mask = (saldo > 0) & ~cod.isin(telefones.keys())
+    out = pd.DataFrame({"Codigo4d": cod[mask], "Cliente": df.loc[mask, "Cliente"].astype(str), "Saldo": saldo[mask]})
+    return out.drop_duplicates("Codigo4d").reset_index(drop=True)
+
+# ===================== BASE SQL (SQLite p/ BI) =====================
+BANCO_SQL = SAIDAS / "cobranca.db"
+SQL_SCHEMA = Path(__file__).resolve().parent / "sql" / "schema.sql"
+SQL_LOTE = 5000                   # linhas por executemany
+
+def abre_banco(caminho: Path = BANCO_SQL):
+    """Abre (ou cria) a base SQLite e aplica sql/schema.sql (idempotente)."""
+    import sqlite3
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(caminho)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.executescript(SQL_SCHEMA.read_text(encoding="utf-8"))
+    return con
+
+def _executa_em_lotes(con, sql: str, linhas, lote: int = SQL_LOTE) -> int:
+    """executemany em fatias de `lote` (não materializa o iterável inteiro); devolve o total."""
+    import itertools
+    it = iter(linhas)
+    total = 0
+    while True:
+        bloco = list(itertools.islice(it, lote))
+        if not bloco:
+            return total
+        con.executemany(sql, bloco)
+        total += len(bloco)
+
+def _sha256_arquivo(caminho: Path) -> str:
+    import hashlib
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def carrega_consolidado_sql(con, df: pd.DataFrame, data_ref: Optional[str] = None) -> int:
+    """Upsert do consolidado em `saldos` (chave data_ref + codigo4d), numa transação só."""
+    data_ref = data_ref or datetime.now().strftime("%Y-%m-%d")
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    d = df.reindex(columns=["Codigo4d", "Cliente", "Saldo", "VendedorArquivo", "ArquivoOrigem"])
+    codigos = _norm_code_serie(d["Codigo4d"])
+    saldos = pd.to_numeric(d["Saldo"], errors="coerce").fillna(0.0)
+    linhas = zip([data_ref] * len(d), codigos, d["Cliente"].astype(str), saldos.astype(float),
+                 d["VendedorArquivo"].fillna("").astype(str), d["ArquivoOrigem"].fillna("").astype(str),
+                 [agora] * len(d))
+    with con:
+        return _executa_em_lotes(con, """
+            INSERT INTO saldos (data_ref, codigo4d, cliente, saldo, vendedor_arquivo, arquivo_origem, carregado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (data_ref, codigo4d) DO UPDATE SET
+                cliente = excluded.cliente, saldo = excluded.saldo, vendedor_arquivo = excluded.vendedor_arquivo,
+                arquivo_origem = excluded.arquivo_origem, carregado_em = excluded.carregado_em""", linhas)
+
+def carrega_kpis_sql(con, kpis: pd.DataFrame) -> int:
+    """Espelha a tabela de KPIs (pequena) em `kpis_diarios`: substitui tudo numa transação."""
+    with con:
+        con.execute("DELETE FROM kpis_diarios")
+        return _executa_em_lotes(con, f"INSERT INTO kpis_diarios ({', '.join(KPIS_COLUNAS)}) "
+                                      f"VALUES ({', '.join('?' * len(KPIS_COLUNAS))})",
+                                 kpis[KPIS_COLUNAS].astype(object).itertuples(index=False, name=None))
+
+def _linhas_log(caminho: Path):
+    """Linhas de um log_cobrancas_*.csv já no formato da tabela `cobrancas` (streaming, sem pandas)."""
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        leitor = csv.reader(f, delimiter=";")
+        cab = next(leitor, None)
+        if not cab:
             return
-
-        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_path = SAIDAS / f"log_cobrancas_{stamp}.csv"
-        headers = ["timestamp", "origem", "vendedor_arquivo", "codigo4d", "cliente",
-                   "saldo", "telefone", "status", "canal", "url"]
-
-        enviados = aberto = pulados = 0
-        delay = max(2, int(self.delay.get()))
-        auto_paste = bool(self.auto_paste.get())
-        auto_enter = bool(self.auto_enter.get())
-        auto_type_fallback = bool(self.auto_type_fallback.get())
-        focar_janela = bool(self.focus_wa.get())
-        msg_tpl = self.msg_base.get()
-
-        with open(log_path, "w", newline="", encoding="utf-8-sig") as f:
-            w = csv.writer(f, delimiter=";")
-            w.writerow(headers)
-
-            self.log("=== ENVIO VIA WHATSAPP DESKTOP ===")
-            self.log("Dica: se a mensagem não aparecer, pressione Ctrl+V (o texto já está no clipboard).")
-
-            for _, r in df2.iterrows():
-                codigo = _norm_code(r["Codigo4d"])
-                cliente = str(r["Cliente"])
-                saldo = float(r["Saldo"])
-                vend = str(r.get("VendedorArquivo", ""))
-
-                # telefone salvo?
-                telefone = self.telefones_map.get(codigo, "").strip()
-                if not telefone:
-                    telefone = self.prompt_telefone(codigo, cliente)
-                    if telefone:
-                        self._salva_telefone_csv(codigo, telefone)
-
-                if not telefone:
-                    pulados += 1
-                    w.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), str(origem), vend, codigo, cliente,
-                                f"{saldo:.2f}".replace(".", ","), "", "PULADO", "", ""])
-                    self.log(f"[PULADO] {codigo} - {cliente}")
-                    continue
-
-                # Mensagem (blindada)
-                valor_brl = formata_brl(saldo)
-                tpl = msg_tpl.replace("{saldo:,.2f}", "{saldo_brl}").replace("{saldo: .2f}", "{saldo_brl}")
-                try:
-                    msg = tpl.format(codigo4d=codigo, cliente=cliente, saldo_brl=valor_brl, saldo=valor_brl)
-                except Exception:
-                    msg = f"Prezado(a),\n\nCliente: {codigo} - {cliente}\nSaldo pendente: R$ {valor_brl}\nPor gentileza, regularizar o quanto antes.\n"
-
-                canal, url = abre_whatsapp_desktop(
-                    telefone, msg, delay, auto_paste, auto_enter,
-                    auto_type_fallback, focar_janela
-                )
-                self.log(f"Abrindo WhatsApp ({canal}) para {codigo} - {cliente} ...")
-
-                # Confirmação manual
-                ok = messagebox.askyesno("Confirmação", f"Mensagem enviada para {codigo} - {cliente}?")
-                status = "ENVIADO" if ok else "ABERTO_NAO_ENVIADO"
-                if ok: enviados += 1
-                else:  aberto += 1
-
-                w.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), str(origem), vend, codigo, cliente,
-                            f"{saldo:.2f}".replace(".", ","), telefone, status, canal, url])
-
-        self.log("=== RESUMO ===")
-        total = len(df2)
-        self.log(f"Total para cobrar: {total}")
-        self.log(f"Enviados: {enviados}")
-        self.log(f"Abriram e não enviaram: {aberto}")
-        self.log(f"Pulados: {pulados}")
-        self.log(f"Log salvo em: {log_path.resolve()}")
-
-    def run_cobranca(self):
-        if self.df_consolidado is None:
-            messagebox.showinfo("Antes", "Use o botão '1) Converter p/ Consolidado' primeiro.")
+        pos = {c: i for i, c in enumerate(cab)}
+        if "status" not in pos or "codigo4d" not in pos:
             return
-        threading.Thread(target=self.cobrar, args=(self.df_consolidado, Path(self.origem_label)), daemon=True).start()
-
-    def prompt_telefone(self, codigo: str, cliente: str) -> str:
-        dlg = tk.Toplevel(self)
-        dlg.title(f"Telefone de {codigo} - {cliente}")
-        dlg.grab_set()
-        ttk.Label(dlg, text=f"Informe o telefone (apenas números, com DDD):").pack(padx=12, pady=(12,4))
-        var = tk.StringVar()
-        ent = ttk.Entry(dlg, textvariable=var, width=30)
-        ent.pack(padx=12, pady=6)
-        ent.focus_set()
-        out = {"tel": ""}
-
-        def ok():
-            out["tel"] = var.get().strip()
-            dlg.destroy()
-        def cancelar():
-            out["tel"] = ""
-            dlg.destroy()
-
-        frm = ttk.Frame(dlg); frm.pack(pady=8)
-        ttk.Button(frm, text="OK", command=ok).pack(side="left", padx=6)
-        ttk.Button(frm, text="Pular", command=cancelar).pack(side="left", padx=6)
-        dlg.wait_window()
-
-        return out["tel"]
+        idx = [pos.get(c) for c in LOG_HEADERS]    # logs antigos não têm 'remetente'
+        for n, reg in enumerate(leitor, start=1):
+            if not reg:
+                continue
+            (ts, origem, vend, codigo, cliente, saldo, telefone, status, canal, url, remetente) = (
+                reg[i] if i is not None and i < len(reg) else "" for i in idx)
+            try:
+                valor = br_to_float(saldo) if saldo else None
+            except ValueError:
+                valor = None
+            yield (caminho.name, n, ts, ts[:10], origem, vend, _norm_code(codigo), cliente, valor,
+                   telefone, status, canal, url, remetente)
+
+def carrega_logs_sql(con, pasta: Path = SAIDAS, padrao: str = "log_cobrancas_*.csv") -> dict[str, int]:
+    """
+    Carga incremental dos logs de campanha em `cobrancas`: log com o mesmo sha256 já
+    registrado em `cargas` é pulado; log novo ou que cresceu é (re)carregado com upsert
+    por (arquivo, linha). Cada arquivo vai numa transação.
+    """
+    ja = dict(con.execute("SELECT arquivo, sha256 FROM cargas"))
+    res = {"arquivos": 0, "pulados": 0, "linhas": 0}
+    for arq in sorted(pasta.glob(padrao)):
+        h = _sha256_arquivo(arq)
+        if ja.get(arq.name) == h:
+            res["pulados"] += 1
+            continue
+        with con:
+            n = _executa_em_lotes(con, """
+                INSERT INTO cobrancas (arquivo, linha, timestamp, data, origem, vendedor_arquivo, codigo4d,
+                                       cliente, saldo, telefone, status, canal, url, remetente)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (arquivo, linha) DO UPDATE SET
+                    timestamp = excluded.timestamp, data = excluded.data, origem = excluded.origem,
+                    vendedor_arquivo = excluded.vendedor_arquivo, codigo4d = excluded.codigo4d,
+                    cliente = excluded.cliente, saldo = excluded.saldo, telefone = excluded.telefone,
+                    status = excluded.status, canal = excluded.canal, url = excluded.url,
+                    remetente = excluded.remetente""", _linhas_log(arq))
+            con.execute("INSERT OR REPLACE INTO cargas (arquivo, sha256, linhas, carregado_em) VALUES (?, ?, ?, ?)",
+                        (arq.name, h, n, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        res["arquivos"] += 1
+        res["linhas"] += n
+    return res
+
+# ===================== SESSÃO (snapshot do estado da GUI) =====================
+SESSAO_ARQUIVO = SAIDAS / "sessao.npz"   # consolidado em colunas + telefones + metadados (JSON)
+SESSAO_VERSAO = 1
+_SEP = "\x00"                             # separador dos textos de uma coluna (blob utf-8)
+
+def _texto_para_blob(valores) -> "object":
+    import numpy as np
+    return np.frombuffer(_SEP.join(str(v).replace(_SEP, "") for v in valores).encode("utf-8"), dtype=np.uint8)
+
+def _blob_para_texto(blob, n: int) -> list:
+    return blob.tobytes().decode("utf-8").split(_SEP) if n else []
+
+def _assinatura_arquivo(caminho: Path) -> list:
+    st = caminho.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+def salva_sessao(df: Optional[pd.DataFrame], meta: dict, telefones: dict[str, str],
+                 caminho: Path = SESSAO_ARQUIVO) -> Path:
+    """
+    Snapshot binário (npz sem compressão, sem pickle): colunas numéricas/data como arrays
+    nativos, colunas de texto como um blob utf-8 por coluna; meta vai em JSON no mesmo arquivo.
+    """
+    import numpy as np
+    arrays, colunas = {}, []
+    if df is not None:
+        for i, col in enumerate(df.columns):
+            serie = df[col]
+            nativo = (pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie)) \
+                and not isinstance(serie.dtype, pd.CategoricalDtype)
+            if nativo:
+                arrays[f"c{i}"] = (serie.to_numpy(dtype="float64", na_value=np.nan)
+                                   if serie.hasnans and pd.api.types.is_numeric_dtype(serie) else serie.to_numpy())
+            else:
+                arrays[f"c{i}"] = _texto_para_blob(serie.fillna("").tolist())
+            colunas.append({"nome": str(col), "texto": not nativo})
+    arrays["tel_cod"] = _texto_para_blob(telefones.keys())
+    arrays["tel_num"] = _texto_para_blob(telefones.values())
+    meta = {**meta, "versao": SESSAO_VERSAO, "salvo_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "linhas": len(df) if df is not None else 0, "colunas": colunas if df is not None else None,
+            "telefones": len(telefones)}
+    arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_name(caminho.stem + ".tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, caminho)
+    return caminho
+
+def le_meta_sessao(caminho: Path = SESSAO_ARQUIVO) -> Optional[dict]:
+    """Só os metadados (o npz lê um membro por vez); None se não houver snapshot válido."""
+    if not caminho.exists():
+        return None
+    import numpy as np
+    try:
+        with np.load(caminho, allow_pickle=False) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+    except Exception:
+        return None
+    return meta if meta.get("versao") == SESSAO_VERSAO else None
+
+def carrega_sessao(caminho: Path = SESSAO_ARQUIVO) -> tuple[Optional[pd.DataFrame], dict, dict[str, str]]:
+    """(consolidado | None, meta, telefones) do snapshot."""
+    import numpy as np
+    with np.load(caminho, allow_pickle=False) as z:
+        meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+        n = meta["linhas"]
+        df = None
+        if meta["colunas"] is not None:
+            df = pd.DataFrame({
+                c["nome"]: (pd.Series(_blob_para_texto(z[f"c{i}"], n), dtype=object) if c["texto"] else z[f"c{i}"])
+                for i, c in enumerate(meta["colunas"])
+            })
+        tel_n = meta["telefones"]
+        telefones = dict(zip(_blob_para_texto(z["tel_cod"], tel_n), _blob_para_texto(z["tel_num"], tel_n)))
+    return df, meta, telefones
+
+# ===================== LOG EM ARQUIVO =====================
+def _cria_logger_arquivo(caminho: Path = LOG_ARQUIVO) -> logging.Logger:
+    """Logger com rotação por tamanho (histórico completo das campanhas)."""
+    from logging.handlers import RotatingFileHandler   # ~15 ms de import: só quando a GUI sobe
+
+    class _HandlerPreguicoso(RotatingFileHandler):
+        """delay=True: pasta e arquivo só nascem no primeiro registro."""
+        def _open(self):
+            Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+            return super()._open()
+
+    logger = logging.getLogger("agente_cobranca")
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            h = _HandlerPreguicoso(caminho, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                   encoding="utf-8", delay=True)
+            h.setFormatter(logging.Formatter("%(asctime)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+            logger.addHandler(h)
+        except Exception:
+            logger.addHandler(logging.NullHandler())
+    return logger
 
 # ---------- main ----------
 def main():
-    app = App()
+    from cobra_gui import App   # Tk só aqui: quem importa o cobra (API, carga SQL, testes) não precisa de tela
+    # --restaurar: volta à sessão salva sem perguntar; --medir-inicio nunca restaura (bench_inicio)
+    restaurar = False if "--medir-inicio" in sys.argv else (True if "--restaurar" in sys.argv else None)
+    app = App(perfil="--profile" in sys.argv, restaurar=restaurar)
+    if "--medir-inicio" in sys.argv:
+        # usado por bench_inicio.py: tempo até a 1ª janela e até a base de telefones carregar
+        def medir(event):
+            if event.widget is not app:
+                return
+            app.update_idletasks()
+            print(f"PRIMEIRA_JANELA {time.perf_counter() - _T_INICIO:.4f} "
+                  f"pandas_carregado={'pandas' in sys.modules}", flush=True)
+            def espera_telefones():
+                if not app._telefones_prontos.is_set():
+                    app.after(10, espera_telefones)
+                    return
+                print(f"TELEFONES_PRONTOS {time.perf_counter() - _T_INICIO:.4f} n={len(app.telefones_map)}", flush=True)
+                app.destroy()
+            espera_telefones()
+        app.bind("<Map>", medir, add="+")
     app.mainloop()
 
 if __name__ == "__main__":
+    sys.modules.setdefault("cobra", sys.modules[__name__])   # cobra_gui importa "cobra": o mesmo módulo, não uma cópia
     main()
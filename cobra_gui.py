@@ -0,0 +1,1188 @@
+# cobra_gui.py — Janelas do Agente de Cobrança (Tkinter)
+# Separado do cobra.py p/ que a API, a carga SQL e os benches importem o cobra sem Tk
+# (servidor sem tela não tem tkinter). Sobe pelo `python cobra.py`, que importa este módulo.
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from cobra import (
+    abre_banco, aging_titulos, _assinatura_arquivo, atualiza_kpis, BANCO_SQL, br_to_float,
+    CACHE_PDF_DIAS, CACHE_PDF_MAX_MB, CacheNumerosMortos, capacidade_diaria_medida,
+    carrega_consolidado_sql, carrega_kpis_sql, carrega_logs_sql, carrega_sessao,
+    clientes_sem_telefone, ConsolidadorClientes, COTA_DIA, COTA_HORA, _cria_logger_arquivo,
+    DEFAULT_DELAY, DEFAULT_TEL_CSV, detalhes_aging, ENTRADAS_EXT, executa_campanha, FAIXAS_AGING,
+    filtra_consolidado, formata_brl, formata_duracao, garante_saidas, importa_diretorio_telefones,
+    importa_nao_contatar, INDICE_LIMIAR, indice_nomes_telefones, IndiceNomes, JANELA_HORARIO,
+    JITTER_S, le_base_nao_contatar, le_base_telefones, le_logs_cobranca, le_meta_sessao,
+    le_nao_contatar, LimitadorEnvio, ListaNaoContatar, LOG_DRENO_MS, LOG_LOTE_MAX, LOG_MAX_LINHAS,
+    mapa_telefone_principal, MENSAGEM_BASE, mescla_telefones, MORTO_FALHAS, MORTOS_CSV,
+    MORTOS_MODOS, NAO_CONTATAR_CSV, _norm_code, _norm_code_serie, normaliza_telefones, pd, _perfil,
+    PerfilExecucao, planeja_campanha, poda_cache_pdf, PREVIEW_PAGINA, processa_arquivo,
+    processa_zip, RegistroCampanha, REGRAS_DEDUP, RemetenteDesktop, RemetenteSessao, resumo_aging,
+    RITMO_MSG_MIN, salva_base_telefones, salva_nao_contatar, salva_sessao, telefones_com_conversa,
+    ultimo_contato_por_cliente, usados_hoje_por_remetente
+)
+
+class App(tk.Tk):
+    def __init__(self, perfil: bool = False, restaurar: Optional[bool] = None):
+        """restaurar: None = pergunta se houver sessão salva; True = restaura direto; False = ignora."""
+        super().__init__()
+        self.title("Agente de Cobrança • Extra Carne")
+        self.geometry("980x720")
+        self.minsize(980, 720)
+
+        # Estado
+        self.modo = tk.StringVar(value="arquivo")
+        self.caminho_arquivo = tk.StringVar(value="")
+        self.caminho_pasta = tk.StringVar(value="")
+        self.regra_dedup = tk.StringVar(value="recente")
+        self.diagnostico = tk.BooleanVar(value=False)
+        self.extrai_titulos = tk.BooleanVar(value=False)   # tabela de títulos + aging
+        self.perfil = tk.BooleanVar(value=perfil)      # cProfile + tracemalloc (--profile)
+        self.delay = tk.IntVar(value=DEFAULT_DELAY)
+        self.auto_paste = tk.BooleanVar(value=True)
+        self.auto_enter = tk.BooleanVar(value=False)
+        self.auto_type_fallback = tk.BooleanVar(value=True)
+        self.focus_wa = tk.BooleanVar(value=True)
+        self.sessao_unica = tk.BooleanVar(value=False)
+        self.mortos_modo = tk.StringVar(value="pular")   # números mortos: pular / adiar / tentar
+        self.ritmo_msg_min = tk.DoubleVar(value=RITMO_MSG_MIN)
+        self.cota_hora = tk.IntVar(value=COTA_HORA)
+        self.cota_dia = tk.IntVar(value=COTA_DIA)
+        self.janela_ini = tk.IntVar(value=JANELA_HORARIO[0])
+        self.janela_fim = tk.IntVar(value=JANELA_HORARIO[1])
+        self.jitter = tk.DoubleVar(value=JITTER_S)
+        self.peso_dias = tk.DoubleVar(value=0.5)
+        self.vendedor_hint = tk.StringVar(value="")
+        self.msg_base = tk.StringVar(value=MENSAGEM_BASE)
+
+        # Telefones
+        self.telefones_path = tk.StringVar(value=str(DEFAULT_TEL_CSV if DEFAULT_TEL_CSV.exists() else ""))
+        self.telefones_map: dict[str, str] = {}             # preenchido em segundo plano (_carga_telefones_bg)
+        self._telefones_prontos = threading.Event()
+        self.indice_nomes: Optional[IndiceNomes] = None      # nome → telefone (montado após os telefones)
+
+        self.df_consolidado: Optional[pd.DataFrame] = None
+        self.origem_label: Optional[str] = None
+        self._parar = threading.Event()                      # botão "Parar": interrompe a campanha
+        self.df_titulos: Optional[pd.DataFrame] = None       # títulos com DiasAtraso/Faixa (opcional)
+        self.detalhes_titulos: dict[str, dict] = {}          # Codigo4d → {aging}, {dias_atraso}…
+        self._restaurar = restaurar
+
+        # Log: threads só enfileiram; o mainloop drena em lotes (Tk não é thread-safe)
+        self._log_q: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._log_arquivo = _cria_logger_arquivo()
+        # diálogos pedidos pelos workers (confirmação de envio): rodam no mainloop (_na_tela)
+        self._tela_q: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+
+        self._build_ui()
+        self.after(LOG_DRENO_MS, self._drena_log)
+        self.after(LOG_DRENO_MS, self._drena_tela)
+        # base de telefones (e o import do pandas) só depois que a janela aparece
+        self.bind("<Map>", self._ao_exibir, add="+")
+        self.protocol("WM_DELETE_WINDOW", self._ao_fechar)
+
+    def _ao_exibir(self, event):
+        if event.widget is not self or getattr(self, "_carga_iniciada", False):
+            return
+        self._carga_iniciada = True
+        meta = le_meta_sessao() if self._restaurar is not False else None
+        if meta is not None:
+            self.after(0, self._oferece_sessao, meta)   # diálogo fora do handler do <Map>
+            return
+        self._inicia_carga_telefones()
+
+    def _inicia_carga_telefones(self):
+        caminho = Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV
+        threading.Thread(target=self._carga_telefones_bg, args=(caminho,), name="carga-telefones",
+                         daemon=True).start()
+
+    # ---------- Sessão (snapshot) ----------
+    def _oferece_sessao(self, meta: dict):
+        if self._restaurar is None and not messagebox.askyesno(
+                "Sessão anterior",
+                f"Restaurar a sessão salva em {meta['salvo_em']}?\n\n"
+                f"Origem: {meta.get('origem_label') or '-'}\nClientes: {meta['linhas']}"):
+            self._inicia_carga_telefones()
+            return
+        try:
+            self.restaura_sessao()
+        except Exception as e:
+            self.log(f"   ⚠ Sessão: {e}")
+            self._inicia_carga_telefones()
+
+    def restaura_sessao(self):
+        t0 = time.perf_counter()
+        df, meta, telefones = carrega_sessao()
+        self.df_consolidado = df
+        self.origem_label = meta.get("origem_label")
+        self.detalhes_titulos = meta.get("detalhes_titulos") or {}
+        if meta.get("msg_base"):
+            self.msg_base.set(meta["msg_base"])
+            self.txt_msg.delete("1.0", "end")
+            self.txt_msg.insert("1.0", meta["msg_base"])
+        for var, chave in ((self.vendedor_hint, "vendedor_hint"), (self.caminho_arquivo, "caminho_arquivo"),
+                           (self.caminho_pasta, "caminho_pasta"), (self.modo, "modo")):
+            if meta.get(chave):
+                var.set(meta[chave])
+        self.log(f"[Sessão] {meta['linhas']} clientes de {self.origem_label or '-'} (salva em {meta['salvo_em']}) "
+                 f"restaurados em {time.perf_counter() - t0:.2f}s.")
+
+        # mapa de telefones do snapshot só vale se a base em disco não mudou desde então
+        caminho = Path(meta.get("telefones_path") or DEFAULT_TEL_CSV)
+        if meta.get("telefones_path"):
+            self.telefones_path.set(meta["telefones_path"])
+        if telefones and caminho.exists() and _assinatura_arquivo(caminho) == meta.get("telefones_assinatura"):
+            self.telefones_map = telefones
+            self._telefones_prontos.set()
+            self.log(f"[Telefones] {len(telefones)} números restaurados da sessão.")
+            threading.Thread(target=self._indice_nomes_bg, name="indice-nomes", daemon=True).start()
+        else:
+            self._inicia_carga_telefones()
+
+    def grava_sessao(self):
+        """Snapshot do estado de trabalho (consolidado, mensagem, telefones) em saidas/sessao.npz."""
+        if self.df_consolidado is None:
+            return
+        caminho = Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV
+        meta = {
+            "origem_label": self.origem_label,
+            "msg_base": self.msg_base.get(),
+            "vendedor_hint": self.vendedor_hint.get(),
+            "modo": self.modo.get(),
+            "caminho_arquivo": self.caminho_arquivo.get(),
+            "caminho_pasta": self.caminho_pasta.get(),
+            "telefones_path": self.telefones_path.get(),
+            "telefones_assinatura": _assinatura_arquivo(caminho) if caminho.exists() else None,
+            "detalhes_titulos": self.detalhes_titulos,
+        }
+        try:
+            salva_sessao(self.df_consolidado, meta,
+                         self.telefones_map if self._telefones_prontos.is_set() else {})
+        except Exception as e:
+            self.log(f"   ⚠ Sessão não salva: {e}")
+
+    def _ao_fechar(self):
+        self.msg_base.set(self.txt_msg.get("1.0", "end").strip())
+        self.grava_sessao()
+        self.destroy()
+
+    def _carga_telefones_bg(self, caminho: Path):
+        try:
+            self.telefones_map = self._carrega_telefones(caminho)
+            if self.telefones_map:
+                self.log(f"[Telefones] {len(self.telefones_map)} números carregados.")
+        except Exception as e:
+            self.log(f"   ⚠ Telefones ({caminho.name}): {e}")
+        finally:
+            self._telefones_prontos.set()
+        self._indice_nomes_bg()
+
+    def _indice_nomes_bg(self):
+        try:
+            self.indice_nomes = indice_nomes_telefones(self.telefones_map, le_logs_cobranca())
+            if len(self.indice_nomes):
+                self.log(f"[Telefones] Índice de nomes: {len(self.indice_nomes)} nomes p/ sugestões.")
+        except Exception as e:
+            self.log(f"   ⚠ Índice de nomes: {e}")
+
+    def sugestoes_telefone(self, cliente: str) -> List[tuple[float, str, str, str]]:
+        """Telefones já conhecidos sob nome parecido (código mudou/veio errado): (sim, nome, código, telefone)."""
+        if self.indice_nomes is None:
+            return []
+        return self.indice_nomes.sugere(cliente)
+
+    def telefone_mesmo_nome(self, cliente: str) -> str:
+        """Telefone de quem tem exatamente o mesmo nome normalizado ("" se não há ou é ambíguo)."""
+        if self.indice_nomes is None:
+            return ""
+        exato = self.indice_nomes.exato(cliente)
+        return exato[2] if exato else ""
+
+    def _aguarda_telefones(self):
+        """Ações que usam a base de telefones esperam a carga em segundo plano terminar."""
+        if not self._telefones_prontos.is_set():
+            self.config(cursor="watch"); self.update_idletasks()
+            self._telefones_prontos.wait()
+            self.config(cursor="")
+
+    # ---------- UI ----------
+    def _build_ui(self):
+        frm_top = ttk.Frame(self); frm_top.pack(fill="x", padx=12, pady=8)
+
+        ttk.Label(frm_top, text="Modo:").grid(row=0, column=0, sticky="w")
+        ttk.Radiobutton(frm_top, text="1 arquivo (PDF/CSV/TXT)", variable=self.modo, value="arquivo").grid(row=0, column=1, sticky="w", padx=6)
+        ttk.Radiobutton(frm_top, text="Pasta (vários arquivos)", variable=self.modo, value="pasta").grid(row=0, column=2, sticky="w", padx=6)
+        ttk.Label(frm_top, text="Cliente repetido entre arquivos:").grid(row=0, column=3, sticky="e", padx=(12,4))
+        ttk.Combobox(frm_top, textvariable=self.regra_dedup, values=REGRAS_DEDUP, width=14,
+                     state="readonly").grid(row=0, column=4, sticky="w")
+
+        ttk.Label(frm_top, text="Vendedor/Origem:").grid(row=1, column=0, sticky="w", pady=(6,0))
+        ttk.Entry(frm_top, textvariable=self.vendedor_hint, width=40).grid(row=1, column=1, columnspan=2, sticky="we", pady=(6,0))
+        ttk.Checkbutton(frm_top, text="Diagnóstico do parser (JSON por arquivo)",
+                        variable=self.diagnostico).grid(row=1, column=3, columnspan=2, sticky="w", padx=(12,0), pady=(6,0))
+        ttk.Checkbutton(frm_top, text="Títulos e aging (0-30/31-60/61-90/90+)",
+                        variable=self.extrai_titulos).grid(row=2, column=1, columnspan=2, sticky="w", pady=(2,0))
+        ttk.Checkbutton(frm_top, text="Perfil de desempenho (cProfile + memória)",
+                        variable=self.perfil).grid(row=2, column=3, columnspan=2, sticky="w", padx=(12,0), pady=(2,0))
+
+        # Seleção
+        frm_sel = ttk.LabelFrame(self, text="Seleção de entrada"); frm_sel.pack(fill="x", padx=12, pady=8)
+        self.entry_arquivo = ttk.Entry(frm_sel, textvariable=self.caminho_arquivo, width=80)
+        self.entry_pasta = ttk.Entry(frm_sel, textvariable=self.caminho_pasta, width=80)
+        ttk.Button(frm_sel, text="Escolher arquivo…", command=self.pick_arquivo).grid(row=0, column=0, padx=4, pady=6, sticky="w")
+        self.entry_arquivo.grid(row=0, column=1, padx=4, pady=6, sticky="we")
+        ttk.Button(frm_sel, text="Escolher pasta…", command=self.pick_pasta).grid(row=1, column=0, padx=4, pady=6, sticky="w")
+        self.entry_pasta.grid(row=1, column=1, padx=4, pady=6, sticky="we")
+        frm_sel.columnconfigure(1, weight=1)
+
+        # Telefones
+        frm_tel = ttk.LabelFrame(self, text="Telefones (opcional: CSV Codigo4d;Telefone)"); frm_tel.pack(fill="x", padx=12, pady=8)
+        ttk.Button(frm_tel, text="Importar CSV de telefones…", command=self.pick_telefones).grid(row=0, column=0, padx=4, pady=6, sticky="w")
+        ttk.Entry(frm_tel, textvariable=self.telefones_path, width=80).grid(row=0, column=1, padx=4, pady=6, sticky="we")
+        ttk.Button(frm_tel, text="Importar 'não contatar'…", command=self.pick_nao_contatar).grid(row=0, column=2, padx=4, pady=6)
+        frm_tel.columnconfigure(1, weight=1)
+
+        # Opções
+        frm_opts = ttk.LabelFrame(self, text="Envio (WhatsApp Desktop)"); frm_opts.pack(fill="x", padx=12, pady=8)
+        ttk.Label(frm_opts, text="Aguardar (s):").grid(row=0, column=0, sticky="w")
+        ttk.Spinbox(frm_opts, from_=2, to=15, textvariable=self.delay, width=5).grid(row=0, column=1, sticky="w", padx=(4,10))
+        ttk.Checkbutton(frm_opts, text="Colar automaticamente (Ctrl+V)", variable=self.auto_paste).grid(row=0, column=2, sticky="w", padx=10)
+        ttk.Checkbutton(frm_opts, text="(Avançado) Enviar automático (Enter)", variable=self.auto_enter).grid(row=0, column=3, sticky="w", padx=10)
+        ttk.Checkbutton(frm_opts, text="Fallback: digitar texto se não colar", variable=self.auto_type_fallback).grid(row=1, column=2, sticky="w", padx=10)
+        ttk.Checkbutton(frm_opts, text="Tentar focar janela do WhatsApp", variable=self.focus_wa).grid(row=1, column=3, sticky="w", padx=10)
+        ttk.Checkbutton(frm_opts, text="Reusar uma janela (nova conversa via Ctrl+N)", variable=self.sessao_unica).grid(row=1, column=0, columnspan=2, sticky="w")
+        ttk.Label(frm_opts, text=f"Números mortos ({MORTO_FALHAS} falhas/inválido):").grid(
+            row=4, column=0, columnspan=2, sticky="w", pady=(4,0))
+        ttk.Combobox(frm_opts, textvariable=self.mortos_modo, values=MORTOS_MODOS, width=10,
+                     state="readonly").grid(row=4, column=2, sticky="w", padx=10, pady=(4,0))
+
+        # Ritmo (da conta; cota 0 = sem limite)
+        frm_ritmo = ttk.Frame(frm_opts); frm_ritmo.grid(row=3, column=0, columnspan=4, sticky="w", pady=(4,0))
+        for i, (rotulo, var, ate, passo) in enumerate((
+                ("Msgs/min:", self.ritmo_msg_min, 60, 1), ("Cota/hora:", self.cota_hora, 1000, 10),
+                ("Cota/dia:", self.cota_dia, 10000, 50), ("Das (h):", self.janela_ini, 23, 1),
+                ("às (h):", self.janela_fim, 24, 1), ("Jitter (s):", self.jitter, 60, 1))):
+            ttk.Label(frm_ritmo, text=rotulo).grid(row=0, column=2 * i, sticky="w", padx=(0 if i == 0 else 8, 2))
+            ttk.Spinbox(frm_ritmo, from_=0, to=ate, increment=passo, textvariable=var, width=6).grid(row=0, column=2 * i + 1)
+
+        # Mensagem
+        frm_msg = ttk.LabelFrame(self, text="Mensagem base (usa {codigo4d}, {cliente}, {saldo_brl}; "
+                                            "com títulos: {aging}, {dias_atraso}, {vencido_brl}, {titulos})")
+        frm_msg.pack(fill="both", padx=12, pady=8, expand=True)
+        self.txt_msg = tk.Text(frm_msg, height=8, wrap="word")
+        self.txt_msg.insert("1.0", self.msg_base.get())
+        self.txt_msg.pack(fill="both", expand=True, padx=6, pady=6)
+
+        # Ações
+        frm_btn = ttk.Frame(self); frm_btn.pack(fill="x", padx=12, pady=8)
+        ttk.Button(frm_btn, text="1) Converter p/ Consolidado", command=self.run_converter).pack(side="left", padx=4)
+        ttk.Button(frm_btn, text="Pré-visualizar / filtrar…", command=self.abrir_preview).pack(side="left", padx=4)
+        ttk.Button(frm_btn, text="Planejar dia (maiores saldos)", command=self.planejar).pack(side="left", padx=4)
+        ttk.Label(frm_btn, text="peso dias s/ contato:").pack(side="left", padx=(4,2))
+        ttk.Spinbox(frm_btn, from_=0, to=5, increment=0.25, textvariable=self.peso_dias, width=5).pack(side="left")
+        ttk.Button(frm_btn, text="2) Iniciar Cobrança", command=self.run_cobranca).pack(side="left", padx=(12,4))
+        ttk.Button(frm_btn, text="Parar", command=self.parar_cobranca).pack(side="left", padx=4)
+        ttk.Button(frm_btn, text="Atualizar base SQL", command=self.run_sql).pack(side="left", padx=4)
+
+        # Log
+        frm_log = ttk.LabelFrame(self, text="Log"); frm_log.pack(fill="both", padx=12, pady=8, expand=True)
+        self.txt_log = tk.Text(frm_log, height=10, wrap="word")
+        self.txt_log.pack(fill="both", expand=True, padx=6, pady=6)
+
+    # ---------- UI helpers ----------
+    def log(self, msg: str):
+        """Pode ser chamado de qualquer thread: grava no arquivo e enfileira p/ a tela."""
+        self._log_arquivo.info(msg)
+        self._log_q.put(msg)
+
+    def _drena_log(self):
+        """Roda no mainloop: insere o lote pendente de uma vez e corta o excesso do topo."""
+        lote: List[str] = []
+        try:
+            while len(lote) < LOG_LOTE_MAX:
+                lote.append(self._log_q.get_nowait())
+        except queue.Empty:
+            pass
+
+        if lote:
+            self.txt_log.insert("end", "\n".join(lote) + "\n")
+            linhas = int(self.txt_log.index("end-1c").split(".")[0]) - 1
+            excesso = linhas - LOG_MAX_LINHAS
+            if excesso > 0:
+                self.txt_log.delete("1.0", f"{excesso + 1}.0")
+            self.txt_log.see("end")
+
+        # se ainda sobrou fila, volta logo; senão, espera o intervalo normal
+        self.after(1 if len(lote) >= LOG_LOTE_MAX else LOG_DRENO_MS, self._drena_log)
+
+    def _na_tela(self, fn: Callable, *args):
+        """
+        Executa fn(*args) na thread do Tk e devolve o resultado. Chamado de um worker,
+        enfileira o pedido p/ o mainloop (_drena_tela) e bloqueia até a resposta.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return fn(*args)
+        resp: "queue.Queue[tuple]" = queue.Queue(maxsize=1)
+        self._tela_q.put((fn, args, resp))
+        ok, valor = resp.get()
+        if not ok:
+            raise valor
+        return valor
+
+    def _drena_tela(self):
+        """Roda no mainloop: atende os pedidos de diálogo dos workers, um por vez."""
+        try:
+            while True:
+                fn, args, resp = self._tela_q.get_nowait()
+                try:
+                    resp.put((True, fn(*args)))
+                except Exception as e:
+                    resp.put((False, e))
+        except queue.Empty:
+            pass
+        self.after(LOG_DRENO_MS, self._drena_tela)
+
+    def pick_arquivo(self):
+        f = filedialog.askopenfilename(title="Escolha um PDF/CSV/TXT/ZIP",
+                                       filetypes=[("Relatórios", "*.pdf;*.csv;*.txt;*.zip"), ("Todos", "*.*")])
+        if f:
+            self.caminho_arquivo.set(f)
+
+    def pick_pasta(self):
+        d = filedialog.askdirectory(title="Escolha a pasta com relatórios")
+        if d:
+            self.caminho_pasta.set(d)
+
+    def pick_telefones(self):
+        self._aguarda_telefones()
+        f = filedialog.askopenfilename(title="Telefones (Codigo4d + Telefone[, Telefone2…])",
+                                       filetypes=[("CSV/Excel", "*.csv;*.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")])
+        if not f:
+            return
+        origem = Path(f)
+        t0 = time.perf_counter()
+        try:
+            novos, rejeitados = importa_diretorio_telefones(origem)
+        except Exception as e:
+            messagebox.showerror("Telefones", str(e))
+            return
+
+        # o diretório importado é mesclado na base em uso (sempre CSV ';')
+        csv_path = Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV
+        base = mescla_telefones(le_base_telefones(csv_path), novos)
+        salva_base_telefones(base, csv_path)
+        self.telefones_path.set(str(csv_path))
+        self.telefones_map = mapa_telefone_principal(base)
+
+        self.log(f"[Telefones] {origem.name}: {len(novos)} números de "
+                 f"{novos['Codigo4d'].nunique()} clientes em {time.perf_counter() - t0:.1f}s → {csv_path.name}")
+        if not rejeitados.empty:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            rej_path = garante_saidas() / f"telefones_rejeitados_{stamp}.csv"
+            rejeitados.to_csv(rej_path, sep=";", index=False, encoding="utf-8-sig")
+            self.log(f"   ⚠ {len(rejeitados)} linhas rejeitadas: {rej_path.resolve()}")
+
+    def pick_nao_contatar(self):
+        f = filedialog.askopenfilename(title="Não contatar (Codigo4d e/ou Telefone[, Motivo])",
+                                       filetypes=[("CSV/Excel", "*.csv;*.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")])
+        if not f:
+            return
+        try:
+            novos, rejeitados = importa_nao_contatar(Path(f))
+        except Exception as e:
+            messagebox.showerror("Não contatar", str(e))
+            return
+        base = pd.concat([le_base_nao_contatar(), novos], ignore_index=True)
+        base = base.drop_duplicates(subset=["Codigo4d", "Telefone"], keep="last")
+        salva_nao_contatar(base)
+        self.log(f"[Não contatar] {Path(f).name}: {len(novos)} entradas • base com {len(base)} → {NAO_CONTATAR_CSV.name}")
+        if not rejeitados.empty:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            rej_path = garante_saidas() / f"nao_contatar_rejeitados_{stamp}.csv"
+            rejeitados.to_csv(rej_path, sep=";", index=False, encoding="utf-8-sig")
+            sem_codigo = int((rejeitados["Codigo4d"] == "").sum())
+            self.log(f"   ⚠ {len(rejeitados)} telefones rejeitados ({sem_codigo} sem código): {rej_path.resolve()}")
+            # bloqueio que não entrou = cliente que pode ser contatado: não basta o log
+            messagebox.showwarning(
+                "Não contatar",
+                f"{len(rejeitados)} telefones inválidos não foram bloqueados"
+                + (f" ({sem_codigo} linhas sem Codigo4d: esses clientes NÃO estão na lista)" if sem_codigo else "")
+                + f".\nCorrija o arquivo e importe de novo. Detalhes em:\n{rej_path.resolve()}")
+
+    # ---------- Telefones persistentes ----------
+    def _carrega_telefones(self, caminho: Path) -> dict[str, str]:
+        return mapa_telefone_principal(le_base_telefones(caminho))
+
+    def _salva_telefone_csv(self, codigo: str, telefone: str) -> str:
+        """
+        Atualiza/insere telefone no CSV em uso (self.telefones_path) ou no DEFAULT_TEL_CSV.
+        Chave SEMPRE = Codigo4d normalizado (4 dígitos).
+        Retorna o telefone normalizado ("" se inválido).
+        """
+        salvos, _ = self._salva_telefones_lote({codigo: telefone})
+        return salvos.get(_norm_code(codigo), "")
+
+    def _salva_telefones_lote(self, pares: dict[str, str]) -> tuple[dict[str, str], dict[str, str]]:
+        """
+        Grava vários telefones numa única leitura+escrita da base.
+        Cada número informado vira o principal (Prioridade 1) e os demais do cliente descem uma posição.
+        Retorna (salvos{Codigo4d: E.164}, invalidos{codigo: como digitado}).
+        """
+        entrada = pd.DataFrame({"Codigo4d": list(pares.keys()), "Digitado": list(pares.values())})
+        entrada = entrada[entrada["Digitado"].astype(str).str.strip() != ""]
+        entrada["Codigo4d"] = _norm_code_serie(entrada["Codigo4d"])
+        entrada["Telefone"], motivo = normaliza_telefones(entrada["Digitado"])
+        ok = (motivo == "") & (entrada["Codigo4d"] != "")
+        invalidos = dict(zip(entrada.loc[~ok, "Codigo4d"], entrada.loc[~ok, "Digitado"]))
+        for cod, tel in invalidos.items():
+            self.log(f"[Telefone inválido] {cod} → {tel}")
+
+        novos = entrada.loc[ok, ["Codigo4d", "Telefone"]].drop_duplicates("Codigo4d", keep="last").assign(Prioridade=1)
+        if novos.empty:
+            return {}, invalidos
+
+        csv_path = Path(self.telefones_path.get()) if self.telefones_path.get() else DEFAULT_TEL_CSV
+        df_tel = le_base_telefones(csv_path)
+
+        antigos = df_tel.merge(novos[["Codigo4d", "Telefone"]], on="Codigo4d", suffixes=("", "_novo"))
+        antigos = antigos[antigos["Telefone"] != antigos["Telefone_novo"]][["Codigo4d", "Telefone", "Prioridade"]]
+        antigos["Prioridade"] = antigos["Prioridade"] + 1
+        df_tel = mescla_telefones(df_tel, pd.concat([novos, antigos], ignore_index=True))
+
+        salva_base_telefones(df_tel, csv_path)
+        salvos = dict(zip(novos["Codigo4d"], novos["Telefone"]))
+        self.telefones_map.update(salvos)
+        if self.indice_nomes is not None and self.df_consolidado is not None:
+            nomes = self.df_consolidado.loc[self.df_consolidado["Codigo4d"].isin(salvos.keys()), ["Codigo4d", "Cliente"]]
+            for cod, nome in zip(nomes["Codigo4d"], nomes["Cliente"]):
+                self.indice_nomes.adiciona(nome, cod, salvos[cod])
+        self.telefones_path.set(str(csv_path))
+        if len(salvos) == 1:
+            cod, tel = next(iter(salvos.items()))
+            self.log(f"[Telefone salvo] {cod} → {tel} ({csv_path.name})")
+        else:
+            self.log(f"[Telefones salvos] {len(salvos)} números ({csv_path.name})")
+        return salvos, invalidos
+
+    # ---------- Conversão ----------
+    def converter(self, perfil: Optional[PerfilExecucao] = None) -> tuple[Optional[pd.DataFrame], Optional[Path]]:
+        modo = self.modo.get()
+        vend = self.vendedor_hint.get().strip()
+        paginas: dict = {}     # cache de páginas de PDF: paginas / reaproveitadas
+        titulos: Optional[list] = [] if self.extrai_titulos.get() else None
+        arquivos = None        # pasta ou .zip: consolida vários relatórios
+        if modo == "arquivo":
+            p = Path(self.caminho_arquivo.get().strip().strip('"'))
+            if not p.exists():
+                messagebox.showerror("Erro", "Selecione um arquivo válido.")
+                return None, None
+            if p.suffix.lower() == ".zip":
+                arquivos = [p]
+            else:
+                self.log(f"[LENDO] {p.name}")
+                with _perfil(perfil, "processa_arquivo"):
+                    df = processa_arquivo(p, vendedor_hint=vend or p.stem, diagnostico=self.diagnostico.get(),
+                                          stats=paginas, titulos=titulos)
+            origem = p
+        else:
+            d = Path(self.caminho_pasta.get().strip().strip('"'))
+            if not d.exists() or not d.is_dir():
+                messagebox.showerror("Erro", "Selecione uma pasta válida.")
+                return None, None
+            arquivos = sorted((a for a in d.iterdir() if a.suffix.lower() in ENTRADAS_EXT + (".zip",)),
+                              key=lambda a: a.stat().st_mtime)
+            origem = d
+
+        if arquivos is not None:
+            consol = ConsolidadorClientes(self.regra_dedup.get())
+            ok = 0
+            for arq in arquivos:
+                self.log(f"[PROCESSANDO] {arq.name}")
+                if arq.suffix.lower() == ".zip":
+                    # membros lidos em paralelo, direto do zip; vendedor = nome do membro
+                    try:
+                        with _perfil(perfil, "processa_arquivo"):
+                            for nome, mtime, res in processa_zip(arq, vend or None, self.diagnostico.get(), paginas,
+                                                                 titulos=titulos, perfil=perfil):
+                                if isinstance(res, Exception):
+                                    self.log(f"   ⚠ {arq.name}/{nome}: {res}")
+                                    continue
+                                with _perfil(perfil, "consolidacao"):
+                                    consol.adiciona(res, mtime, f"{arq.name}/{nome}")
+                                ok += 1
+                    except Exception as e:
+                        self.log(f"   ⚠ {arq.name}: {e}")
+                    continue
+                try:
+                    with _perfil(perfil, "processa_arquivo"):
+                        df_arq = processa_arquivo(arq, vendedor_hint=vend or arq.stem,
+                                                  diagnostico=self.diagnostico.get(), stats=paginas,
+                                                  titulos=titulos)
+                    with _perfil(perfil, "consolidacao"):
+                        consol.adiciona(df_arq, arq.stat().st_mtime, arq.name)
+                    ok += 1
+                except Exception as e:
+                    self.log(f"   ⚠ {arq.name}: {e}")
+            if not ok:
+                messagebox.showwarning("Aviso", "Nenhum arquivo válido encontrado.")
+                return None, None
+            with _perfil(perfil, "consolidacao"):
+                df = consol.resultado()
+            self.log(f"[Dedup] {consol.linhas_lidas} linhas → {len(df)} clientes (regra: {consol.regra})")
+            conflitos = consol.relatorio_conflitos()
+            if not conflitos.empty:
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                rel = garante_saidas() / f"conflitos_consolidacao_{stamp}.csv"
+                conflitos.to_csv(rel, index=False, sep=";", encoding="utf-8-sig")
+                somados = int((conflitos["Tipo"] == "soma_entre_vendedores").sum())
+                self.log(f"   ⚠ {len(conflitos) - somados} conflitos de saldo, {somados} clientes "
+                         f"somados entre vendedores: {rel.resolve()}")
+
+        if paginas.get("reaproveitadas"):
+            self.log(f"[Cache PDF] {paginas['reaproveitadas']}/{paginas['paginas']} páginas reaproveitadas")
+        if paginas.get("paginas"):
+            podadas = poda_cache_pdf()
+            if podadas:
+                self.log(f"[Cache PDF] {podadas} páginas antigas removidas (limite {CACHE_PDF_MAX_MB} MB / "
+                         f"{CACHE_PDF_DIAS} dias)")
+
+        # salvar consolidado
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out = garante_saidas() / f"consolidado_cobranca_{stamp}.csv"
+        df.to_csv(out, index=False, sep=";", encoding="utf-8-sig")
+        self.log(f"✅ Consolidado salvo: {out.resolve()}")
+
+        # guarda para cobrança e normaliza código
+        if "Codigo4d" in df.columns:
+            df["Codigo4d"] = df["Codigo4d"].astype(str).map(_norm_code)
+
+        self.df_titulos, self.detalhes_titulos = None, {}
+        if titulos:
+            self._consolida_titulos(titulos, df, stamp)
+        return df, origem
+
+    def _consolida_titulos(self, titulos: List[pd.DataFrame], df: pd.DataFrame, stamp: str):
+        """Junta os títulos dos arquivos (relatórios cumulativos repetem títulos), calcula o aging e salva."""
+        t = pd.concat(titulos, ignore_index=True)
+        t = t[t["Codigo4d"].isin(df["Codigo4d"])]
+        t = t.drop_duplicates(subset=["Codigo4d", "Documento", "Vencimento", "Valor"], keep="last")
+        if t.empty:
+            self.log("[Títulos] Nenhuma linha de título (documento/vencimento/valor) reconhecida.")
+            return
+        t = aging_titulos(t.reset_index(drop=True))
+        resumo = resumo_aging(t)
+        self.df_titulos = t
+        self.detalhes_titulos = detalhes_aging(resumo)
+        out = garante_saidas() / f"titulos_cobranca_{stamp}.csv"
+        t.to_csv(out, index=False, sep=";", encoding="utf-8-sig", date_format="%Y-%m-%d")
+        resumo.to_csv(garante_saidas() / f"aging_cobranca_{stamp}.csv", index=False, sep=";", encoding="utf-8-sig")
+        faixas = " • ".join(f"{f}: R$ {formata_brl(resumo[f].sum())}" for f in FAIXAS_AGING)
+        self.log(f"[Títulos] {len(t)} títulos de {len(resumo)} clientes • {faixas}")
+        self.log(f"   Títulos/aging salvos: {out.resolve()}")
+
+    def run_converter(self):
+        try:
+            self.msg_base.set(self.txt_msg.get("1.0", "end").strip())
+            perfil = PerfilExecucao() if self.perfil.get() else None
+            try:
+                df, origem = self.converter(perfil)
+            finally:
+                self._fecha_perfil(perfil)
+            if df is not None:
+                self.df_consolidado = df
+                self.origem_label = str(origem)
+                self.grava_sessao()
+        except Exception as e:
+            messagebox.showerror("Erro", str(e))
+
+    def _fecha_perfil(self, perfil: Optional[PerfilExecucao]):
+        """Grava os relatórios do perfil (se houve alguma etapa medida) e desliga o tracemalloc."""
+        if perfil is None:
+            return
+        perfil.encerra()
+        if not perfil.etapas:
+            return
+        arqs = perfil.salva(garante_saidas())
+        for linha in perfil.resumo():
+            self.log(f"[Perfil] {linha}")
+        self.log(f"[Perfil] Relatório: {arqs[-2].resolve()} (+ .pstats e memória)")
+
+    # ---------- Cobrança ----------
+    def cobrar(self, df: pd.DataFrame, origem: Path, opcoes: dict, pedir_telefone: bool = True,
+               nao_contatar: Optional[ListaNaoContatar] = None):
+        """
+        Percorre o consolidado abrindo o WhatsApp por cliente. Roda num worker: não lê tk.*Var
+        (opcoes = _opcoes_envio(), lido na thread do Tk) e diálogos passam por _na_tela.
+        pedir_telefone=False: quem não tem telefone é PULADO sem abrir diálogo
+        (o pré-voo de run_cobranca já resolveu os faltantes em lote).
+        nao_contatar: lista já carregada (senão lê saidas/nao_contatar.csv).
+        """
+        df2 = df.copy()
+        if "Codigo4d" in df2.columns:
+            df2["Codigo4d"] = df2["Codigo4d"].astype(str).map(_norm_code)
+
+        if not pd.api.types.is_numeric_dtype(df2["Saldo"]):
+            df2["Saldo"] = pd.to_numeric(df2["Saldo"], errors="coerce").fillna(0.0)
+        df2 = df2[df2["Saldo"] > 0].reset_index(drop=True)
+        if df2.empty:
+            self.log("Nenhum cliente com saldo > 0 para cobrar.")
+            return
+
+        if pedir_telefone:
+            for r in clientes_sem_telefone(df2, self.telefones_map).itertuples(index=False):
+                telefone = self._na_tela(self.prompt_telefone, r.Codigo4d, r.Cliente)
+                if telefone:
+                    self._salva_telefone_csv(r.Codigo4d, telefone)
+
+        # 'não contatar': filtro vetorizado (código + telefone) antes; checagem por contato no laço
+        nao_contatar = nao_contatar if nao_contatar is not None else le_nao_contatar()
+        if len(nao_contatar):
+            df2, bloqueados = nao_contatar.filtra(df2, self.telefones_map)
+            if len(bloqueados):
+                self.log(f"[Não contatar] {len(bloqueados)} clientes removidos da campanha.")
+            if df2.empty:
+                self.log("Nenhum cliente liberado para cobrar.")
+                return
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_path = garante_saidas() / f"log_cobrancas_{stamp}.csv"
+
+        # um remetente só: o WhatsApp Desktop é uma tela/conta, vários apenas revezariam o _TELA_LOCK
+        extra = {}
+        if opcoes["sessao_unica"]:
+            classe = RemetenteSessao
+            # números que já têm conversa na conta: a busca da sessão os encontra
+            extra["conhecidos"] = telefones_com_conversa(le_logs_cobranca())
+            if opcoes["auto_enter"]:
+                self.log("[Sessão] Enter automático desligado: confirme cada envio na conversa aberta.")
+        else:
+            classe = RemetenteDesktop
+        rem = classe("desktop1", opcoes["delay"], opcoes["auto_paste"], opcoes["auto_enter"],
+                     opcoes["auto_type_fallback"], opcoes["focar_janela"],
+                     confirmar=lambda codigo, cliente: self._na_tela(self._confirma_envio, codigo, cliente),
+                     **extra)
+        self._parar.clear()
+        rem.limitador = self._novo_limitador(opcoes, sum(usados_hoje_por_remetente().values()))
+
+        self.log("=== ENVIO VIA WHATSAPP DESKTOP ===")
+        self.log("Dica: se a mensagem não aparecer, pressione Ctrl+V (o texto já está no clipboard).")
+
+        mortos = CacheNumerosMortos().carrega()
+        if not MORTOS_CSV.exists():
+            mortos.alimenta(le_logs_cobranca())
+        if mortos.mortos():
+            self.log(f"[Números mortos] {mortos.mortos()} conhecidos • modo: {opcoes['mortos_modo']}.")
+
+        perfil = PerfilExecucao() if opcoes["perfil"] else None
+        try:
+            with RegistroCampanha(log_path, str(origem), len(df2), log=self.log) as reg:
+                executa_campanha(df2, [rem], reg, self.telefones_map, opcoes["mensagem"], perfil=perfil,
+                                 mortos=mortos, mortos_modo=opcoes["mortos_modo"],
+                                 detalhes=self.detalhes_titulos,
+                                 nao_contatar=nao_contatar if len(nao_contatar) else None,
+                                 parar=self._parar)
+        finally:
+            self._fecha_perfil(perfil)
+            mortos.salva()
+        if self._parar.is_set():
+            self.log(f"[Campanha] Interrompida pelo usuário ({reg.processados}/{reg.total} processados).")
+
+        c = reg.contagem
+        self.log("=== RESUMO ===")
+        self.log(f"Total para cobrar: {len(df2)}")
+        self.log(f"Enviados: {c['ENVIADO']}")
+        self.log(f"Abriram e não enviaram: {c['ABERTO_NAO_ENVIADO']}")
+        self.log(f"Pulados: {c['PULADO']}")
+        if c["DUPLICADO"] or c["ERRO"]:
+            self.log(f"Duplicados: {c['DUPLICADO']} • Erros: {c['ERRO']}")
+        if c["NUMERO_INVALIDO"] or c["NUMERO_MORTO"]:
+            self.log(f"Números inválidos: {c['NUMERO_INVALIDO']} • Mortos (pulados): {c['NUMERO_MORTO']}")
+        if c["NAO_CONTATAR"]:
+            self.log(f"Não contatar (bloqueados no envio): {c['NAO_CONTATAR']}")
+        self.log(f"Log salvo em: {log_path.resolve()}")
+        self._resumo_kpis()
+
+    def _resumo_kpis(self):
+        """Agrega só as linhas novas dos logs na tabela de KPIs e mostra o dia por vendedor."""
+        try:
+            kpis = atualiza_kpis()["kpis"]
+        except Exception as e:
+            self.log(f"[KPIs] ⚠ {e}")
+            return
+        hoje = kpis[kpis["data"] == datetime.now().strftime("%Y-%m-%d")]
+        if hoje.empty:
+            return
+        self.log("=== HOJE POR VENDEDOR ===")
+        for r in hoje.sort_values("saldo_coberto", ascending=False).itertuples(index=False):
+            self.log(f"{r.vendedor_arquivo or '-'}: {r.enviados} enviados • {r.abertos_nao_enviados} abertos s/ envio • "
+                     f"{r.pulados} pulados • R$ {formata_brl(r.saldo_coberto)} cobertos")
+
+    def _confirma_envio(self, codigo: str, cliente: str):
+        """Sim = enviado • Não = abriu e não enviou • Cancelar = número sem WhatsApp/errado."""
+        ok = messagebox.askyesnocancel(
+            "Confirmação", f"Mensagem enviada para {codigo} - {cliente}?\n\n"
+                           "(Cancelar = número sem WhatsApp / inválido)")
+        return "NUMERO_INVALIDO" if ok is None else ok
+
+    def abrir_preview(self):
+        self._aguarda_telefones()
+        if self.df_consolidado is None:
+            messagebox.showinfo("Antes", "Use o botão '1) Converter p/ Consolidado' primeiro.")
+            return
+        PreviewConsolidado(self)
+
+    def aplica_recorte(self, df: pd.DataFrame):
+        """Substitui o consolidado da campanha pelo recorte (filtro/ordem) escolhido no preview."""
+        self.df_consolidado = df.reset_index(drop=True)
+        self.log(f"[Preview] Campanha recortada: {len(self.df_consolidado)} clientes.")
+        self.grava_sessao()     # o snapshot acompanha o recorte (e o plano, que passa por aqui)
+
+    def planejar(self):
+        """Ordena por valor, corta na capacidade diária medida e salva o plano do dia."""
+        if self.df_consolidado is None:
+            messagebox.showinfo("Antes", "Use o botão '1) Converter p/ Consolidado' primeiro.")
+            return
+        logs = le_logs_cobranca()
+        teto = int(self.cota_dia.get()) or COTA_DIA     # cota diária da conta
+        capacidade = min(teto, capacidade_diaria_medida(logs, teto))
+
+        plano = planeja_campanha(self.df_consolidado, capacidade, float(self.peso_dias.get()),
+                                 ultimo_contato_por_cliente(logs))
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out = garante_saidas() / f"plano_cobranca_{stamp}.csv"
+        plano.to_csv(out, index=False, sep=";", encoding="utf-8-sig")
+
+        total = pd.to_numeric(self.df_consolidado["Saldo"], errors="coerce").clip(lower=0).sum()
+        coberto = plano["Saldo"].sum()
+        self.aplica_recorte(plano)
+        self.log(f"[Plano] Capacidade {capacidade}/dia • {len(plano)} clientes • "
+                 f"R$ {formata_brl(coberto)} de R$ {formata_brl(total)} "
+                 f"({(coberto / total * 100) if total else 0:.0f}%) → {out.name}")
+
+    def atualiza_sql(self):
+        """Consolidado atual (se houver) + logs novos → saidas/cobranca.db (SQLite)."""
+        con = abre_banco()
+        try:
+            if self.df_consolidado is not None:
+                n = carrega_consolidado_sql(con, self.df_consolidado)
+                self.log(f"[SQL] {n} saldos gravados (upsert do dia).")
+            r = carrega_logs_sql(con)
+            self.log(f"[SQL] Logs: {r['arquivos']} carregados ({r['linhas']} linhas), "
+                     f"{r['pulados']} já estavam na base → {BANCO_SQL.resolve()}")
+            n = carrega_kpis_sql(con, atualiza_kpis()["kpis"])
+            self.log(f"[SQL] KPIs: {n} linhas (dia × vendedor) em kpis_diarios.")
+        finally:
+            con.close()
+
+    def run_sql(self):
+        def tarefa():
+            try:
+                self.atualiza_sql()
+            except Exception as e:
+                self.log(f"[SQL] ⚠ {e}")
+        threading.Thread(target=tarefa, daemon=True).start()
+
+    def _opcoes_envio(self) -> dict:
+        """Retrato das opções da tela p/ a campanha; lido na thread do Tk, antes do worker."""
+        janela = (int(self.janela_ini.get()), int(self.janela_fim.get()))
+        return {
+            "delay": max(2, int(self.delay.get())),
+            "sessao_unica": bool(self.sessao_unica.get()),
+            "auto_paste": bool(self.auto_paste.get()),
+            "auto_enter": bool(self.auto_enter.get()),
+            "auto_type_fallback": bool(self.auto_type_fallback.get()),
+            "focar_janela": bool(self.focus_wa.get()),
+            "mortos_modo": self.mortos_modo.get(),
+            "perfil": bool(self.perfil.get()),
+            "mensagem": self.msg_base.get(),
+            "ritmo": {
+                "msg_min": float(self.ritmo_msg_min.get()),
+                "cota_hora": int(self.cota_hora.get()) or None,
+                "cota_dia": int(self.cota_dia.get()) or None,
+                "janela": janela if janela[0] < janela[1] else None,
+                "jitter": float(self.jitter.get()),
+            },
+        }
+
+    def _novo_limitador(self, opcoes: dict, usados_hoje: int = 0) -> LimitadorEnvio:
+        """Limitador com o ritmo/cotas/janela das opções, interrompível pelo botão Parar."""
+        return LimitadorEnvio(**opcoes["ritmo"], usados_hoje=usados_hoje, log=self.log, parar=self._parar)
+
+    def parar_cobranca(self):
+        if not self._parar.is_set():
+            self._parar.set()
+            self.log("[Campanha] Parando: o envio em andamento termina e nenhum outro começa.")
+
+    def run_cobranca(self):
+        if self.df_consolidado is None:
+            messagebox.showinfo("Antes", "Use o botão '1) Converter p/ Consolidado' primeiro.")
+            return
+        opcoes = self._opcoes_envio()
+        espera = self._novo_limitador(opcoes).espera_janela()
+        if espera and not messagebox.askyesno(
+                "Fora da janela de horário",
+                f"Agora está fora da janela de envio ({self.janela_ini.get()}h–{self.janela_fim.get()}h).\n"
+                f"A campanha ficaria parada por {formata_duracao(espera)} até a janela abrir.\n\n"
+                "Iniciar mesmo assim? (dá para interromper com o botão Parar)"):
+            return
+        self._aguarda_telefones()
+
+        # quem está na lista 'não contatar' (por código) nem entra no pré-voo
+        bloqueio = le_nao_contatar()
+        df, bloqueados = bloqueio.filtra(self.df_consolidado)
+        if len(bloqueados):
+            self.log(f"[Não contatar] {len(bloqueados)} clientes fora da campanha.")
+
+        # Pré-voo: resolve todos os telefones faltantes de uma vez, antes do envio
+        faltando = clientes_sem_telefone(df, self.telefones_map)
+        if not faltando.empty:
+            self.log(f"[Pré-voo] {len(faltando)} clientes sem telefone.")
+            dlg = PreflightTelefones(self, faltando)
+            self.wait_window(dlg)
+            if not dlg.confirmado:
+                self.log("[Pré-voo] Cobrança cancelada.")
+                return
+
+        threading.Thread(target=self.cobrar, args=(df, Path(self.origem_label), opcoes),
+                         kwargs={"pedir_telefone": False, "nao_contatar": bloqueio}, daemon=True).start()
+
+    def prompt_telefone(self, codigo: str, cliente: str) -> str:
+        dlg = tk.Toplevel(self)
+        dlg.title(f"Telefone de {codigo} - {cliente}")
+        dlg.grab_set()
+        ttk.Label(dlg, text=f"Informe o telefone (apenas números, com DDD):").pack(padx=12, pady=(12,4))
+        # só o mesmo nome pré-preenche; nome parecido pode ser outro cliente: o operador escolhe
+        exato = self.telefone_mesmo_nome(cliente)
+        var = tk.StringVar(value=exato)
+        sug = [x for x in self.sugestoes_telefone(cliente) if x[3] != exato]
+        if sug:
+            frm_sug = ttk.LabelFrame(dlg, text="Nome parecido (confira antes de usar)")
+            frm_sug.pack(padx=12, pady=(0, 4), fill="x")
+            for sim, nome, cod, tel in sug:
+                ttk.Button(frm_sug, text=f"Usar {tel} • {nome} (cód. {cod}, {sim:.0%})",
+                           command=lambda t=tel: var.set(t)).pack(anchor="w", padx=4, pady=2)
+        ent = ttk.Entry(dlg, textvariable=var, width=30)
+        ent.pack(padx=12, pady=6)
+        ent.focus_set()
+        out = {"tel": ""}
+
+        def ok():
+            out["tel"] = var.get().strip()
+            dlg.destroy()
+        def cancelar():
+            out["tel"] = ""
+            dlg.destroy()
+
+        frm = ttk.Frame(dlg); frm.pack(pady=8)
+        ttk.Button(frm, text="OK", command=ok).pack(side="left", padx=6)
+        ttk.Button(frm, text="Pular", command=cancelar).pack(side="left", padx=6)
+        dlg.wait_window()
+
+        return out["tel"]
+
+# ---------- Pré-visualização ----------
+class PreviewConsolidado(tk.Toplevel):
+    """
+    Grade paginada sobre app.df_consolidado: só a página visível vira itens do Treeview,
+    então 100k linhas não travam a interface. Filtros/ordenação via filtra_consolidado().
+    """
+    COLUNAS = ("Codigo4d", "Cliente", "Saldo", "VendedorArquivo", "Telefone")
+
+    def __init__(self, app: "App"):
+        super().__init__(app)
+        self.app = app
+        self.df = app.df_consolidado
+        self.title(f"Consolidado • {len(self.df)} clientes")
+        self.geometry("900x560")
+
+        self.saldo_min = tk.StringVar(value="")
+        self.saldo_max = tk.StringVar(value="")
+        self.vendedor = tk.StringVar(value="")
+        self.telefone = tk.StringVar(value="todos")
+        self.ordem_col: Optional[str] = None
+        self.ordem_cresc = True
+        self.pagina = 0
+        self.idx: pd.Index = self.df.index
+        self.soma = 0.0                    # saldo do recorte: recalculado só quando o filtro muda
+
+        self._build_ui()
+        self.aplicar_filtros()
+
+    def _build_ui(self):
+        frm_f = ttk.LabelFrame(self, text="Filtros"); frm_f.pack(fill="x", padx=8, pady=6)
+        ttk.Label(frm_f, text="Saldo de:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(frm_f, textvariable=self.saldo_min, width=10).grid(row=0, column=1, padx=4)
+        ttk.Label(frm_f, text="até:").grid(row=0, column=2, sticky="w")
+        ttk.Entry(frm_f, textvariable=self.saldo_max, width=10).grid(row=0, column=3, padx=4)
+
+        vendedores = [""]
+        if "VendedorArquivo" in self.df.columns:
+            vendedores += sorted(self.df["VendedorArquivo"].astype(str).unique().tolist())
+        ttk.Label(frm_f, text="Vendedor:").grid(row=0, column=4, sticky="w", padx=(10, 0))
+        ttk.Combobox(frm_f, textvariable=self.vendedor, values=vendedores, width=24,
+                     state="readonly").grid(row=0, column=5, padx=4)
+
+        ttk.Label(frm_f, text="Telefone:").grid(row=0, column=6, sticky="w", padx=(10, 0))
+        ttk.Combobox(frm_f, textvariable=self.telefone, values=("todos", "com", "sem"), width=6,
+                     state="readonly").grid(row=0, column=7, padx=4)
+        ttk.Button(frm_f, text="Filtrar", command=self.aplicar_filtros).grid(row=0, column=8, padx=6)
+
+        frm_t = ttk.Frame(self); frm_t.pack(fill="both", expand=True, padx=8)
+        self.tree = ttk.Treeview(frm_t, columns=self.COLUNAS, show="headings", selectmode="extended")
+        for col in self.COLUNAS:
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar(c))
+            self.tree.column(col, width=320 if col == "Cliente" else 110, anchor="e" if col == "Saldo" else "w")
+        sb = ttk.Scrollbar(frm_t, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+
+        frm_nav = ttk.Frame(self); frm_nav.pack(fill="x", padx=8, pady=6)
+        ttk.Button(frm_nav, text="◀", width=3, command=lambda: self.ir_pagina(self.pagina - 1)).pack(side="left")
+        ttk.Button(frm_nav, text="▶", width=3, command=lambda: self.ir_pagina(self.pagina + 1)).pack(side="left", padx=4)
+        self.lbl_status = ttk.Label(frm_nav, text="")
+        self.lbl_status.pack(side="left", padx=8)
+        ttk.Button(frm_nav, text="Usar este recorte na cobrança",
+                   command=self.usar_recorte).pack(side="right")
+        ttk.Button(frm_nav, text="Remover selecionados",
+                   command=self.remover_selecionados).pack(side="right", padx=6)
+
+    @staticmethod
+    def _num(txt: str) -> Optional[float]:
+        txt = txt.strip()
+        if not txt:
+            return None
+        try:
+            return br_to_float(txt) if "," in txt else float(txt)
+        except ValueError:
+            return None
+
+    def aplicar_filtros(self):
+        self.idx = filtra_consolidado(
+            self.df, self.app.telefones_map,
+            saldo_min=self._num(self.saldo_min.get()),
+            saldo_max=self._num(self.saldo_max.get()),
+            vendedor=self.vendedor.get(),
+            telefone=self.telefone.get(),
+            ordenar_por=self.ordem_col,
+            crescente=self.ordem_cresc,
+        )
+        self.soma = float(pd.to_numeric(self.df.loc[self.idx, "Saldo"], errors="coerce").sum())
+        self.ir_pagina(0)
+
+    def ordenar(self, col: str):
+        if col == "Telefone":
+            return
+        self.ordem_cresc = not self.ordem_cresc if self.ordem_col == col else (col != "Saldo")
+        self.ordem_col = col
+        self.aplicar_filtros()
+
+    def ir_pagina(self, n: int):
+        total = len(self.idx)
+        ultima = max(0, (total - 1) // PREVIEW_PAGINA)
+        self.pagina = min(max(0, n), ultima)
+        ini = self.pagina * PREVIEW_PAGINA
+        pag = self.df.loc[self.idx[ini:ini + PREVIEW_PAGINA]]
+
+        self.tree.delete(*self.tree.get_children())
+        tel = self.app.telefones_map
+        vend_col = "VendedorArquivo" in pag.columns
+        for i, r in zip(pag.index, pag.itertuples(index=False)):
+            cod = str(r.Codigo4d)
+            saldo = pd.to_numeric(r.Saldo, errors="coerce")
+            self.tree.insert("", "end", iid=str(i), values=(
+                cod, r.Cliente, formata_brl(float(saldo)) if pd.notna(saldo) else "",
+                r.VendedorArquivo if vend_col else "", tel.get(cod, ""),
+            ))
+
+        self.lbl_status.config(text=f"Página {self.pagina + 1}/{ultima + 1} • "
+                                    f"{total} clientes • R$ {formata_brl(self.soma)}")
+
+    def remover_selecionados(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        fora = pd.Index([int(i) for i in sel])
+        self.soma -= float(pd.to_numeric(self.df.loc[fora, "Saldo"], errors="coerce").sum())
+        self.df = self.df.drop(index=fora)
+        self.idx = self.idx.difference(fora, sort=False)
+        self.ir_pagina(self.pagina)
+
+    def usar_recorte(self):
+        self.app.aplica_recorte(self.df.loc[self.idx])
+        self.destroy()
+
+# ---------- Pré-voo de telefones ----------
+class PreflightTelefones(tk.Toplevel):
+    """
+    Grade única com todos os clientes sem telefone. Duplo clique (ou Enter) edita a célula;
+    Ctrl+V cola do Excel: 2 colunas (Codigo4d, Telefone) casam por código, 1 coluna preenche
+    a partir da linha selecionada para baixo. Tudo é gravado numa única escrita no fim.
+    A coluna Sugestão traz o telefone já conhecido sob o mesmo nome ou nome parecido (índice
+    de nomes). "Usar mesmo nome" preenche em lote só o nome idêntico (normalizado); nome
+    parecido pode ser outro cliente e é aceito linha a linha (Ctrl+Enter ou botão).
+    """
+    COLUNAS = ("Codigo4d", "Cliente", "Saldo", "Telefone", "Sugestão")
+
+    def __init__(self, app: "App", faltando: pd.DataFrame):
+        super().__init__(app)
+        self.app = app
+        self.confirmado = False
+        self.title(f"Pré-voo • {len(faltando)} clientes sem telefone")
+        self.geometry("1040x520")
+        self.grab_set()
+
+        ttk.Label(self, text="Preencha os telefones (DDD + número). Cole do Excel com Ctrl+V. "
+                             "Quem ficar em branco será PULADO.").pack(anchor="w", padx=8, pady=(8, 4))
+        frm_t = ttk.Frame(self); frm_t.pack(fill="both", expand=True, padx=8)
+        self.tree = ttk.Treeview(frm_t, columns=self.COLUNAS, show="headings", selectmode="browse")
+        for col in self.COLUNAS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width={"Cliente": 300, "Sugestão": 320}.get(col, 110),
+                             anchor="e" if col == "Saldo" else "w")
+        sb = ttk.Scrollbar(frm_t, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+
+        self._mesmo_nome: dict[str, str] = {}    # iid → telefone do mesmo nome normalizado (lote)
+        self._parecidos: dict[str, str] = {}     # iid → telefone de nome parecido (aceite por linha)
+        for r in faltando.itertuples(index=False):
+            texto = ""
+            tel = app.telefone_mesmo_nome(r.Cliente)
+            if tel:
+                self._mesmo_nome[r.Codigo4d] = tel
+                texto = f"{tel} • mesmo nome"
+            else:
+                sug = app.sugestoes_telefone(r.Cliente)[:1]
+                if sug and sug[0][0] >= INDICE_LIMIAR:
+                    sim, nome, cod, tel = sug[0]
+                    self._parecidos[r.Codigo4d] = tel
+                    texto = f"{tel} • parecido: {nome} ({cod}, {sim:.0%})"
+            self.tree.insert("", "end", iid=r.Codigo4d, values=(r.Codigo4d, r.Cliente, formata_brl(r.Saldo), "", texto))
+
+        self.lbl = ttk.Label(self, text="")
+        self.lbl.pack(anchor="w", padx=8)
+        frm = ttk.Frame(self); frm.pack(fill="x", padx=8, pady=8)
+        ttk.Button(frm, text="Salvar e iniciar cobrança", command=self.salvar).pack(side="right")
+        ttk.Button(frm, text="Iniciar sem salvar (pular faltantes)", command=self.pular).pack(side="right", padx=6)
+        ttk.Button(frm, text="Cancelar", command=self.destroy).pack(side="left")
+        if self._mesmo_nome:
+            ttk.Button(frm, text=f"Usar mesmo nome ({len(self._mesmo_nome)})",
+                       command=self.usar_sugestoes).pack(side="left", padx=6)
+        if self._parecidos:
+            ttk.Button(frm, text="Aceitar sugestão da linha (Ctrl+Enter)",
+                       command=self.aceitar_sugestao).pack(side="left", padx=6)
+
+        self._editor: Optional[ttk.Entry] = None
+        self.tree.bind("<Double-1>", self._editar)
+        self.tree.bind("<Return>", self._editar)
+        self.bind("<Control-v>", self._colar)
+        self.bind("<Control-V>", self._colar)
+        self.tree.bind("<Control-Return>", self.aceitar_sugestao)
+        self._atualiza_contagem()
+
+    def _atualiza_contagem(self):
+        preenchidos = sum(1 for i in self.tree.get_children() if self.tree.set(i, "Telefone").strip())
+        self.lbl.config(text=f"{preenchidos} de {len(self.tree.get_children())} preenchidos")
+
+    def _editar(self, event=None):
+        iid = self.tree.focus()
+        if not iid:
+            return
+        bbox = self.tree.bbox(iid, "Telefone")
+        if not bbox:
+            return
+        x, y, w, h = bbox
+        var = tk.StringVar(value=self.tree.set(iid, "Telefone"))
+        ent = ttk.Entry(self.tree, textvariable=var)
+        ent.place(x=x, y=y, width=w, height=h)
+        ent.focus_set()
+        self._editor = ent
+
+        def fecha(_e=None, proximo: bool = False, grava: bool = True):
+            if self._editor is not ent:
+                return  # já fechado (FocusOut disparado pelo destroy)
+            self._editor = None
+            if grava:
+                self.tree.set(iid, "Telefone", var.get().strip())
+            ent.destroy()
+            self._atualiza_contagem()
+            if proximo:
+                nxt = self.tree.next(iid)
+                if nxt:
+                    self.tree.selection_set(nxt); self.tree.focus(nxt); self.tree.see(nxt)
+                    self._editar()
+        ent.bind("<Return>", lambda e: fecha(proximo=True))
+        ent.bind("<FocusOut>", fecha)
+        ent.bind("<Escape>", lambda e: fecha(grava=False))
+        return "break"
+
+    def _colar(self, event=None):
+        if self._editor is not None:
+            return  # colagem normal dentro do campo em edição
+        try:
+            texto = self.clipboard_get()
+        except tk.TclError:
+            return "break"
+        linhas = [ln.split("\t") for ln in texto.splitlines() if ln.strip()]
+        if not linhas:
+            return "break"
+
+        if all(len(ln) >= 2 for ln in linhas):
+            # Codigo4d <tab> Telefone → casa pelo código
+            for ln in linhas:
+                iid = _norm_code(ln[0])
+                if iid and self.tree.exists(iid):
+                    self.tree.set(iid, "Telefone", ln[1].strip())
+        else:
+            # só telefones → preenche da linha selecionada para baixo
+            itens = list(self.tree.get_children())
+            foco = self.tree.focus()
+            ini = itens.index(foco) if foco in itens else 0
+            for iid, ln in zip(itens[ini:], linhas):
+                self.tree.set(iid, "Telefone", ln[0].strip())
+        self._atualiza_contagem()
+        return "break"
+
+    def usar_sugestoes(self):
+        """Preenche com o telefone do mesmo nome só as linhas ainda em branco."""
+        for iid, tel in self._mesmo_nome.items():
+            if not self.tree.set(iid, "Telefone").strip():
+                self.tree.set(iid, "Telefone", tel)
+        self._atualiza_contagem()
+
+    def aceitar_sugestao(self, event=None):
+        """Operador conferiu a linha selecionada: usa a sugestão dela (mesmo nome ou parecido)."""
+        iid = self.tree.focus()
+        tel = self._mesmo_nome.get(iid) or self._parecidos.get(iid)
+        if tel:
+            self.tree.set(iid, "Telefone", tel)
+            self._atualiza_contagem()
+            nxt = self.tree.next(iid)
+            if nxt:
+                self.tree.selection_set(nxt); self.tree.focus(nxt); self.tree.see(nxt)
+        return "break"
+
+    def salvar(self):
+        pares = {i: self.tree.set(i, "Telefone") for i in self.tree.get_children()
+                 if self.tree.set(i, "Telefone").strip()}
+        _, invalidos = self.app._salva_telefones_lote(pares) if pares else ({}, {})
+        if invalidos and not messagebox.askyesno(
+                "Pré-voo", f"{len(invalidos)} telefones inválidos serão pulados. Iniciar mesmo assim?", parent=self):
+            return
+        self.confirmado = True
+        self.destroy()
+
+    def pular(self):
+        self.confirmado = True
+        self.destroy()
@@ -1,3 +1,7 @@
+// API local de consultas (python api_cobranca.py). Servida pela própria API → mesma origem;
+// aberto como arquivo (file://) → usa a porta padrão em 127.0.0.1.
+const API_URL = location.protocol.startsWith('http') ? '' : 'http://127.0.0.1:8765';
+
 function toggleChat() {
     const popup = document.getElementById('chatPopup');
     const notification = document.getElementById('notification');
@@ -12,23 +16,46 @@ function toggleChat() {
     notification.style.display = 'none';
   }
   
-  function sendMessage() {
-    const userInput = document.getElementById('userMessage').value.trim();
+  function addLine(author, text) {
     const chatBody = document.querySelector('.chat-body');
+    const line = document.createElement('p');
+    const who = document.createElement('strong');
+    who.textContent = `${author}:`;
+    line.append(who, ` ${text}`);   // textContent: nada do usuário/API vira HTML
+    chatBody.appendChild(line);
+
+    // Scroll automático para baixo
+    chatBody.scrollTop = chatBody.scrollHeight;
+    return line;
+  }
+
+  async function sendMessage() {
+    const userInput = document.getElementById('userMessage').value.trim();
   
     if (userInput !== '') {
       // Adiciona a mensagem no chat
-      const userMessage = document.createElement('p');
-      userMessage.innerHTML = `<strong>Você:</strong> ${userInput}`;
-      chatBody.appendChild(userMessage);
+      addLine('Você', userInput);
   
       // Limpa o campo
       document.getElementById('userMessage').value = '';
-  
-      // Scroll automático para baixo
-      chatBody.scrollTop = chatBody.scrollHeight;
+
+      const pending = addLine('Bot', '…');
+      try {
+        const resp = await fetch(`${API_URL}/api/pergunta`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ q: userInput }),
+        });
+        const data = await resp.json();
+        pending.lastChild.textContent = ` ${data.resposta || data.erro || 'Sem resposta.'}`;
+      } catch (e) {
+        pending.lastChild.textContent = ' Serviço de consultas fora do ar (rode: python api_cobranca.py).';
+      }
     } else {
       alert('Por favor, digite uma solicitação.');
     }
   }
-  
\ No newline at end of file
+
+  document.getElementById('userMessage').addEventListener('keydown', (e) => {
+    if (e.key === 'Enter') sendMessage();
+  });
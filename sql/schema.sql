@@ -0,0 +1,71 @@
+-- schema.sql — Base SQLite do agente de cobrança (p/ Power BI / Excel / consultas)
+-- Carregada por cobra.abre_banco(); tudo é idempotente (IF NOT EXISTS).
+
+-- Saldos consolidados: um retrato por dia de referência; reconverter no mesmo dia sobrescreve.
+CREATE TABLE IF NOT EXISTS saldos (
+    data_ref          TEXT    NOT NULL,          -- AAAA-MM-DD da conversão
+    codigo4d          TEXT    NOT NULL,
+    cliente           TEXT    NOT NULL,
+    saldo             REAL    NOT NULL,
+    vendedor_arquivo  TEXT,
+    arquivo_origem    TEXT,
+    carregado_em      TEXT    NOT NULL,
+    PRIMARY KEY (data_ref, codigo4d)
+);
+CREATE INDEX IF NOT EXISTS ix_saldos_codigo ON saldos (codigo4d);
+
+-- Linhas dos log_cobrancas_*.csv (uma por tentativa de contato)
+CREATE TABLE IF NOT EXISTS cobrancas (
+    arquivo           TEXT    NOT NULL,          -- nome do log de origem
+    linha             INTEGER NOT NULL,          -- nº da linha de dados no log (1 = 1ª após o cabeçalho)
+    timestamp         TEXT    NOT NULL,          -- AAAA-MM-DD HH:MM:SS
+    data              TEXT    NOT NULL,          -- AAAA-MM-DD (p/ filtros/agrupamentos por dia)
+    origem            TEXT,
+    vendedor_arquivo  TEXT,
+    codigo4d          TEXT    NOT NULL,
+    cliente           TEXT,
+    saldo             REAL,
+    telefone          TEXT,
+    status            TEXT    NOT NULL,
+    canal             TEXT,
+    url               TEXT,
+    remetente         TEXT,
+    PRIMARY KEY (arquivo, linha)
+);
+CREATE INDEX IF NOT EXISTS ix_cobrancas_codigo ON cobrancas (codigo4d);
+CREATE INDEX IF NOT EXISTS ix_cobrancas_data ON cobrancas (data);
+CREATE INDEX IF NOT EXISTS ix_cobrancas_status_data ON cobrancas (status, data);
+
+-- Controle da carga incremental: log já carregado com o mesmo hash é pulado
+CREATE TABLE IF NOT EXISTS cargas (
+    arquivo           TEXT    PRIMARY KEY,
+    sha256            TEXT    NOT NULL,
+    linhas            INTEGER NOT NULL,
+    carregado_em      TEXT    NOT NULL
+);
+
+-- Última tentativa por cliente (atalho p/ BI)
+-- mesmos status de cobra.STATUS_ABERTOS; recriada a cada abertura p/ bases antigas pegarem a definição atual
+DROP VIEW IF EXISTS ultimo_contato;
+CREATE VIEW ultimo_contato AS
+SELECT codigo4d, MAX(timestamp) AS ultimo_timestamp, COUNT(*) AS tentativas
+FROM cobrancas
+WHERE status IN ('ENVIADO', 'ABERTO_NAO_ENVIADO', 'NUMERO_INVALIDO')
+GROUP BY codigo4d;
+
+-- KPIs diários por vendedor (espelho de saidas/kpis_cobranca.csv, mantido por cobra.atualiza_kpis)
+CREATE TABLE IF NOT EXISTS kpis_diarios (
+    data                  TEXT    NOT NULL,      -- AAAA-MM-DD
+    vendedor_arquivo      TEXT    NOT NULL,
+    tentativas            INTEGER NOT NULL,
+    enviados              INTEGER NOT NULL,
+    abertos_nao_enviados  INTEGER NOT NULL,
+    pulados               INTEGER NOT NULL,
+    invalidos             INTEGER NOT NULL,
+    mortos                INTEGER NOT NULL,
+    nao_contatar          INTEGER NOT NULL,
+    duplicados            INTEGER NOT NULL,
+    erros                 INTEGER NOT NULL,
+    saldo_coberto         REAL    NOT NULL,      -- soma do saldo dos ENVIADO
+    PRIMARY KEY (data, vendedor_arquivo)
+);
@@ -0,0 +1,13 @@
+# Testes das funções puras do cobra.py (sem WhatsApp, sem tela).
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def _pasta_temporaria(tmp_path, monkeypatch):
+    """SAIDAS é relativa (saidas/): cada teste roda numa pasta própria."""
+    monkeypatch.chdir(tmp_path)
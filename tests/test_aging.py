@@ -0,0 +1,70 @@
+import pandas as pd
+
+import cobra
+
+HOJE = pd.Timestamp("2025-08-31")
+
+
+def _titulos(*dias_e_valores, cod="0012"):
+    return pd.DataFrame({
+        "Codigo4d": cod, "Cliente": "ANA", "Documento": [f"NF {i}" for i in range(len(dias_e_valores))],
+        "Vencimento": [HOJE - pd.Timedelta(days=d) for d, _ in dias_e_valores],
+        "Valor": [float(v) for _, v in dias_e_valores],
+    })
+
+
+def test_re_titulo_pega_o_ultimo_vencimento_e_o_ultimo_valor():
+    m = cobra.RE_TITULO.match("NF 123 01/07/2025 05.08.25 parcela 1 1.234,56")
+    assert (m.group("doc"), m.group("venc"), m.group("valor")) == ("NF 123", "05.08.25", "1.234,56")
+    assert cobra.RE_TITULO.match("NF 123 sem vencimento 10,00") is None
+    assert cobra.RE_TITULO.match("NF 123 05/08/2025 sem valor") is None
+
+
+def test_extrai_titulos_mistura_clientes_titulos_e_totais():
+    linhas = [
+        "NF 1 05/08/2025 99,00",            # antes de qualquer cliente: ignorado
+        "0012 ANA SILVA",
+        "NF 10 01/07/2025 05/08/2025 100,00",
+        "NF 11 31/02/2025 50,00",           # data impossível: fora
+        "SALDO 05/08/2025 150,00",          # saldo/total não é título
+        "0034 BIA",
+        "DUP 20-09-25 1.000,00",
+        "TOTAL DO CLIENTE 31/08/2025 1.000,00",
+    ]
+    t = cobra.extrai_titulos_de_linhas(linhas)
+    assert list(t.columns) == cobra.TITULOS_COLUNAS
+    assert t[["Codigo4d", "Cliente", "Documento", "Valor"]].values.tolist() == [
+        ["0012", "ANA SILVA", "NF 10", 100.0], ["0034", "BIA", "DUP", 1000.0]]
+    assert list(t["Vencimento"]) == [pd.Timestamp("2025-08-05"), pd.Timestamp("2025-09-20")]
+
+
+def test_extrai_titulos_sem_titulos():
+    t = cobra.extrai_titulos_de_linhas(["0012 ANA", "SALDO 10,00"])
+    assert t.empty and list(t.columns) == cobra.TITULOS_COLUNAS
+
+
+def test_faixas_nas_fronteiras():
+    dias = [-10, -1, 0, 30, 31, 60, 61, 90, 91]
+    t = cobra.aging_titulos(_titulos(*[(d, 1) for d in dias]), hoje=HOJE)
+    assert t["DiasAtraso"].tolist() == dias
+    assert t["Faixa"].astype(str).tolist() == [
+        "a vencer", "a vencer", "0-30", "0-30", "31-60", "31-60", "61-90", "61-90", "90+"]
+
+
+def test_resumo_e_detalhes_por_cliente():
+    t = pd.concat([_titulos((-5, 10), (15, 100), (95, 1234.5)),
+                   _titulos((-3, 70), cod="0034")], ignore_index=True)
+    r = cobra.resumo_aging(t, hoje=HOJE).set_index("Codigo4d")
+    assert r.loc["0012", list(cobra.FAIXAS_AGING)].tolist() == [10.0, 100.0, 0.0, 0.0, 1234.5]
+    assert r.loc["0012", ["Total", "Vencido", "Titulos", "DiasAtraso"]].tolist() == [1344.5, 1334.5, 3, 95]
+    assert r.loc["0034", ["Vencido", "DiasAtraso"]].tolist() == [0.0, 0]    # só a vencer: sem atraso negativo
+
+    det = cobra.detalhes_aging(r.reset_index())
+    assert det["0012"] == {"titulos": "3", "dias_atraso": "95", "vencido_brl": "1.334,50",
+                           "aging": "0-30: R$ 100,00 • 90+: R$ 1.234,50"}
+    assert det["0034"] == {"titulos": "1", "dias_atraso": "0", "vencido_brl": "0,00", "aging": ""}
+
+
+def test_detalhes_aging_vazio():
+    vazio = cobra.resumo_aging(cobra.extrai_titulos_de_linhas([]), hoje=HOJE)
+    assert cobra.detalhes_aging(vazio) == {}
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import api_cobranca
+
+
+async def _requisicao(bruta: bytes, origens=frozenset()) -> bytes:
+    api = api_cobranca.ServidorAPI(api_cobranca.Path("."), origens)
+    srv = await asyncio.start_server(api.atende, "127.0.0.1", 0)
+    porta = srv.sockets[0].getsockname()[1]
+    async with srv:
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        writer.write(bruta)
+        await writer.drain()
+        resp = await reader.read()
+        writer.close()
+    return resp
+
+
+def _get(origem: str) -> bytes:
+    return (f"GET /nao-existe HTTP/1.1\r\nHost: x\r\nOrigin: {origem}\r\n"
+            "Connection: close\r\n\r\n").encode()
+
+
+def test_cors_so_para_arquivo_local_e_propria_origem():
+    origens = api_cobranca.origens_permitidas("127.0.0.1", 8765)
+    assert "http://localhost:8765" in origens
+    r = asyncio.run(_requisicao(_get("null"), origens))
+    assert b"Access-Control-Allow-Origin: null\r\n" in r
+    r = asyncio.run(_requisicao(_get("http://localhost:8765"), origens))
+    assert b"Access-Control-Allow-Origin: http://localhost:8765\r\n" in r
+    r = asyncio.run(_requisicao(_get("https://site-qualquer.example"), origens))
+    assert r.startswith(b"HTTP/1.1 404") and b"Access-Control-Allow-Origin" not in r
+
+
+def test_content_length_invalido_da_400():
+    for valor in (b"abc", b"-5"):
+        r = asyncio.run(_requisicao(b"POST /api/pergunta HTTP/1.1\r\nContent-Length: " + valor + b"\r\n\r\n"))
+        assert r.startswith(b"HTTP/1.1 400") and b"Connection: close" in r
+
+
+def test_responde_top_e_codigo_antes_do_progresso(monkeypatch):
+    monkeypatch.setattr(api_cobranca, "resp_progresso", lambda ix: ("progresso",))
+    monkeypatch.setattr(api_cobranca, "resp_top", lambda ix, n, vend: ("top", n, vend))
+    monkeypatch.setattr(api_cobranca, "resp_saldo", lambda ix, cod: ("saldo", cod))
+    r = api_cobranca.responde
+    assert r(None, "top 5 devedores ainda não enviados") == ("top", 5, "")
+    assert r(None, "saldo do cliente 0123 na campanha") == ("saldo", "0123")
+    assert r(None, "progresso da campanha") == ("progresso",)
+    assert r(None, "quantos já foram enviados?") == ("progresso",)
+    assert r(None, "como vai a campanha?")["tipo"] == "ajuda"
+
+
+def test_api_importa_sem_tkinter():
+    # servidor sem tela: o cobra não pode puxar o Tk no import (só a GUI, em cobra_gui)
+    repo = Path(api_cobranca.__file__).parent
+    r = subprocess.run([sys.executable, "-c", "import sys; sys.modules['tkinter'] = None; import api_cobranca"],
+                       env={**os.environ, "PYTHONPATH": str(repo)}, capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
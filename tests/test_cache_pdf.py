@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+import cobra
+
+pytest.importorskip("pdfplumber")
+canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+
+
+def _pdf_com_form(caminho, texto, aninhado=False):
+    """Página cujo content stream é só 'Do' de um Form XObject; o texto fica dentro do form."""
+    c = canvas.Canvas(str(caminho))
+    if aninhado:
+        c.beginForm("interno")
+        c.drawString(72, 700, texto)
+        c.endForm()
+    c.beginForm("corpo")
+    if aninhado:
+        c.doForm("interno")
+    else:
+        c.drawString(72, 700, texto)
+    c.endForm()
+    c.doForm("corpo")
+    c.showPage()
+    c.save()
+    return caminho
+
+
+def _hash(caminho):
+    import pdfplumber
+    with pdfplumber.open(caminho) as pdf:
+        return cobra._hash_pagina(pdf.pages[0])
+
+
+@pytest.mark.parametrize("aninhado", [False, True])
+def test_texto_dentro_de_form_xobject_muda_o_hash(tmp_path, aninhado):
+    a = _pdf_com_form(tmp_path / "a.pdf", "CLIENTE 0001 SALDO 100,00", aninhado)
+    b = _pdf_com_form(tmp_path / "b.pdf", "CLIENTE 0002 SALDO 999,00", aninhado)
+    a2 = _pdf_com_form(tmp_path / "a2.pdf", "CLIENTE 0001 SALDO 100,00", aninhado)
+    assert _hash(a) and _hash(a) != _hash(b)
+    assert _hash(a) == _hash(a2)                     # mesma página → reaproveita
+
+
+def test_cache_nao_devolve_texto_de_outro_form(tmp_path):
+    cache = tmp_path / "cache"
+    a = _pdf_com_form(tmp_path / "a.pdf", "CLIENTE 0001 SALDO 100,00")
+    b = _pdf_com_form(tmp_path / "b.pdf", "CLIENTE 0002 SALDO 999,00")
+    st: dict = {}
+    assert "0001" in " ".join(cobra.extrai_texto_pdf(a, cache=cache, stats=st))
+    assert "0002" in " ".join(cobra.extrai_texto_pdf(b, cache=cache, stats=st))
+    assert "0001" in " ".join(cobra.extrai_texto_pdf(a, cache=cache, stats=st))
+    assert st == {"paginas": 3, "reaproveitadas": 1}
+
+
+def test_poda_por_idade_e_tamanho(tmp_path):
+    velho = time.time() - 90 * 86400
+    for i in range(4):
+        arq = tmp_path / f"{i}.txt"
+        arq.write_bytes(b"x" * 400_000)
+        os.utime(arq, (velho if i == 0 else time.time() - i, velho if i == 0 else time.time() - i))
+    assert cobra.poda_cache_pdf(tmp_path, max_mb=1, dias=60) == 2   # 0 (idade) e 3 (o de uso mais antigo)
+    assert sorted(p.name for p in tmp_path.glob("*.txt")) == ["1.txt", "2.txt"]
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import cobra
+
+
+def _df():
+    linhas = []
+    for v, qtd in (("V1", 5), ("V2", 3), ("V3", 2)):
+        for i in range(qtd):
+            linhas.append((f"{v[1]}{i:03d}", f"CLIENTE {v}{i}", 100.0 + i, v))
+    return pd.DataFrame(linhas, columns=["Codigo4d", "Cliente", "Saldo", "VendedorArquivo"])
+
+
+def test_divisao_por_vendedor_mantem_vendedor_inteiro():
+    shards = cobra.divide_campanha(_df(), 2, "vendedor")
+    assert sorted(len(s) for s in shards) == [5, 5]                  # V1 | V2+V3
+    for s in shards:
+        for vend in s["VendedorArquivo"].unique():
+            assert sum(vend in set(o["VendedorArquivo"]) for o in shards) == 1
+
+
+def test_divisao_rodizio():
+    df = _df()
+    shards = cobra.divide_campanha(df, 3, "rodizio")
+    assert [len(s) for s in shards] == [4, 3, 3]
+    assert shards[1]["Codigo4d"].tolist() == df["Codigo4d"].iloc[1::3].tolist()
+    assert cobra.divide_campanha(df, 1, "rodizio")[0] is df
+
+
+def test_remetente_e_abstrato():
+    with pytest.raises(TypeError):
+        cobra.Remetente()
+
+
+@pytest.mark.parametrize("por", ["vendedor", "rodizio"])
+def test_campanha_com_stubs_deduplica_e_grava_um_log(tmp_path, por):
+    df = _df()
+    # o mesmo cliente aparece em dois vendedores (shards diferentes na divisão por vendedor)
+    df = pd.concat([df, pd.DataFrame([("1000", "CLIENTE V10", 100.0, "V3")], columns=df.columns)],
+                   ignore_index=True)
+    telefones = {c: f"55119{int(c):08d}" for c in df["Codigo4d"] if c != "2002"}
+    rems = [cobra.RemetenteStub(f"stub{i}", seed=i) for i in range(3)]
+    log_path = tmp_path / "log_cobrancas_teste.csv"
+    with cobra.RegistroCampanha(log_path, "teste", len(df), log=lambda m: None) as reg:
+        cobra.executa_campanha(df, rems, reg, telefones, "Olá {cliente}", por=por)
+
+    log = pd.read_csv(log_path, sep=";", dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    assert list(log.columns) == cobra.LOG_HEADERS
+    assert len(log) == len(df) and reg.processados == len(df)
+    assert (log["status"] == "DUPLICADO").sum() == 1
+    assert log.loc[log["codigo4d"] == "2002", "status"].tolist() == ["PULADO"]
+    assert set(log["remetente"]) <= {r.nome for r in rems} and len(set(log["remetente"])) > 1
+    enviados = sum(len(r.enviados) for r in rems)
+    assert enviados == len(df) - 2                                     # menos o duplicado e o pulado
+    assert log.loc[log["codigo4d"] == "1000", "status"].isin(["ENVIADO", "ABERTO_NAO_ENVIADO"]).sum() == 1
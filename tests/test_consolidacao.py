@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+import cobra
+
+
+def _df(linhas):
+    return pd.DataFrame(linhas, columns=["Codigo4d", "Cliente", "Saldo", "VendedorArquivo"])
+
+
+def _saldos(consol):
+    return consol.resultado().set_index("Codigo4d")["Saldo"].to_dict()
+
+
+def test_recente_vale_o_arquivo_mais_novo():
+    c = cobra.ConsolidadorClientes("recente")
+    c.adiciona(_df([("12", "ANA", 100.0, "V1"), ("0034", "BIA", 50.0, "V1")]), mtime=2, arquivo="novo.csv")
+    c.adiciona(_df([("0012", "ANA", 80.0, "V1")]), mtime=1, arquivo="velho.csv")
+    assert _saldos(c) == {"0012": 100.0, "0034": 50.0}
+    assert c.linhas_lidas == 3
+    rel = c.relatorio_conflitos()
+    assert rel[["Codigo4d", "Tipo", "ArquivoVencedor"]].values.tolist() == [["0012", "divergencia", "novo.csv"]]
+
+
+def test_maior_vale_o_maior_saldo():
+    c = cobra.ConsolidadorClientes("maior")
+    c.adiciona(_df([("0012", "ANA", 100.0, "V1")]), mtime=1, arquivo="a.csv")
+    c.adiciona(_df([("0012", "ANA", 80.0, "V1")]), mtime=2, arquivo="b.csv")
+    assert _saldos(c) == {"0012": 100.0}
+
+
+def test_soma_vendedor_soma_e_reporta_sobreposicao():
+    c = cobra.ConsolidadorClientes("soma_vendedor")
+    c.adiciona(_df([("0012", "ANA", 100.0, "V1"), ("0034", "BIA", 10.0, "V1")]), mtime=1, arquivo="v1_old.csv")
+    c.adiciona(_df([("0012", "ANA", 120.0, "V1")]), mtime=2, arquivo="v1_new.csv")
+    c.adiciona(_df([("0012", "ANA", 30.0, "V2")]), mtime=1, arquivo="v2.csv")
+    assert _saldos(c) == {"0012": 150.0, "0034": 10.0}
+
+    rel = c.relatorio_conflitos()
+    assert sorted(rel["Tipo"]) == ["divergencia", "soma_entre_vendedores"]
+    sob = rel[rel["Tipo"] == "soma_entre_vendedores"].iloc[0]
+    assert (sob["VendedorA"], sob["VendedorB"], sob["SaldoVencedor"]) == ("V1", "V2", 150.0)
+    assert sob["ArquivoVencedor"] == "v1_new.csv+v2.csv"
+
+
+def test_regra_desconhecida():
+    with pytest.raises(ValueError):
+        cobra.ConsolidadorClientes("media")
@@ -0,0 +1,46 @@
+import json
+
+import cobra
+
+LINHAS = [
+    "RELATORIO DE CLIENTES",          # antes de qualquer cliente: sem match
+    "0012 ANA SILVA",
+    "NF 123 10/01/2025 100,00",
+    "SALDO DO CLIENTE 150,00",        # linha de total define o saldo
+    "0034 BIA",
+    "qualquer coisa",                 # sem valor: sem match
+    "NF 9 50,00",                     # saldo veio de linha que não é total
+    "0056 CAIO",                      # cliente sem valor
+]
+
+
+def test_resultado_igual_com_e_sem_diag():
+    sem = cobra.extrai_clientes_saldos_de_linhas(LINHAS)
+    com = cobra.extrai_clientes_saldos_de_linhas(LINHAS, diag=cobra.DiagnosticoParser("x.pdf"))
+    assert sem.values.tolist() == [["0012", "ANA SILVA", 150.0], ["0034", "BIA", 50.0]]
+    assert com.equals(sem)
+
+
+def test_contadores_e_amostras():
+    diag = cobra.DiagnosticoParser("x.pdf")
+    cobra.extrai_clientes_saldos_de_linhas(LINHAS, diag=diag)
+    d = diag.to_dict()
+    assert d["arquivo"] == "x.pdf"
+    assert d["linhas"] == 8
+    assert d["clientes"] == 3 and d["clientes_sem_valor"] == 1
+    assert (d["regex"]["RE_CLIENTE"]["chamadas"], d["regex"]["RE_CLIENTE"]["acertos"]) == (8, 3)
+    assert (d["regex"]["RE_VALOR_BR"]["chamadas"], d["regex"]["RE_VALOR_BR"]["acertos"]) == (4, 3)
+    assert d["override_saldo_total"] == 1
+    assert d["linhas_sem_match"] == {"total": 2, "amostra": ["RELATORIO DE CLIENTES", "qualquer coisa"]}
+    assert d["clientes_valor_fora_de_total"] == {
+        "total": 1, "amostra": [{"Codigo4d": "0034", "Cliente": "BIA", "Saldo": 50.0}]}
+
+
+def test_amostra_limitada_e_salva(tmp_path):
+    diag = cobra.DiagnosticoParser("x.pdf", max_amostras=1)
+    cobra.extrai_clientes_saldos_de_linhas(LINHAS, diag=diag)
+    assert diag.sem_match["total"] == 2
+    assert len(diag.sem_match["amostra"]) == 1
+    assert diag.sem_match["amostra"][0] in ("RELATORIO DE CLIENTES", "qualquer coisa")
+    salvo = json.loads(diag.salva(tmp_path / "diag.json").read_text(encoding="utf-8"))
+    assert salvo["linhas"] == 8
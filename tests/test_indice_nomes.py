@@ -0,0 +1,25 @@
+import cobra
+
+
+def _indice():
+    idx = cobra.IndiceNomes()
+    idx.adiciona("Mercado São João Ltda", "0001", "5511912345678")
+    idx.adiciona("MERCADO SAO JOAO", "0002", "5511912345678")       # renumerado, mesmo telefone
+    idx.adiciona("Mercado São José", "0003", "5511987654321")
+    idx.adiciona("Padaria Central", "0004", "5511911111111")
+    idx.adiciona("Padaria Central", "0005", "5511922222222")        # homônimo com outro telefone
+    return idx
+
+
+def test_exato_so_com_mesmo_nome_normalizado():
+    idx = _indice()
+    assert idx.exato("mercado são joão")[2] == "5511912345678"
+    assert idx.exato("Mercado São Jose")[2] == "5511987654321"
+    assert idx.exato("Mercado S. João") is None                  # parecido não é exato
+    assert idx.exato("Padaria Central") is None                  # homônimos com telefones diferentes
+
+
+def test_parecido_so_aparece_como_sugestao():
+    idx = _indice()
+    sug = idx.sugere("Mercado S. João")
+    assert sug and sug[0][3] == "5511912345678" and sug[0][0] < 1
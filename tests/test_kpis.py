@@ -0,0 +1,73 @@
+import random
+
+import pandas as pd
+
+import cobra
+
+
+def _linha(rng, dia, i):
+    status = rng.choice(list(cobra.KPIS_STATUS))
+    saldo = f"{rng.randint(1, 99999)},{rng.randint(0, 99):02d}"
+    return [f"2024-05-{dia:02d} 10:{i % 60:02d}:00", "teste", f"V{rng.randint(1, 3)}", f"{i:04d}",
+            f"CLIENTE {i}", saldo, "5511912345678", status, "DESKTOP", "", "desktop1"]
+
+
+def _grava(caminho, linhas, novo=True):
+    with open(caminho, "w" if novo else "a", encoding="utf-8-sig" if novo else "utf-8", newline="") as f:
+        if novo:
+            f.write(";".join(cobra.LOG_HEADERS) + "\n")
+        f.writelines(";".join(ln) + "\n" for ln in linhas)
+
+
+def _recalculo(pasta):
+    kpis = cobra.agrega_kpis(cobra.le_logs_cobranca(pasta))
+    kpis = kpis.groupby(cobra.KPIS_CHAVE, as_index=False).sum()[cobra.KPIS_COLUNAS]
+    kpis["saldo_coberto"] = kpis["saldo_coberto"].round(2)
+    return kpis
+
+
+def _ordena(df):
+    df = df.sort_values(cobra.KPIS_CHAVE).reset_index(drop=True)
+    num = [c for c in cobra.KPIS_COLUNAS if c not in cobra.KPIS_CHAVE]
+    df[num] = df[num].astype(float)
+    return df
+
+
+def test_incremental_igual_ao_recalculo_completo(tmp_path):
+    rng = random.Random(7)
+    kw = dict(pasta=tmp_path, caminho=tmp_path / "kpis.csv", estado=tmp_path / "estado.json")
+    log1 = tmp_path / "log_cobrancas_20240501_100000.csv"
+    _grava(log1, [_linha(rng, 1, i) for i in range(200)])
+    r = cobra.atualiza_kpis(**kw)
+    assert (r["arquivos"], r["linhas"]) == (1, 200)
+
+    # o log cresce (campanha em andamento, última linha pela metade) e chega outro log
+    _grava(log1, [_linha(rng, 2, i) for i in range(200, 350)], novo=False)
+    with open(log1, "a", encoding="utf-8") as f:
+        f.write(";".join(_linha(rng, 2, 350))[:20])
+    _grava(tmp_path / "log_cobrancas_20240502_100000.csv", [_linha(rng, 2, i) for i in range(100)])
+    r = cobra.atualiza_kpis(**kw)
+    assert (r["arquivos"], r["linhas"]) == (2, 250)
+
+    # a linha termina de ser gravada
+    with open(log1, "a", encoding="utf-8") as f:
+        f.write(";".join(_linha(rng, 2, 350))[20:] + "\n")
+    r = cobra.atualiza_kpis(**kw)
+    assert r["linhas"] == 1
+
+    esperado = _ordena(_recalculo(tmp_path))
+    pd.testing.assert_frame_equal(_ordena(r["kpis"]), esperado)
+    pd.testing.assert_frame_equal(_ordena(cobra.le_kpis(kw["caminho"])), esperado)
+    assert cobra.atualiza_kpis(**kw)["linhas"] == 0                   # nada novo: nada relido
+
+
+def test_log_regravado_reconstroi(tmp_path):
+    rng = random.Random(3)
+    kw = dict(pasta=tmp_path, caminho=tmp_path / "kpis.csv", estado=tmp_path / "estado.json")
+    log1 = tmp_path / "log_cobrancas_20240501_100000.csv"
+    _grava(log1, [_linha(rng, 1, i) for i in range(100)])
+    cobra.atualiza_kpis(**kw)
+    _grava(log1, [_linha(rng, 1, i) for i in range(10)])              # encolheu
+    r = cobra.atualiza_kpis(**kw)
+    assert r["linhas"] == 10
+    pd.testing.assert_frame_equal(_ordena(r["kpis"]), _ordena(_recalculo(tmp_path)))
@@ -0,0 +1,17 @@
+import logging
+
+import cobra
+
+
+def test_log_arquivo_so_nasce_no_primeiro_registro(tmp_path):
+    caminho = tmp_path / "saidas" / "agente.log"
+    logger = cobra._cria_logger_arquivo(caminho)
+    try:
+        assert not caminho.parent.exists()
+        logger.info("primeira linha")
+        assert "primeira linha" in caminho.read_text(encoding="utf-8")
+    finally:
+        for h in list(logger.handlers):
+            h.close()
+            logger.removeHandler(h)
+        logging.getLogger("agente_cobranca").handlers.clear()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cobra
+
+
+def test_bloom_sem_falso_negativo_e_fp_perto_do_alvo():
+    rng = np.random.default_rng(0)
+    dentro = rng.integers(10**11, 10**13, 20_000)
+    bloom = cobra.FiltroBloom(len(dentro), fp=0.01)
+    bloom.adiciona(dentro)
+    assert all(bloom.tem(int(v)) for v in dentro)
+    fora = np.setdiff1d(rng.integers(10**11, 10**13, 20_000), dentro)
+    fp = sum(bloom.tem(int(v)) for v in fora) / len(fora)
+    assert fp < 0.03
+
+
+def test_mistura_escalar_igual_a_vetorizada():
+    vals = np.array([0, 1, 12, 5511912345678, 2**62], dtype=np.int64)
+    assert [cobra._mistura64(int(v)) for v in vals] == [int(x) for x in cobra._mistura64_np(vals)]
+
+
+BASE = pd.DataFrame({"Codigo4d": ["0012", "", "0777"],
+                     "Telefone": ["", "5511912345678", "5521988887777"],
+                     "Motivo": ["acordo", "pediu", "jurídico"]})
+
+
+@pytest.mark.parametrize("compacta", [False, True])
+def test_lista_bloqueia_por_codigo_e_telefone(compacta):
+    lista = cobra.ListaNaoContatar(BASE, compacta=compacta)
+    assert lista.compacta is compacta and len(lista) == 3
+    assert lista.bloqueado("0012")
+    assert lista.bloqueado("0001", "5511912345678")
+    assert lista.bloqueado("0777", "")
+    assert not lista.bloqueado("0013", "5511900000000")
+    assert not lista.bloqueado("", "")
+
+    df = pd.DataFrame({"Codigo4d": ["12", "0001", "0002", "0003"], "Cliente": list("ABCD")})
+    tels = {"0001": "5511912345678", "0002": "5511900000000"}
+    liberados, bloqueados = lista.filtra(df, tels)
+    assert bloqueados["Cliente"].tolist() == ["A", "B"]
+    assert liberados["Cliente"].tolist() == ["C", "D"]
+    assert lista.filtra(df)[1]["Cliente"].tolist() == ["A"]      # sem mapa: só por código
+
+
+def test_lista_vazia_libera_todos():
+    lista = cobra.ListaNaoContatar()
+    assert len(lista) == 0 and not lista.bloqueado("0012", "5511912345678")
+
+
+def test_importa_reporta_telefone_invalido(tmp_path):
+    arq = tmp_path / "nao.csv"
+    arq.write_text("Codigo4d;Telefone;Motivo\n"
+                   "12;(11) 91234-5678;acordo\n"
+                   ";11 1234;pediu\n"           # sem código e telefone inválido: antes sumia calado
+                   "34;123;jurídico\n"          # inválido, mas o código ainda bloqueia
+                   ";;\n"
+                   "56;;\n", encoding="utf-8")
+    lista, rejeitados = cobra.importa_nao_contatar(arq)
+    assert lista[["Codigo4d", "Telefone"]].values.tolist() == [
+        ["0012", ""], ["0034", ""], ["0056", ""], ["0012", "5511912345678"]]
+    assert rejeitados[["linha", "Codigo4d", "Telefone", "Motivo"]].values.tolist() == [
+        [3, "", "11 1234", "tamanho inválido"], [4, "0034", "123", "tamanho inválido"]]
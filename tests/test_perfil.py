@@ -0,0 +1,38 @@
+import threading
+
+import cobra
+
+
+def _trabalho(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def test_etapa_aninhada_e_threads_entram_no_relatorio(tmp_path):
+    perfil = cobra.PerfilExecucao()
+    try:
+        with perfil.etapa("externa"):
+            with perfil.etapa("interna"):
+                _trabalho()
+
+        def worker():
+            with perfil.etapa("worker"):
+                _trabalho()
+        ts = [threading.Thread(target=worker, name=f"w{i}") for i in range(3)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+    finally:
+        perfil.encerra()
+
+    interna = perfil.etapas["interna"]
+    assert interna["chamadas"] == 1 and interna["aninhada_em"] == {"externa": 1}
+    worker = perfil.etapas["worker"]
+    assert worker["chamadas"] == 3 and worker["threads"] == {"w0", "w1", "w2"}
+    assert worker["stats"] is not None or worker["sem_perfil"] == 3
+
+    arqs = perfil.salva(tmp_path, "t")
+    rel = (tmp_path / "perfil_t.txt").read_text(encoding="utf-8")
+    assert "aninhada em externa" in rel
+    assert any("interna: " in ln and "aninhada" in ln for ln in perfil.resumo())
+    assert arqs[-1].exists()
@@ -0,0 +1,26 @@
+import threading
+import time
+from datetime import datetime
+
+import cobra
+
+
+def test_espera_fora_da_janela_e_interrompivel():
+    parar = threading.Event()
+    noite = lambda: datetime(2024, 5, 6, 22, 0)
+    lim = cobra.LimitadorEnvio(janela=(8, 20), jitter=0, agora=noite, parar=parar)
+    assert lim.espera_janela() == 10 * 3600
+
+    threading.Timer(0.2, parar.set).start()
+    t0 = time.monotonic()
+    lim.aguarda()
+    assert time.monotonic() - t0 < 5
+    assert lim.interrompido
+    assert lim._usados_dia == 0          # interrompido sem consumir envio
+
+
+def test_dentro_da_janela_nao_espera():
+    lim = cobra.LimitadorEnvio(janela=(8, 20), jitter=0, agora=lambda: datetime(2024, 5, 6, 10, 0))
+    assert lim.espera_janela() == 0
+    assert lim.aguarda() == 0
+    assert not lim.interrompido
@@ -0,0 +1,87 @@
+import cobra
+
+
+class AmbienteGravador:
+    """Ambiente falso: só registra o que seria feito na tela."""
+
+    def __init__(self):
+        self.acoes = []
+        self.clip = ""
+
+    def copiar(self, texto):
+        self.clip = texto
+
+    def ler_clipboard(self):
+        return self.clip
+
+    def abrir_app(self, url):
+        self.acoes.append(("app", url.split("&")[0]))
+
+    def abrir_web(self, url):
+        self.acoes.append(("web", url))
+
+    def dormir(self, s):
+        pass
+
+    def focar_whatsapp(self):
+        return True
+
+    def clicar(self):
+        pass
+
+    def atalho(self, *teclas):
+        self.acoes.append(("atalho",) + teclas)
+
+    def digitar(self, texto, intervalo):
+        self.acoes.append(("digitar", texto))
+
+    def tecla(self, nome):
+        self.acoes.append(("tecla", nome))
+
+
+def _remetente(amb, conhecidos=None):
+    return cobra.RemetenteSessao("s1", 2, True, True, False, False, confirmar=lambda c, n: True,
+                                 ambiente=amb, conhecidos=conhecidos)
+
+
+def test_primeiro_contato_vai_pela_url_e_depois_pela_busca():
+    amb = AmbienteGravador()
+    rem = _remetente(amb)
+    assert rem.auto_enter is False                      # sem como conferir a conversa: sem Enter
+
+    _, canal, _ = rem.enviar("11912345678", "oi", "0001", "ANA")
+    assert canal == "DESKTOP"
+    assert amb.acoes[0] == ("app", "whatsapp://send?phone=5511912345678")
+
+    amb.acoes.clear()
+    _, canal, _ = rem.enviar("(11) 91234-5678", "oi de novo", "0001", "ANA")
+    assert canal == "SESSAO"
+    assert ("digitar", "5511912345678") in amb.acoes
+    assert ("tecla", "enter") in amb.acoes             # só o Enter da busca
+    assert amb.acoes.count(("tecla", "enter")) == 1
+
+
+def test_telefones_com_conversa_vem_dos_logs():
+    logs = cobra.pd.DataFrame({"status": ["ENVIADO", "PULADO", "NUMERO_INVALIDO"],
+                               "telefone": ["11912345678", "11987654321", "xx"]})
+    assert cobra.telefones_com_conversa(logs) == {"5511912345678"}
+
+
+class AmbienteSemClipboard(AmbienteGravador):
+    def copiar(self, texto):
+        pass                                            # outro app segura o clipboard
+
+
+def test_digitacao_mantem_acentos_pelo_clipboard():
+    amb = AmbienteGravador()
+    amb.clip = "outra coisa"
+    assert cobra.injeta_texto(amb, "Olá, João\nR$ 10", colar=False) == "DIGITAR"
+    assert amb.acoes == [("digitar", "Ol"), ("atalho", "ctrl", "v"), ("digitar", ", Jo"),
+                         ("atalho", "ctrl", "v"), ("digitar", "o"), ("atalho", "shift", "enter"),
+                         ("digitar", "R$ 10")]
+
+
+def test_sem_clipboard_nao_digita_texto_sem_acento():
+    amb = AmbienteSemClipboard()
+    assert cobra.injeta_texto(amb, "Olá", colar=False) == ""
+    assert cobra.injeta_texto(amb, "Ola", colar=False) == "DIGITAR"
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+import cobra
+
+
+def test_snapshot_ida_e_volta(tmp_path):
+    df = pd.DataFrame({
+        "Codigo4d": ["0012", "0001", "0340"],
+        "Cliente": ["JOÃO DA CONCEIÇÃO", "ANA", None],
+        "Saldo": [150.0, np.nan, 1234.5],
+        "VendedorArquivo": ["São Paulo", "V1", "V1"],
+    })
+    meta = {"origem_label": "relatório.pdf", "msg_base": "Olá {cliente}"}
+    tels = {"0012": "5511912345678", "0001": "5521988887777"}
+    caminho = cobra.salva_sessao(df, meta, tels, tmp_path / "sessao.npz")
+
+    assert cobra.le_meta_sessao(caminho)["linhas"] == 3
+    volta, meta2, tels2 = cobra.carrega_sessao(caminho)
+    assert volta["Codigo4d"].tolist() == ["0012", "0001", "0340"]           # zeros à esquerda mantidos
+    assert volta["Cliente"].tolist() == ["JOÃO DA CONCEIÇÃO", "ANA", ""]
+    assert volta["VendedorArquivo"].tolist() == ["São Paulo", "V1", "V1"]
+    assert volta["Saldo"].iloc[0] == 150.0 and np.isnan(volta["Saldo"].iloc[1])
+    assert (meta2["origem_label"], meta2["msg_base"]) == ("relatório.pdf", "Olá {cliente}")
+    assert tels2 == tels
+
+
+def test_snapshot_sem_consolidado(tmp_path):
+    caminho = cobra.salva_sessao(None, {}, {}, tmp_path / "sessao.npz")
+    df, meta, tels = cobra.carrega_sessao(caminho)
+    assert df is None and tels == {} and meta["linhas"] == 0
@@ -0,0 +1,29 @@
+import pandas as pd
+
+import cobra
+
+
+def test_normaliza_telefones_formatos_aceitos():
+    entrada = pd.Series([
+        "(11) 91234-5678",      # celular nacional com pontuação
+        "011 91234-5678",       # 0 de tronco
+        "0 21 11 91234-5678",   # 0 + operadora + DDD + número
+        "+55 11 91234-5678",    # DDI presente
+        "005511912345678",      # prefixo internacional 00
+        "1133334444",           # fixo (10 dígitos)
+    ])
+    tel, motivo = cobra.normaliza_telefones(entrada)
+    assert tel.tolist() == ["5511912345678"] * 5 + ["551133334444"]
+    assert (motivo == "").all()
+
+
+def test_normaliza_telefones_rejeicoes():
+    entrada = pd.Series(["", "123", "(10) 91234-5678", "11 81234-5678", None])
+    tel, motivo = cobra.normaliza_telefones(entrada)
+    assert motivo.tolist() == ["vazio", "tamanho inválido", "DDD inválido", "celular sem 9", "vazio"]
+    assert (tel == "").all()
+
+
+def test_normaliza_telefone_escalar_igual_ao_vetorizado():
+    for bruto in ("(11) 91234-5678", "5511912345678", "11 81234-5678"):
+        assert cobra.normaliza_telefone(bruto) == cobra.normaliza_telefones(pd.Series([bruto]))[0].iat[0]
@@ -0,0 +1,48 @@
+import json
+import zipfile
+
+import cobra
+
+CSV = "Relatório;Vendedor\n0012 ANA SILVA;\nSALDO DO CLIENTE;150,00\n0034 JOÃO;\nTOTAL;1.234,50\n"
+
+
+def _zip(caminho, membros):
+    with zipfile.ZipFile(caminho, "w") as zf:
+        for nome, dados in membros.items():
+            zf.writestr(nome, dados)
+    return caminho
+
+
+def test_read_csv_any_bytes_detecta_encoding_e_separador():
+    df = cobra._read_csv_any(CSV.encode("cp1252"))
+    assert list(df.columns) == ["Relatório", "Vendedor"]
+    assert df.iloc[3].tolist() == ["TOTAL", "1.234,50"]
+    df = cobra._read_csv_any(CSV.replace(";", "\t").encode("utf-8"))
+    assert df.iloc[0, 0] == "0012 ANA SILVA"
+
+
+def test_zip_le_membros_em_memoria_e_ignora_lixo(tmp_path):
+    arq = _zip(tmp_path / "rel.zip", {
+        "norte/VENDEDOR.csv": CSV.encode("utf-8"),
+        "sul/VENDEDOR.txt": "Relatório;Sul\n0056 CAIO;\nSALDO;10,00\n".encode("cp1252"),
+        "__MACOSX/norte/._VENDEDOR.csv": b"lixo",
+        "leia-me.md": b"nada",
+        "vazio.csv": b"sem clientes aqui\n",
+    })
+    res = {nome: r for nome, _, r in cobra.processa_zip(arq)}
+    assert set(res) == {"norte/VENDEDOR.csv", "sul/VENDEDOR.txt", "vazio.csv"}
+    assert isinstance(res["vazio.csv"], RuntimeError)
+    assert res["norte/VENDEDOR.csv"][["Codigo4d", "Saldo", "VendedorArquivo"]].values.tolist() == [
+        ["0012", 150.0, "VENDEDOR"], ["0034", 1234.5, "VENDEDOR"]]
+    df = cobra.processa_arquivo(arq)
+    assert sorted(df["Codigo4d"]) == ["0012", "0034", "0056"]
+
+
+def test_zip_mesmo_nome_em_pastas_diferentes_nao_colide(tmp_path):
+    arq = _zip(tmp_path / "rel.zip", {"a/VENDEDOR.csv": CSV.encode("utf-8"),
+                                      "b/VENDEDOR.csv": CSV.encode("utf-8")})
+    nomes = [nome for nome, _, _ in cobra.processa_zip(arq, diagnostico=True)]
+    assert nomes == ["a/VENDEDOR.csv", "b/VENDEDOR.csv"]
+    diags = sorted(cobra.SAIDAS.glob("diagnostico_*.json"))
+    assert [p.name.split("_")[1:3] for p in diags] == [["a", "VENDEDOR"], ["b", "VENDEDOR"]]
+    assert json.loads(diags[0].read_text(encoding="utf-8"))["arquivo"] == "a/VENDEDOR.csv"